@@ -0,0 +1,158 @@
+"""Benchmark cache refreshes against the local GitHub fixture server.
+
+Usage:
+    uv run --group bench benchmark.py [--repos N] [--latency-ms MS] [--json] ...
+
+Starts fixture_server.py in a child process, points a GitHubClient at it and runs
+a cold full refresh, a warm full refresh, an incremental refresh with no changes
+and one after `--change-fraction` of the repos were touched. Each phase reports
+wall time, API calls, bytes transferred and written and peak Python memory, so
+changes to GitHubClient or CacheManager can be compared without network access.
+
+Uses fakeredis unless --redis-url is given. A real Redis gets the service's
+`lessons:*` keys written into it, so point it at a scratch database.
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import time
+import tracemalloc
+from typing import Any, Dict
+
+import requests
+
+import fixture_server
+import metrics
+from cache_manager import CacheManager
+from github_client import GitHubClient
+from scheduler import LessonCacheScheduler
+
+COLUMNS = [
+    ("phase", "phase", "{}"),
+    ("ok", "ok", "{}"),
+    ("wall_seconds", "wall s", "{:.2f}"),
+    ("graphql_requests", "graphql", "{}"),
+    ("rest_requests", "rest", "{}"),
+    ("not_modified", "304s", "{}"),
+    ("errors", "5xx", "{}"),
+    ("rate_limited", "429s", "{}"),
+    ("bytes_received", "recv KiB", "{:.0f}"),
+    ("redis_bytes_written", "redis KiB", "{:.0f}"),
+    ("peak_memory_mb", "peak MiB", "{:.1f}"),
+    ("lesson_repos", "lessons", "{}"),
+]
+
+
+def _serve(args: argparse.Namespace, ready):
+    server = fixture_server.make_server(fixture_server.state_from_args(args))
+    ready.put(server.server_address[1])
+    server.serve_forever()
+
+
+def _cache_manager(redis_url: str) -> CacheManager:
+    if redis_url:
+        return CacheManager(redis_url)
+    try:
+        import fakeredis
+    except ImportError:
+        raise SystemExit("fakeredis is not installed: use `uv run --group bench` or --redis-url")
+    server = fakeredis.FakeServer()
+    return CacheManager(
+        redis_client=fakeredis.FakeRedis(server=server, decode_responses=True),
+        binary_client=fakeredis.FakeRedis(server=server),
+    )
+
+
+def run_phase(name: str, scheduler: LessonCacheScheduler, api_url: str) -> Dict[str, Any]:
+    """Run one refresh and collect what it cost."""
+    requests.post(f"{api_url}/_reset_stats", json={}).raise_for_status()
+    bytes_before = metrics.BYTES_WRITTEN.value()
+    refreshed_before = scheduler.last_refresh_time
+    tracemalloc.reset_peak()
+
+    start = time.perf_counter()
+    scheduler.refresh_cache()
+    wall = time.perf_counter() - start
+
+    _, peak = tracemalloc.get_traced_memory()
+    stats = requests.get(f"{api_url}/_stats").json()
+    repos = scheduler.cache_manager.get_repos() or []
+    return {
+        "phase": name,
+        "ok": scheduler.last_refresh_time != refreshed_before,
+        "wall_seconds": wall,
+        "graphql_requests": stats["graphql_requests"],
+        "rest_requests": stats["rest_requests"],
+        "not_modified": stats["not_modified"],
+        "errors": stats["errors"],
+        "rate_limited": stats["rate_limited"],
+        "bytes_received": stats["bytes_sent"] / 1024,
+        "redis_bytes_written": (metrics.BYTES_WRITTEN.value() - bytes_before) / 1024,
+        "peak_memory_mb": peak / 1024 / 1024,
+        "lesson_repos": len(repos),
+        "stages": dict(scheduler.last_refresh_stages),
+    }
+
+
+def print_table(results):
+    rows = [[fmt.format(r[key]) for key, _, fmt in COLUMNS] for r in results]
+    headers = [header for _, header, _ in COLUMNS]
+    widths = [max(len(cell) for cell in column) for column in zip(headers, *rows)]
+    for row in [headers, *rows]:
+        print("  ".join(cell.rjust(width) for cell, width in zip(row, widths)))
+    print()
+    for r in results:
+        stages = ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in r["stages"].items())
+        print(f"{r['phase']}: {stages}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    fixture_server.add_arguments(parser)
+    parser.add_argument("--change-fraction", type=float, default=0.05)
+    parser.add_argument("--redis-url", help="use this Redis instead of fakeredis")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="show service logs")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    ready = multiprocessing.Queue()
+    server = multiprocessing.Process(target=_serve, args=(args, ready), daemon=True)
+    server.start()
+    api_url = f"http://127.0.0.1:{ready.get(timeout=60)}"
+
+    try:
+        scheduler = LessonCacheScheduler(
+            github_client=GitHubClient("benchmark-token", "fixture", api_url),
+            cache_manager=_cache_manager(args.redis_url),
+        )
+        tracemalloc.start()
+        results = [run_phase("full (cold)", scheduler, api_url)]
+
+        scheduler.last_full_refresh_time = None
+        results.append(run_phase("full (warm)", scheduler, api_url))
+        results.append(run_phase("incremental (unchanged)", scheduler, api_url))
+
+        requests.post(f"{api_url}/_mutate", json={"fraction": args.change_fraction})
+        results.append(
+            run_phase(f"incremental ({args.change_fraction:.0%} changed)", scheduler, api_url)
+        )
+        tracemalloc.stop()
+    finally:
+        server.terminate()
+
+    if args.json:
+        print(json.dumps({"config": vars(args), "results": results}, indent=2))
+    else:
+        print_table(results)
+    return 0 if all(r["ok"] for r in results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,37 +4,467 @@ import os
 import json
 import logging
 import redis
-from typing import List, Dict, Any, Optional
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Union
+import codec
+import metrics
+from search_index import readme_terms
 
 logger = logging.getLogger(__name__)
 
 
+# KEYS: current pointer, highest fencing token seen. ARGV: generation, ttl, token.
+# Refuses to publish for a leader whose lease was already taken over.
+FENCED_PUBLISH_SCRIPT = """
+local seen = tonumber(redis.call('get', KEYS[2]) or '0')
+if tonumber(ARGV[3]) < seen then
+  return 0
+end
+redis.call('set', KEYS[2], ARGV[3])
+redis.call('set', KEYS[1], ARGV[1], 'EX', ARGV[2])
+return 1
+"""
+
+
+def _commit_timestamp(repo: Dict[str, Any]) -> float:
+    """Epoch seconds of a repo's last commit, used to order topic sets."""
+    date = repo.get("last_commit_date") or repo["updated_at"]
+    return datetime.fromisoformat(date.replace("Z", "+00:00")).timestamp()
+
+
+class CacheGeneration:
+    """
+    One refresh's worth of cache keys, written under `lessons:v{N}:*`.
+    Nothing is visible to readers until `publish()` flips `lessons:current` to N,
+    so readers always see a repo list together with the READMEs written for it.
+    """
+
+    def __init__(self, cache_manager: "CacheManager", number: int):
+        self.cache_manager = cache_manager
+        self.number = number
+        self.previous_number = cache_manager.current_generation()
+        self.prefix = cache_manager.generation_prefix(number)
+        # Set of every key written into this generation, so it can be expired or
+        # kept alive without scanning the keyspace
+        self.keys_key = f"{self.prefix}keys"
+        # Keys written since the last flush, added to `keys_key` when it is sent
+        self._written_keys = []
+        # Buffered writes, sent in one round trip on publish
+        self._pipe = cache_manager.redis_client.pipeline(transaction=False)
+        # Payloads identical to the previous generation, copied instead of rewritten
+        self.unchanged_payloads = 0
+        # Payload bytes buffered since the last flush
+        self._buffered_bytes = 0
+        # READMEs whose content differs from the previous generation (see set_readme)
+        self.changed_readmes = set()
+        # Previous generation's README content hashes, read in bulk (see
+        # prefetch_readme_hashes) so writing a README costs no round trip
+        self._previous_readme_hashes: Dict[str, Optional[bytes]] = {}
+
+    def _set_payload(
+        self,
+        suffix: str,
+        content: str,
+        previous_hash: Optional[bytes] = None,
+        changed: bool = False,
+    ) -> bool:
+        """
+        Write a (possibly compressed) payload, copying it if the content is unchanged.
+        Returns whether it was copied. The previous generation's content hash is read
+        from its payload header unless the caller passes `previous_hash`, or knows
+        the content `changed`.
+        """
+        key = f"{self.prefix}{suffix}"
+        ttl = self.cache_manager.ttl
+        if self.cache_manager.codec and self.previous_number is not None and not changed:
+            old_key = f"{self.cache_manager.generation_prefix(self.previous_number)}{suffix}"
+            if previous_hash is None:
+                previous_hash = self.cache_manager.stored_hash(old_key)
+            if previous_hash == codec.hash_content(content):
+                # Server-side copy: the AOF logs a short COPY, not the payload again
+                self._pipe.copy(old_key, key, replace=True)
+                self._pipe.expire(key, ttl)
+                self._written_keys.append(key)
+                self.unchanged_payloads += 1
+                return True
+        value = self.cache_manager.encode(content)
+        size = len(value.encode("utf-8") if isinstance(value, str) else value)
+        metrics.BYTES_WRITTEN.inc(size)
+        self._pipe.setex(key, ttl, value)
+        self._written_keys.append(key)
+        # Nothing is visible before publish, so large generations are sent in chunks
+        # rather than buffered whole
+        self._buffered_bytes += size
+        if self._buffered_bytes >= self.cache_manager.flush_bytes:
+            self.flush()
+        return False
+
+    def prefetch_readme_hashes(self, repo_names: List[str]):
+        """
+        Read the previous generation's content hashes of READMEs about to be written,
+        in one round trip. They are kept in its validators, so neither the READMEs
+        nor their headers are read back.
+        """
+        names = [name for name in repo_names if name not in self._previous_readme_hashes]
+        if self.previous_number is None or not names:
+            return
+        old_prefix = self.cache_manager.generation_prefix(self.previous_number)
+        try:
+            pipe = self.cache_manager.redis_client.pipeline(transaction=False)
+            for name in names:
+                pipe.hget(f"{old_prefix}readme_validators:{name}", "sha256")
+            hashes = pipe.execute()
+        except Exception as e:
+            logger.error(f"Error reading README hashes of generation {self.previous_number}: {e}")
+            return
+        for name, sha256 in zip(names, hashes):
+            self._previous_readme_hashes[name] = bytes.fromhex(sha256) if sha256 else None
+
+    def _previous_readme_hash(self, repo_name: str) -> Optional[bytes]:
+        """The previous generation's content hash of a README, if it recorded one."""
+        if self.previous_number is None:
+            return None
+        if repo_name not in self._previous_readme_hashes:
+            # Not prefetched, e.g. a single README fill
+            self.prefetch_readme_hashes([repo_name])
+        return self._previous_readme_hashes.get(repo_name)
+
+    def set_repos(self, repos: List[Dict[str, Any]]):
+        """
+        Write the list of lesson repositories into this generation, along with a
+        hash of repos keyed by name and a sorted set of repo names per topic
+        (newest commit first when read in reverse), so readers can fetch one repo
+        or one topic without deserializing the whole list.
+        """
+        ttl = self.cache_manager.ttl
+        # Each repo is encoded once, for both the list (same bytes as dumping the
+        # whole list) and the index
+        encoded = [json.dumps(repo) for repo in repos]
+        self._set_payload("repos", "[" + ", ".join(encoded) + "]")
+        if not repos:
+            return
+
+        index_key = f"{self.prefix}repo_index"
+        self._pipe.hset(
+            index_key, mapping={repo["name"]: data for repo, data in zip(repos, encoded)}
+        )
+        self._pipe.expire(index_key, ttl)
+        self._written_keys.append(index_key)
+
+        by_topic: Dict[str, Dict[str, float]] = {}
+        for repo in repos:
+            score = _commit_timestamp(repo)
+            for topic in repo["topics"]:
+                by_topic.setdefault(topic, {})[repo["name"]] = score
+        for topic, members in by_topic.items():
+            topic_key = f"{self.prefix}topic:{topic}"
+            self._pipe.zadd(topic_key, members)
+            self._pipe.expire(topic_key, ttl)
+            self._written_keys.append(topic_key)
+
+    def set_category_tree(self, tree: Dict[str, Any]):
+        """Write the precomputed category tree document into this generation."""
+        self._set_payload("category_tree", json.dumps(tree))
+
+    def set_meta(self, fetched_at: float, stale_after: float):
+        """
+        Record when this generation's data was fetched from GitHub and when it
+        should be considered stale (epoch seconds). Serving it stale only extends
+        key TTLs, so these stay as written.
+        """
+        meta_key = f"{self.prefix}meta"
+        self._pipe.hset(meta_key, mapping={"fetched_at": fetched_at, "stale_after": stale_after})
+        self._pipe.expire(meta_key, self.cache_manager.ttl)
+        self._written_keys.append(meta_key)
+
+    def set_readme(
+        self,
+        repo_name: str,
+        content: str,
+        validators: Optional[Dict[str, str]] = None,
+    ):
+        """Write README content, its search terms and its HTTP validators into this generation."""
+        ttl = self.cache_manager.ttl
+        digest = codec.hash_content(content)
+        previous_hash = self._previous_readme_hash(repo_name)
+        copied = self._set_payload(f"readme:{repo_name}", content, previous_hash)
+        if not copied and previous_hash != digest:
+            self.changed_readmes.add(repo_name)
+        terms_key = f"{self.prefix}readme_terms:{repo_name}"
+        self._pipe.setex(terms_key, ttl, json.dumps(readme_terms(content)))
+        validators_key = f"{self.prefix}readme_validators:{repo_name}"
+        self._pipe.hset(
+            validators_key,
+            mapping={
+                **(validators or {}),
+                "bytes": len(content.encode("utf-8")),
+                "sha256": digest.hex(),
+            },
+        )
+        self._pipe.expire(validators_key, ttl)
+        self._written_keys.extend((terms_key, validators_key))
+
+    def set_readme_html(self, repo_name: str, rendered: Dict[str, Any]):
+        """Write a README's pre-rendered HTML and table of contents (see readme_render.py)."""
+        # A changed README's HTML is new too, so its old header isn't worth reading
+        self._set_payload(
+            f"readme_html:{repo_name}",
+            json.dumps(rendered),
+            changed=repo_name in self.changed_readmes,
+        )
+
+    def carry_over_readmes(
+        self, repo_names: List[str], require_html: bool = True
+    ) -> List[str]:
+        """
+        Copy unchanged READMEs from the current generation server-side.
+        Returns the names that were not cached there and need fetching. Without
+        `require_html` (rendering disabled), a README without HTML is reused too.
+        """
+        if not repo_names:
+            return []
+        if self.previous_number is None:
+            return list(repo_names)
+
+        old_prefix = self.cache_manager.generation_prefix(self.previous_number)
+        ttl = self.cache_manager.ttl
+        try:
+            pipe = self.cache_manager.redis_client.pipeline(transaction=False)
+            kinds = ("readme", "readme_validators", "readme_terms", "readme_html")
+            # Validators are optional; the rest must all be there to reuse a README
+            optional = {"readme_validators"}
+            if not require_html:
+                optional.add("readme_html")
+            required = [i for i, kind in enumerate(kinds) if kind not in optional]
+            new_keys = []
+            for name in repo_names:
+                for kind in kinds:
+                    new_key = f"{self.prefix}{kind}:{name}"
+                    pipe.copy(f"{old_prefix}{kind}:{name}", new_key, replace=True)
+                    pipe.expire(new_key, ttl)
+                    new_keys.append(new_key)
+            # After the copies, so their results keep their positions
+            pipe.sadd(self.keys_key, *new_keys)
+            pipe.expire(self.keys_key, ttl)
+            with metrics.REDIS_WRITE_SECONDS.time(operation="carry_over"):
+                results = pipe.execute()
+            # COPY and EXPIRE per kind; a README cached before its search terms or
+            # HTML existed is fetched again too
+            stride = 2 * len(kinds)
+            return [
+                name
+                for i, name in enumerate(repo_names)
+                if not all(results[i * stride + 2 * k] for k in required)
+            ]
+        except Exception as e:
+            logger.error(f"Error carrying READMEs over to generation {self.number}: {e}")
+            return list(repo_names)
+
+    def flush(self):
+        """Send buffered writes to Redis without publishing."""
+        if self._written_keys:
+            self._pipe.sadd(self.keys_key, *self._written_keys)
+            self._pipe.expire(self.keys_key, self.cache_manager.ttl)
+            self._written_keys = []
+        with metrics.REDIS_WRITE_SECONDS.time(operation="flush"):
+            self._pipe.execute()
+        self._buffered_bytes = 0
+
+    def publish(self, fencing_token: Optional[int] = None) -> bool:
+        """
+        Flush buffered writes and atomically make this the current generation.
+        With a fencing token, publishing fails if a newer leader has already published.
+        """
+        cache_manager = self.cache_manager
+        try:
+            self.flush()
+            with metrics.REDIS_WRITE_SECONDS.time(operation="publish"):
+                if fencing_token is None:
+                    published = cache_manager.redis_client.set(
+                        cache_manager.current_key, self.number, ex=cache_manager.ttl
+                    )
+                else:
+                    published = cache_manager.fenced_publish(
+                        keys=[cache_manager.current_key, cache_manager.fence_key],
+                        args=[self.number, cache_manager.ttl, fencing_token],
+                    )
+            if not published:
+                logger.error(
+                    f"Refused to publish generation {self.number}: fencing token "
+                    f"{fencing_token} is stale"
+                )
+                return False
+            logger.info(
+                f"Published cache generation {self.number} "
+                f"({self.unchanged_payloads} unchanged payloads copied)"
+            )
+        except Exception as e:
+            logger.error(f"Error publishing cache generation {self.number}: {e}")
+            return False
+
+        if self.previous_number is not None:
+            self.cache_manager.expire_generation(self.previous_number)
+        return True
+
+    def discard(self):
+        """
+        Expire the keys of a generation that failed before it was published, so
+        chunks already flushed don't linger for the whole TTL.
+        """
+        if self.cache_manager.current_generation() == self.number:
+            # The publish went through even though it reported an error
+            return
+        self.cache_manager.expire_generation(self.number)
+
+
 class CacheManager:
     """Manages Redis caching for lesson repositories and READMEs."""
 
-    def __init__(self, redis_url: str = None):
+    def __init__(self, redis_url: str = None, redis_client=None, binary_client=None):
         redis_url = redis_url or os.getenv("REDIS_URL", "redis://localhost:6379")
-        self.redis_client = redis.from_url(redis_url, decode_responses=True)
-        self.repos_key = "lessons:repos"
-        self.readme_prefix = "lessons:readme:"
+        # Bound every command so a slow Redis surfaces as an error instead of a hang
+        timeout = float(os.getenv("REDIS_TIMEOUT_SECONDS", "5"))
+        # Clients can be passed in (e.g. fakeredis in benchmarks) instead of a URL
+        self.redis_client = redis_client or redis.from_url(
+            redis_url,
+            decode_responses=True,
+            socket_timeout=timeout,
+            socket_connect_timeout=timeout,
+        )
+        # Payload values may be compressed bytes, so they are read without decoding
+        self.binary_client = binary_client or redis.from_url(
+            redis_url,
+            decode_responses=False,
+            socket_timeout=timeout,
+            socket_connect_timeout=timeout,
+        )
+        # Opt-in framed payload format (see codec.py): "none", "gzip" or "zstd"
+        self.codec = os.getenv("CACHE_CODEC") or None
+        if self.codec and self.codec not in codec.CODECS:
+            raise ValueError(f"Unknown CACHE_CODEC: {self.codec}")
+        # Pointer to the generation readers should use, and the counter allocating them
+        self.current_key = "lessons:current"
+        self.generation_counter_key = "lessons:generation"
+        # Highest leader fencing token that has published
+        self.fence_key = "lessons:current:fence"
+        self.fenced_publish = self.redis_client.register_script(FENCED_PUBLISH_SCRIPT)
         # Use a 30-minute TTL to ride out short upstream outages
         self.ttl = 30 * 60
+        # Readers may still be mid-lookup in the generation we just replaced
+        self.generation_grace = 60
+        # Buffered payload bytes that trigger sending a generation's writes early
+        self.flush_bytes = int(os.getenv("CACHE_FLUSH_KB", "1024")) * 1024
+
+    def generation_prefix(self, number: int) -> str:
+        """Key prefix for a cache generation."""
+        return f"lessons:v{number}:"
+
+    def encode(self, content: str) -> Union[str, bytes]:
+        """Encode a payload for storage with the configured codec."""
+        return codec.encode(content, self.codec) if self.codec else content
+
+    def get_payload(self, key: str) -> Optional[str]:
+        """Read and decode a payload written by `encode`."""
+        value = self.binary_client.get(key)
+        return codec.decode(value) if value is not None else None
+
+    def stored_hash(self, key: str) -> Optional[bytes]:
+        """Content hash from a stored payload's header, without reading the payload."""
+        try:
+            header = self.binary_client.getrange(key, 0, codec.HEADER_SIZE - 1)
+            return codec.stored_hash(header)
+        except Exception as e:
+            logger.error(f"Error reading payload header of {key}: {e}")
+            return None
+
+    def current_generation(self) -> Optional[int]:
+        """Number of the generation readers currently see."""
+        try:
+            number = self.redis_client.get(self.current_key)
+            return int(number) if number else None
+        except Exception as e:
+            logger.error(f"Error reading current cache generation: {e}")
+            return None
+
+    def new_generation(self) -> CacheGeneration:
+        """Allocate a new, unpublished cache generation."""
+        number = self.redis_client.incr(self.generation_counter_key)
+        return CacheGeneration(self, number)
+
+    def generation_keys(self, number: int) -> List[str]:
+        """Every key of a generation, from the set its writes are recorded in."""
+        prefix = self.generation_prefix(number)
+        keys_key = f"{prefix}keys"
+        keys = self.redis_client.smembers(keys_key)
+        if not keys:
+            # Written before generations recorded their keys
+            return list(self.redis_client.scan_iter(match=f"{prefix}*", count=500))
+        return [*keys, keys_key]
+
+    def expire_generation(self, number: int):
+        """Garbage-collect a replaced generation after a short grace period."""
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key in self.generation_keys(number):
+                pipe.expire(key, self.generation_grace)
+            with metrics.REDIS_WRITE_SECONDS.time(operation="expire"):
+                pipe.execute()
+        except Exception as e:
+            logger.error(f"Error expiring cache generation {number}: {e}")
 
-    def cache_repos(self, repos: List[Dict[str, Any]]) -> bool:
-        """Cache the list of lesson repositories."""
+    def extend_ttl(self) -> bool:
+        """Keep the current generation alive for another TTL. False if there is none."""
+        number = self.current_generation()
+        if number is None:
+            return False
         try:
-            data = json.dumps(repos)
-            self.redis_client.setex(self.repos_key, self.ttl, data)
-            logger.info(f"Cached {len(repos)} lesson repos with TTL {self.ttl}s")
+            # Failed cycles come every few minutes; only walk the generation's keys
+            # once the TTL is half gone
+            remaining = self.redis_client.ttl(self.current_key)
+            if remaining > self.ttl / 2:
+                logger.info(f"Cache generation {number} still has {remaining}s to live")
+                return True
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.expire(self.current_key, self.ttl)
+            for key in self.generation_keys(number):
+                pipe.expire(key, self.ttl)
+            pipe.execute()
+            logger.info(f"Extended TTL of cache generation {number} by {self.ttl}s")
             return True
         except Exception as e:
-            logger.error(f"Error caching repos: {e}")
+            logger.error(f"Error extending cache TTL: {e}")
             return False
 
+    def get_freshness(self, number: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        {"fetched_at", "stale_after", "stale"} for a generation (the current one by
+        default). None if there is no generation or it predates freshness metadata.
+        """
+        try:
+            number = number if number is not None else self.current_generation()
+            if number is None:
+                return None
+            meta = self.redis_client.hgetall(f"{self.generation_prefix(number)}meta")
+            if not meta:
+                return None
+            stale_after = float(meta["stale_after"])
+            return {
+                "fetched_at": float(meta["fetched_at"]),
+                "stale_after": stale_after,
+                "stale": time.time() >= stale_after,
+            }
+        except Exception as e:
+            logger.error(f"Error reading freshness of cache generation {number}: {e}")
+            return None
+
     def get_repos(self) -> Optional[List[Dict[str, Any]]]:
         """Retrieve cached lesson repositories."""
         try:
-            data = self.redis_client.get(self.repos_key)
+            number = self.current_generation()
+            if number is None:
+                return None
+            data = self.get_payload(f"{self.generation_prefix(number)}repos")
             if data:
                 repos = json.loads(data)
                 logger.debug(f"Retrieved {len(repos)} repos from cache")
@@ -44,22 +474,52 @@ class CacheManager:
             logger.error(f"Error retrieving repos from cache: {e}")
             return None
 
-    def cache_readme(self, repo_name: str, content: str) -> bool:
-        """Cache README content for a repository."""
+    def cache_readme(
+        self,
+        repo_name: str,
+        content: str,
+        validators: Optional[Dict[str, str]] = None,
+        rendered: Optional[Dict[str, Any]] = None,
+    ) -> Optional[int]:
+        """
+        Cache README content (and optionally its rendered HTML) in the current
+        generation. Returns that generation's number, or None if nothing was cached.
+        """
+        number = self.current_generation()
+        if number is None:
+            logger.debug(f"No current generation to cache README for {repo_name}")
+            return None
         try:
-            key = f"{self.readme_prefix}{repo_name}"
-            self.redis_client.setex(key, self.ttl, content)
+            generation = CacheGeneration(self, number)
+            generation.set_readme(repo_name, content, validators)
+            if rendered is not None:
+                generation.set_readme_html(repo_name, rendered)
+            generation.flush()
             logger.debug(f"Cached README for {repo_name}")
-            return True
+            return number
         except Exception as e:
             logger.error(f"Error caching README for {repo_name}: {e}")
-            return False
+            return None
+
+    def get_readme_terms(self, prefix: str, repo_names: List[str]) -> Dict[str, Dict[str, int]]:
+        """Stored README search terms for many repos under a generation prefix."""
+        if not repo_names:
+            return {}
+        values = self.redis_client.mget([f"{prefix}readme_terms:{name}" for name in repo_names])
+        return {
+            name: json.loads(value)
+            for name, value in zip(repo_names, values)
+            if value is not None
+        }
 
     def get_readme(self, repo_name: str) -> Optional[str]:
         """Retrieve cached README content for a repository."""
         try:
-            key = f"{self.readme_prefix}{repo_name}"
-            content = self.redis_client.get(key)
+            number = self.current_generation()
+            if number is None:
+                return None
+            key = f"{self.generation_prefix(number)}readme:{repo_name}"
+            content = self.get_payload(key)
             if content:
                 logger.debug(f"Retrieved README for {repo_name} from cache")
                 return content
@@ -68,6 +528,19 @@ class CacheManager:
             logger.error(f"Error retrieving README for {repo_name} from cache: {e}")
             return None
 
+    def get_readme_validators(self, repo_name: str) -> Dict[str, str]:
+        """Retrieve stored ETag / Last-Modified validators for a README."""
+        try:
+            number = self.current_generation()
+            if number is None:
+                return {}
+            return self.redis_client.hgetall(
+                f"{self.generation_prefix(number)}readme_validators:{repo_name}"
+            )
+        except Exception as e:
+            logger.error(f"Error retrieving README validators for {repo_name}: {e}")
+            return {}
+
     def health_check(self) -> bool:
         """Check if Redis connection is healthy."""
         try:
@@ -0,0 +1,55 @@
+"""Category tree construction for lesson repos.
+
+Mirrors `buildCategoryTree` in src/lib/lessons/utils.ts so the tree can be built
+once per refresh and published, instead of on every page load.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# Topic tags look like {categoryName}-{level}{branch?}, e.g. "javascript-2a"
+TOPIC_PATTERN = re.compile(r"(.+)-(\d+)([a-z])?")
+
+# Key holding the lessons that sit directly at a node of the tree
+LESSONS_KEY = "__lessons__"
+
+
+def parse_topic(tag: str) -> Optional[Tuple[str, int, str]]:
+    """Parse a topic tag into (name, level, chain), or None if it isn't numbered."""
+    match = TOPIC_PATTERN.fullmatch(tag)
+    if not match:
+        return None
+    name, level, branch = match.groups()
+    return name, int(level), branch or "_default"
+
+
+def build_category_tree(repos: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Build the nested category tree from lesson repos' numbered topics.
+    Each branch (a, b, _default) of a repo's topics, sorted by level, is one path
+    through the tree; the repo is listed under `__lessons__` at the end of each path.
+    """
+    tree: Dict[str, Any] = {}
+
+    for repo in repos:
+        topics_by_chain: Dict[str, List[Tuple[str, int, str]]] = {}
+        for topic in repo["topics"]:
+            if topic == "lesson":
+                continue
+            parsed = parse_topic(topic)
+            if not parsed:
+                continue
+            topics_by_chain.setdefault(parsed[2], []).append(parsed)
+
+        for topics in topics_by_chain.values():
+            topics.sort(key=lambda t: t[1])
+
+            current = tree
+            for name, _, _ in topics:
+                current = current.setdefault(name, {})
+
+            lessons = current.setdefault(LESSONS_KEY, [])
+            if not any(lesson["id"] == repo["id"] for lesson in lessons):
+                lessons.append(repo)
+
+    return tree
@@ -0,0 +1,141 @@
+"""Change feed announcing what each published cache generation changed."""
+
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def diff_repos(
+    previous: Optional[List[Dict[str, Any]]],
+    repos: List[Dict[str, Any]],
+    changed_readmes,
+) -> Dict[str, Any]:
+    """
+    Per-repo changes between two repo lists, keyed by name like the cache: `added` and
+    `modified` carry the new records, `removed` the names that are gone, and
+    `readme_changed` repos that kept their name but got new README content. A renamed
+    repo is removed under its old name and added under the new one.
+    """
+    previous_by_name = {repo["name"]: repo for repo in previous or []}
+    current_names = {repo["name"] for repo in repos}
+    return {
+        "added": [repo for repo in repos if repo["name"] not in previous_by_name],
+        "removed": sorted(name for name in previous_by_name if name not in current_names),
+        "modified": [
+            repo
+            for repo in repos
+            if repo["name"] in previous_by_name and previous_by_name[repo["name"]] != repo
+        ],
+        "readme_changed": sorted(
+            name for name in changed_readmes if name in previous_by_name and name in current_names
+        ),
+    }
+
+
+class ChangeFeed:
+    """
+    Publishes one entry per published generation, so readers can keep in-memory
+    copies of the repo list and READMEs and apply deltas instead of re-reading
+    everything. Each entry gets a version from a Redis counter that only grows
+    and is appended to a capped stream (for readers catching up) and sent on a
+    pub/sub channel of the same name (for readers listening live).
+
+    Entries also carry `generation` and `previous_generation`. A reader holding
+    generation N applies the entry whose `previous_generation` is N, and reloads
+    everything if it sees any other, or one with `reset` set.
+    """
+
+    def __init__(self, redis_client, max_length: int = 1000, max_repos: int = 500):
+        self.redis_client = redis_client
+        self.key = "lessons:change_feed"
+        self.version_key = "lessons:change_feed:version"
+        self.channel = "lessons:change_feed"
+        # Approximate cap on stream entries
+        self.max_length = max_length
+        # Diffs touching more repos than this are sent as a reset instead
+        self.max_repos = max_repos
+
+    def publish(
+        self,
+        generation_number: int,
+        previous_number: Optional[int],
+        changes: Optional[Dict[str, Any]],
+    ) -> Optional[int]:
+        """
+        Announce a published generation with its `diff_repos` changes, or None when
+        there is nothing to diff against. Returns the entry's version.
+        """
+        touched = (
+            sum(len(changes[kind]) for kind in ("added", "removed", "modified"))
+            if changes is not None
+            else 0
+        )
+        reset = changes is None or previous_number is None or touched > self.max_repos
+        version = self._append(
+            {
+                "generation": generation_number,
+                "previous_generation": previous_number,
+                "published_at": time.time(),
+                "reset": reset,
+                **({} if reset else changes),
+            }
+        )
+        if version is not None:
+            logger.info(
+                f"Published change feed version {version} for generation {generation_number}"
+                + (" (reset)" if reset else f" ({touched} repos changed)")
+            )
+        return version
+
+    def publish_readme(self, generation_number: int, repo_name: str) -> Optional[int]:
+        """
+        Announce a README written into an already published generation (a README
+        fill). The entry moves from that generation to itself, so readers holding it
+        apply the entry and keep holding it.
+        """
+        return self._append(
+            {
+                "generation": generation_number,
+                "previous_generation": generation_number,
+                "published_at": time.time(),
+                "reset": False,
+                "added": [],
+                "removed": [],
+                "modified": [],
+                "readme_changed": [repo_name],
+            }
+        )
+
+    def _append(self, entry: Dict[str, Any]) -> Optional[int]:
+        """Give an entry the next version, then add it to the stream and send it."""
+        generation_number = entry["generation"]
+        try:
+            version = self.redis_client.incr(self.version_key)
+            entry = {"version": version, **entry}
+            payload = json.dumps(entry)
+            pipe = self.redis_client.pipeline()
+            pipe.xadd(
+                self.key,
+                {"version": version, "generation": generation_number, "entry": payload},
+                maxlen=self.max_length,
+                approximate=True,
+            )
+            pipe.publish(self.channel, payload)
+            pipe.execute()
+        except Exception as e:
+            # Readers miss a version and reload, so this never serves wrong data
+            logger.error(f"Error publishing changes of generation {generation_number}: {e}")
+            return None
+        return version
+
+    def version(self) -> Optional[int]:
+        """Version of the latest entry."""
+        try:
+            version = self.redis_client.get(self.version_key)
+            return int(version) if version else None
+        except Exception as e:
+            logger.error(f"Error reading change feed version: {e}")
+            return None
@@ -0,0 +1,97 @@
+"""Circuit breaker that stops calling an upstream that keeps failing."""
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of making a call while the circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    closed: calls go through; `failure_threshold` consecutive failures open it.
+    open: calls fail fast until the cooldown passes, then one probe is let through.
+    half_open: the probe's success closes the circuit; its failure reopens it with
+    the cooldown doubled (up to `max_cooldown`), so a long outage is retried less
+    and less often.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        cooldown: float = 30.0,
+        max_cooldown: float = 1800.0,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.state = "closed"
+        self.failures = 0
+        self.cooldown = cooldown
+        self.opened_at = None
+        self.opens = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go out now."""
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = "half_open"
+                logger.info(f"{self.name} circuit half-open, sending a probe")
+            if self.state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != "closed":
+                logger.info(f"{self.name} circuit closed")
+            self.state = "closed"
+            self.failures = 0
+            self.cooldown = self.base_cooldown
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open":
+                self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+                self._open()
+            elif self.state == "closed" and self.failures >= self.failure_threshold:
+                self._open()
+
+    def _open(self):
+        self.state = "open"
+        self.opened_at = time.monotonic()
+        self.opens += 1
+        self._probe_in_flight = False
+        logger.warning(
+            f"{self.name} circuit open after {self.failures} consecutive failures, "
+            f"retrying in {self.cooldown:.0f}s"
+        )
+
+    def seconds_until_retry(self) -> float:
+        """Time until the next probe may go out; 0 unless the circuit is open."""
+        with self._lock:
+            if self.state != "open":
+                return 0.0
+            return max(self.cooldown - (time.monotonic() - self.opened_at), 0.0)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "cooldown_seconds": self.cooldown,
+                "opens": self.opens,
+            }
@@ -0,0 +1,68 @@
+"""Framed, optionally compressed encoding for cached payloads.
+
+When `CACHE_CODEC` is set, large cache values (repo list, READMEs, category tree)
+are stored as a fixed header followed by the payload:
+
+    offset  size  field
+    0       4     magic, ASCII "LCF1"
+    4       1     codec: 0 = none, 1 = gzip, 2 = zstd
+    5       32    SHA-256 of the uncompressed UTF-8 content
+    37      ...   content, compressed with the codec
+
+Values without the magic are plain UTF-8 strings, as written when `CACHE_CODEC` is
+unset. `decodeLessonsValue` in src/lib/server/lessons-codec.ts is the Node decoder.
+"""
+
+import gzip
+import hashlib
+from typing import Optional
+
+MAGIC = b"LCF1"
+HEADER_SIZE = 37
+CODECS = {"none": 0, "gzip": 1, "zstd": 2}
+
+
+def hash_content(content: str) -> bytes:
+    """SHA-256 digest of content, as stored in the header."""
+    return hashlib.sha256(content.encode("utf-8")).digest()
+
+
+def encode(content: str, codec: str) -> bytes:
+    """Frame (and compress) content with the given codec name."""
+    raw = content.encode("utf-8")
+    if codec == "gzip":
+        payload = gzip.compress(raw, compresslevel=6)
+    elif codec == "zstd":
+        from compression import zstd
+
+        payload = zstd.compress(raw)
+    elif codec == "none":
+        payload = raw
+    else:
+        raise ValueError(f"Unknown cache codec: {codec}")
+    return MAGIC + bytes([CODECS[codec]]) + hashlib.sha256(raw).digest() + payload
+
+
+def decode(value: bytes) -> str:
+    """Decode a framed value; unframed values are returned as UTF-8 text."""
+    if not value.startswith(MAGIC) or len(value) < HEADER_SIZE:
+        return value.decode("utf-8")
+
+    codec = value[4]
+    payload = value[HEADER_SIZE:]
+    if codec == CODECS["gzip"]:
+        payload = gzip.decompress(payload)
+    elif codec == CODECS["zstd"]:
+        from compression import zstd
+
+        payload = zstd.decompress(payload)
+    elif codec != CODECS["none"]:
+        raise ValueError(f"Unknown cache codec id: {codec}")
+    return payload.decode("utf-8")
+
+
+def stored_hash(header: Optional[bytes]) -> Optional[bytes]:
+    """Content hash from the start of a framed value, or None if it isn't framed."""
+    if not header or not header.startswith(MAGIC) or len(header) < HEADER_SIZE:
+        return None
+    return header[5:HEADER_SIZE]
@@ -0,0 +1,41 @@
+"""Shared fixtures for the test modules: a CacheManager backed by fakeredis."""
+
+import fakeredis
+import pytest
+
+from cache_manager import CacheManager
+
+
+@pytest.fixture
+def redis_server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def redis_client(redis_server):
+    return fakeredis.FakeRedis(server=redis_server, decode_responses=True)
+
+
+@pytest.fixture
+def cache_manager(redis_server, redis_client):
+    return CacheManager(
+        redis_client=redis_client, binary_client=fakeredis.FakeRedis(server=redis_server)
+    )
+
+
+@pytest.fixture
+def read_cache(cache_manager):
+    from read_cache import ReadCache
+
+    # Checks the current generation on every read, as if another replica published
+    return ReadCache(cache_manager, max_bytes=1 << 20, generation_check_interval=0)
+
+
+@pytest.fixture
+def client(monkeypatch, read_cache):
+    """Flask test client for main.app, serving from `read_cache` with no scheduler."""
+    import main
+
+    monkeypatch.setattr(main, "read_cache", read_cache)
+    monkeypatch.setattr(main, "scheduler", None)
+    return main.app.test_client()
@@ -0,0 +1,362 @@
+"""Stub GitHub GraphQL/REST server for offline refresh benchmarks.
+
+Usage:
+    uv run fixture_server.py [--repos N] [--latency-ms MS] [--error-rate P] ...
+
+Then point the service at it with GITHUB_API_URL=http://localhost:8090.
+
+Answers the queries GitHubClient sends (organization repository pages, lesson
+searches, single repositories, aliased README batches and REST README requests
+with ETags) from a generated organization, in the shape GitHub responds with.
+`--fixture` replays recorded repository nodes instead, cycling them to reach
+`--repos`. Latency, error responses and rate-limit responses can be injected;
+`/_stats` reports what was served and `/_mutate` touches a fraction of repos to
+simulate activity.
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+PAGE_SIZE = 100
+LANGUAGES = ["Python", "JavaScript", "TypeScript", "Java", "C", "Rust", None]
+CATEGORY_TOPICS = ["web", "python", "javascript", "game-dev", "security", "hardware", "ai"]
+README_PATH = re.compile(r"^/repos/([^/]+)/([^/]+)/readme$")
+
+
+def _iso(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class FakeOrg:
+    """An organization's repositories, newest `updatedAt` first."""
+
+    def __init__(
+        self,
+        size: int,
+        lesson_fraction: float = 0.3,
+        readme_bytes: int = 4000,
+        seed: int = 0,
+        fixture: Optional[List[Dict[str, Any]]] = None,
+    ):
+        self.rng = random.Random(seed)
+        self.readme_bytes = readme_bytes
+        self.lock = threading.Lock()
+        self.now = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        self.repos: List[Dict[str, Any]] = []
+        for i in range(size):
+            updated = self.now - timedelta(hours=i)
+            if fixture:
+                repo = self._from_fixture(fixture[i % len(fixture)], i, updated)
+            else:
+                repo = self._generate(i, updated, lesson_fraction)
+            self.repos.append(repo)
+        self.by_name = {repo["name"]: repo for repo in self.repos}
+
+    def _generate(self, i: int, updated: datetime, lesson_fraction: float) -> Dict[str, Any]:
+        topics = []
+        if self.rng.random() < lesson_fraction:
+            topics = ["lesson", "hacksu"] + self.rng.sample(CATEGORY_TOPICS, 2)
+        return {
+            "id": f"R_{i:06d}",
+            "name": f"repo-{i:05d}",
+            "description": f"Generated repository {i}",
+            "updatedAt": _iso(updated),
+            "committedDate": _iso(updated - timedelta(minutes=5)),
+            "language": self.rng.choice(LANGUAGES),
+            "topics": topics,
+            "readme": self._readme(i),
+            "revision": 0,
+        }
+
+    def _from_fixture(self, node: Dict[str, Any], i: int, updated: datetime) -> Dict[str, Any]:
+        topics = [n["topic"]["name"] for n in node.get("repositoryTopics", {}).get("nodes", [])]
+        language = node.get("primaryLanguage") or {}
+        return {
+            "id": f"{node['id']}_{i}",
+            "name": f"{node['name']}-{i}",
+            "description": node.get("description"),
+            "updatedAt": _iso(updated),
+            "committedDate": _iso(updated - timedelta(minutes=5)),
+            "language": language.get("name"),
+            "topics": topics,
+            "readme": node.get("readme") or self._readme(i),
+            "revision": 0,
+        }
+
+    def _readme(self, i: int) -> str:
+        line = "Some lesson content with `code` and [a link](./docs/setup.md).\n"
+        return f"# Lesson {i}\n\n" + line * max(self.readme_bytes // len(line), 1)
+
+    def mutate(self, fraction: float, readme_fraction: float = 0.5) -> int:
+        """Bump `updatedAt` on a random subset; some also get a new commit and README."""
+        with self.lock:
+            count = max(int(len(self.repos) * fraction), 1) if fraction > 0 else 0
+            touched = self.rng.sample(self.repos, min(count, len(self.repos)))
+            for repo in touched:
+                self.now += timedelta(seconds=1)
+                repo["updatedAt"] = _iso(self.now)
+                if self.rng.random() < readme_fraction:
+                    repo["committedDate"] = _iso(self.now)
+                    repo["revision"] += 1
+                    repo["readme"] += f"\nRevision {repo['revision']}.\n"
+            self.repos.sort(key=lambda r: r["updatedAt"], reverse=True)
+            return len(touched)
+
+    def node(self, repo: Dict[str, Any]) -> Dict[str, Any]:
+        """Render a repo as a `LessonRepoFields` node."""
+        return {
+            "id": repo["id"],
+            "name": repo["name"],
+            "description": repo["description"],
+            "url": f"https://github.com/fixture/{repo['name']}",
+            "updatedAt": repo["updatedAt"],
+            "defaultBranchRef": {"target": {"committedDate": repo["committedDate"]}},
+            "primaryLanguage": {"name": repo["language"]} if repo["language"] else None,
+            "repositoryTopics": {"nodes": [{"topic": {"name": t}} for t in repo["topics"]]},
+        }
+
+    def page(self, cursor: Optional[str], lessons_only: bool = False) -> Dict[str, Any]:
+        with self.lock:
+            repos = self.repos
+            if lessons_only:
+                repos = [repo for repo in repos if "lesson" in repo["topics"]]
+            start = int(cursor) if cursor else 0
+            nodes = [self.node(repo) for repo in repos[start : start + PAGE_SIZE]]
+            end = start + len(nodes)
+            return {
+                "repositoryCount": len(repos),
+                "pageInfo": {"hasNextPage": end < len(repos), "endCursor": str(end)},
+                "nodes": nodes,
+            }
+
+
+class FixtureState:
+    """Fault injection settings, the simulated rate-limit budget and served counts."""
+
+    def __init__(
+        self,
+        org: FakeOrg,
+        latency_ms: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: int = 1,
+        budget: int = 5000,
+        seed: int = 0,
+    ):
+        self.org = org
+        self.latency = latency_ms / 1000
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.budget = budget
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self.lock:
+            self.remaining = self.budget
+            self.stats = {
+                "graphql_requests": 0,
+                "rest_requests": 0,
+                "not_modified": 0,
+                "errors": 0,
+                "rate_limited": 0,
+                "bytes_sent": 0,
+            }
+
+    def count(self, name: str, amount: int = 1):
+        with self.lock:
+            self.stats[name] += amount
+
+    def fault(self) -> Optional[str]:
+        """Pick an injected failure for this request, if any."""
+        with self.lock:
+            roll = self.rng.random()
+        if roll < self.rate_limit_rate:
+            return "rate_limited"
+        if roll < self.rate_limit_rate + self.error_rate:
+            return "errors"
+        return None
+
+    def rate_limit(self, cost: int = 1) -> Dict[str, Any]:
+        with self.lock:
+            self.remaining = max(self.remaining - cost, 0)
+            remaining = self.remaining
+        reset_at = datetime.now(timezone.utc) + timedelta(hours=1)
+        return {
+            "cost": cost,
+            "limit": self.budget,
+            "remaining": remaining,
+            "resetAt": _iso(reset_at),
+        }
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state: FixtureState = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes = b"", headers: Optional[Dict[str, str]] = None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.state.count("bytes_sent", len(body))
+
+    def _send_json(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload).encode("utf-8")
+        self._send(status, body, {"Content-Type": "application/json", **(headers or {})})
+
+    def _injected_fault(self) -> bool:
+        if self.state.latency:
+            time.sleep(self.state.latency)
+        fault = self.state.fault()
+        if fault is None:
+            return False
+        self.state.count(fault)
+        if fault == "rate_limited":
+            self._send_json(
+                429,
+                {"message": "API rate limit exceeded"},
+                {"Retry-After": str(self.state.retry_after)},
+            )
+        else:
+            self._send_json(502, {"message": "Server Error"})
+        return True
+
+    def do_GET(self):
+        if self.path == "/_stats":
+            with self.state.lock:
+                stats = dict(self.state.stats)
+            return self._send_json(200, stats)
+        match = README_PATH.match(self.path)
+        if not match:
+            return self._send_json(404, {"message": "Not Found"})
+
+        self.state.count("rest_requests")
+        if self._injected_fault():
+            return
+        repo = self.state.org.by_name.get(match.group(2))
+        if repo is None:
+            return self._send_json(404, {"message": "Not Found"})
+        etag = '"' + hashlib.sha1(repo["readme"].encode("utf-8")).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.state.count("not_modified")
+            return self._send(304, headers={"ETag": etag})
+        content = base64.b64encode(repo["readme"].encode("utf-8")).decode("ascii")
+        self._send_json(200, {"encoding": "base64", "content": content}, {"ETag": etag})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", "0"))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if self.path == "/_reset_stats":
+            self.state.reset_stats()
+            return self._send_json(200, {"ok": True})
+        if self.path == "/_mutate":
+            touched = self.state.org.mutate(
+                payload.get("fraction", 0.05), payload.get("readme_fraction", 0.5)
+            )
+            return self._send_json(200, {"touched": touched})
+        if self.path != "/graphql":
+            return self._send_json(404, {"message": "Not Found"})
+
+        self.state.count("graphql_requests")
+        if self._injected_fault():
+            return
+        data = self._graphql(payload["query"], payload.get("variables", {}))
+        self._send_json(200, {"data": data})
+
+    def _graphql(self, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+        org = self.state.org
+        data: Dict[str, Any] = {"rateLimit": self.state.rate_limit()}
+        if "search(query" in query:
+            # Only `org:X topic:lesson sort:updated-desc` searches are sent
+            data["search"] = org.page(variables.get("cursor"), lessons_only=True)
+        elif "organization(login" in query:
+            data["organization"] = {"repositories": org.page(variables.get("cursor"))}
+        elif "object(expression" in query:
+            # Aliased README batch: r{i} is the repository named by $n{i}
+            for key, name in variables.items():
+                if not key.startswith("n"):
+                    continue
+                repo = org.by_name.get(name)
+                data[f"r{key[1:]}"] = (
+                    {"f0": {"text": repo["readme"], "isTruncated": False}, "f1": None, "f2": None}
+                    if repo
+                    else None
+                )
+        elif "repository(owner" in query:
+            repo = org.by_name.get(variables.get("name"))
+            data["repository"] = org.node(repo) if repo else None
+        return data
+
+
+def make_server(state: FixtureState, port: int = 0) -> ThreadingHTTPServer:
+    handler = type("Handler", (FixtureHandler,), {"state": state})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Fixture options, shared with benchmark.py."""
+    parser.add_argument("--repos", type=int, default=1000, help="organization size")
+    parser.add_argument("--lesson-fraction", type=float, default=0.3)
+    parser.add_argument("--readme-bytes", type=int, default=4000)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="added per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of 502s")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of 429s")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After on 429s")
+    parser.add_argument("--budget", type=int, default=5000, help="GraphQL points per hour")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fixture", help="JSON list of recorded repository nodes to replay")
+
+
+def state_from_args(args: argparse.Namespace) -> FixtureState:
+    fixture = None
+    if args.fixture:
+        with open(args.fixture) as f:
+            fixture = json.load(f)
+    org = FakeOrg(args.repos, args.lesson_fraction, args.readme_bytes, args.seed, fixture)
+    return FixtureState(
+        org,
+        latency_ms=args.latency_ms,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        budget=args.budget,
+        seed=args.seed,
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    parser.add_argument("--port", type=int, default=8090)
+    args = parser.parse_args()
+
+    server = make_server(state_from_args(args), args.port)
+    print(f"Serving {args.repos} fixture repos on http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
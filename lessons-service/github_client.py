@@ -1,24 +1,219 @@
 """GitHub API client using GraphQL for efficient batch fetching."""
 
+import os
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+from collections import deque
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Iterator, Optional, Set, Tuple
 import requests
+from requests.adapters import HTTPAdapter
 import time
+import metrics
+from circuit_breaker import CircuitBreaker, CircuitOpenError
 
 logger = logging.getLogger(__name__)
 
+# Paths tried (in order) when batch-fetching READMEs over GraphQL
+README_EXPRESSIONS = ["HEAD:README.md", "HEAD:readme.md", "HEAD:Readme.md"]
+
+# Repository fields needed to build a lesson record, shared by every repo query
+REPO_FRAGMENT = """
+fragment LessonRepoFields on Repository {
+  id
+  name
+  description
+  url
+  updatedAt
+  defaultBranchRef {
+    target {
+      ... on Commit {
+        committedDate
+      }
+    }
+  }
+  primaryLanguage {
+    name
+  }
+  repositoryTopics(first: 20) {
+    nodes {
+      topic {
+        name
+      }
+    }
+  }
+}
+"""
+
 
 class GitHubClient:
     """Client for fetching lesson repositories from GitHub using GraphQL API."""
 
-    def __init__(self, token: str, org: str = "hacksu"):
+    def __init__(self, token: str, org: str = "hacksu", api_url: Optional[str] = None):
         self.token = token
         self.org = org
-        self.base_url = "https://api.github.com/graphql"
+        # Overridable so benchmarks can point the client at a local fixture server
+        api_url = api_url or os.getenv("GITHUB_API_URL", "https://api.github.com")
+        self.api_url = api_url.rstrip("/")
+        self.base_url = f"{self.api_url}/graphql"
         self.headers = {
             "Authorization": f"Bearer {token}",
             "Content-Type": "application/json",
         }
+        # Number of repositories aliased into a single README query
+        self.readme_batch_size = int(os.getenv("README_BATCH_SIZE", "50"))
+        # Upper bound on in-flight requests; also sizes the keep-alive pool
+        self.concurrency = int(os.getenv("GITHUB_CONCURRENCY", "8"))
+        self.max_retries = 2
+        # "organization" pages through every org repo; "search" asks the search API
+        # for `topic:lesson` repos only, which is far fewer pages for a large org
+        self.repo_discovery = os.getenv("REPO_DISCOVERY", "organization")
+
+        # Stops calling GitHub during an outage; see `_request`
+        self.breaker = CircuitBreaker(
+            "GitHub",
+            failure_threshold=int(os.getenv("GITHUB_BREAKER_THRESHOLD", "3")),
+            cooldown=float(os.getenv("GITHUB_BREAKER_COOLDOWN_SECONDS", "30")),
+            # Kept well under the cache TTL so stale serving keeps extending it
+            max_cooldown=float(os.getenv("GITHUB_BREAKER_MAX_COOLDOWN_SECONDS", "600")),
+        )
+
+        # Last seen rate-limit budget per API resource ("graphql", "core", ...)
+        self.rate_limits: Dict[str, Dict[str, Any]] = {}
+        self._rate_limit_lock = threading.Lock()
+
+        # One pooled session so requests reuse TCP+TLS connections
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        One request through the circuit breaker. Connection errors and 5xx count as
+        failures; any other response, rate limits included, shows GitHub is up.
+        Every outcome is recorded, so a half-open probe never stays in flight.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(
+                f"GitHub circuit is open, retrying in {self.breaker.seconds_until_retry():.0f}s"
+            )
+        try:
+            response = self.session.request(method, url, timeout=30, **kwargs)
+        except Exception:
+            # Not just RequestException: anything escaping here would leave the
+            # breaker waiting forever on a probe that never reports back
+            self.breaker.record_failure()
+            raise
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request on the pooled session, backing off on rate limits."""
+        for attempt in range(self.max_retries + 1):
+            response = self._send(method, url, **kwargs)
+            self._record_rate_limit_headers(response)
+            if response.status_code not in (403, 429) or attempt == self.max_retries:
+                return response
+
+            retry_after = response.headers.get("Retry-After")
+            if retry_after:
+                delay = int(retry_after)
+            elif response.headers.get("X-RateLimit-Remaining") == "0":
+                reset = int(response.headers.get("X-RateLimit-Reset", "0"))
+                delay = max(reset - time.time(), 1)
+            elif response.status_code == 403 and "rate limit" not in response.text.lower():
+                # A plain permission error, retrying won't help
+                return response
+            else:
+                # GitHub asks for at least a minute when it gives no hint
+                delay = 60 * 2**attempt
+
+            if delay > 300:
+                logger.error(f"Rate limited for {delay:.0f}s, giving up on {url}")
+                return response
+            logger.warning(
+                f"Rate limited by GitHub ({response.status_code}), retrying in {delay:.0f}s"
+            )
+            time.sleep(delay)
+        return response
+
+    def _record_rate_limit_headers(self, response: requests.Response):
+        """Track the budget reported by X-RateLimit-* headers."""
+        headers = response.headers
+        if "X-RateLimit-Remaining" not in headers:
+            return
+        resource = headers.get("X-RateLimit-Resource", "core")
+        with self._rate_limit_lock:
+            budget = self.rate_limits.setdefault(resource, {})
+            budget["limit"] = int(headers.get("X-RateLimit-Limit", "0"))
+            budget["remaining"] = int(headers["X-RateLimit-Remaining"])
+            budget["reset_at"] = int(headers.get("X-RateLimit-Reset", "0"))
+
+    def _record_graphql_rate_limit(self, rate_limit: Dict[str, Any]):
+        """Track the budget reported by a GraphQL `rateLimit` selection."""
+        reset_at = datetime.fromisoformat(rate_limit["resetAt"].replace("Z", "+00:00"))
+        with self._rate_limit_lock:
+            budget = self.rate_limits.setdefault("graphql", {})
+            budget["limit"] = rate_limit["limit"]
+            budget["remaining"] = rate_limit["remaining"]
+            budget["reset_at"] = int(reset_at.timestamp())
+            budget["last_cost"] = rate_limit["cost"]
+
+    def budget_fraction(self) -> Optional[float]:
+        """Smallest remaining/limit ratio across API resources, or None if unknown."""
+        with self._rate_limit_lock:
+            fractions = [
+                budget["remaining"] / budget["limit"]
+                for budget in self.rate_limits.values()
+                if budget.get("limit")
+            ]
+        return min(fractions) if fractions else None
+
+    def seconds_until_reset(self) -> float:
+        """Seconds until the most depleted API resource resets its budget."""
+        with self._rate_limit_lock:
+            budgets = [b for b in self.rate_limits.values() if b.get("limit")]
+            if not budgets:
+                return 0.0
+            budget = min(budgets, key=lambda b: b["remaining"] / b["limit"])
+            return max(budget["reset_at"] - time.time(), 0.0)
+
+    def page_delay(self) -> float:
+        """Pause between GraphQL pages, stretched as the budget runs down."""
+        with self._rate_limit_lock:
+            budget = dict(self.rate_limits.get("graphql", {}))
+        if not budget.get("limit") or budget["remaining"] > budget["limit"] / 2:
+            return 0.1
+        # Spread what is left of the budget over the time until it resets
+        until_reset = max(budget["reset_at"] - time.time(), 0.0)
+        return min(max(until_reset / max(budget["remaining"], 1), 0.1), 5.0)
+
+    def _map_concurrent(self, fn, items):
+        """Run `fn` over `items` on a bounded worker pool, preserving order."""
+        if len(items) <= 1:
+            return [fn(item) for item in items]
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            return list(pool.map(fn, items))
+
+    def _imap_concurrent(self, fn, items) -> Iterator:
+        """Like `_map_concurrent`, but yields results in order as they complete,
+        keeping at most `concurrency` calls in flight so results don't pile up."""
+        if len(items) <= 1:
+            yield from (fn(item) for item in items)
+            return
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            pending = deque()
+            for item in items:
+                pending.append(pool.submit(fn, item))
+                if len(pending) >= self.concurrency:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
 
     def _make_request(
         self, query: str, variables: Optional[Dict[str, Any]] = None
@@ -29,23 +224,33 @@ class GitHubClient:
             payload["variables"] = variables
 
         try:
-            response = requests.post(
-                self.base_url,
-                json=payload,
-                headers=self.headers,
-                timeout=30,
-            )
+            with metrics.GRAPHQL_REQUEST_SECONDS.time():
+                response = self._request(
+                    "POST",
+                    self.base_url,
+                    json=payload,
+                    headers=self.headers,
+                )
             response.raise_for_status()
             data = response.json()
 
-            if "errors" in data:
+            # A missing repository is a NOT_FOUND error next to a null field;
+            # callers handle the null, so only fail on other errors
+            errors = [
+                err for err in data.get("errors", []) if err.get("type") != "NOT_FOUND"
+            ]
+            if errors or ("errors" in data and not data.get("data")):
                 error_messages = [
                     err.get("message", "Unknown error") for err in data["errors"]
                 ]
                 logger.error(f"GraphQL errors: {error_messages}")
                 raise Exception(f"GraphQL errors: {', '.join(error_messages)}")
 
-            return data.get("data", {})
+            result = data.get("data") or {}
+            if result.get("rateLimit"):
+                self._record_graphql_rate_limit(result["rateLimit"])
+                metrics.API_POINTS.inc(result["rateLimit"]["cost"], api="graphql")
+            return result
         except requests.exceptions.RequestException as e:
             logger.error(f"GitHub API request failed: {e}")
             raise
@@ -55,15 +260,43 @@ class GitHubClient:
         Fetch all repositories with the 'lesson' topic from the organization.
         Uses GraphQL to efficiently batch fetch repos and topics in a single query.
         """
-        logger.info(f"Fetching lesson repos from GitHub organization: {self.org}")
+        repos, _, _ = self.fetch_repo_changes()
+        return repos
+
+    def fetch_repo_changes(
+        self, since: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Set[str], Optional[str]]:
+        """
+        Fetch lesson repositories updated at or after `since` (an ISO-8601 `updatedAt`).
+        Repositories come back ordered by UPDATED_AT DESC, so paging stops at the first
+        repo older than `since`. Without `since` the whole organization is crawled.
+
+        Returns the lesson repos seen, the ids of every repo seen (lesson or not, so
+        callers can drop repos that lost the topic) and the newest `updatedAt` seen.
+
+        With `REPO_DISCOVERY=search` only repos currently tagged `lesson` are seen, so
+        repos that lose the topic are only dropped by the next full refresh.
+        """
+        if self.repo_discovery == "search":
+            changes = self._search_repo_changes(since)
+            if changes is not None:
+                return changes
+
+        if since:
+            logger.info(f"Fetching lesson repos from {self.org} updated since {since}")
+        else:
+            logger.info(f"Fetching lesson repos from GitHub organization: {self.org}")
 
         all_repos = []
+        seen_ids = set()
+        high_water_mark = None
         cursor = None
         has_next_page = True
 
         while has_next_page:
             query = """
             query($org: String!, $cursor: String) {
+              rateLimit { cost limit remaining resetAt }
               organization(login: $org) {
                 repositories(
                   first: 100
@@ -75,33 +308,12 @@ class GitHubClient:
                     endCursor
                   }
                   nodes {
-                    id
-                    name
-                    description
-                    url
-                    updatedAt
-                    defaultBranchRef {
-                      target {
-                        ... on Commit {
-                          committedDate
-                        }
-                      }
-                    }
-                    primaryLanguage {
-                      name
-                    }
-                    repositoryTopics(first: 20) {
-                      nodes {
-                        topic {
-                          name
-                        }
-                      }
-                    }
+                    ...LessonRepoFields
                   }
                 }
               }
             }
-            """
+            """ + REPO_FRAGMENT
 
             variables = {"org": self.org}
             if cursor:
@@ -114,88 +326,289 @@ class GitHubClient:
                 page_info = repos_data.get("pageInfo", {})
                 nodes = repos_data.get("nodes", [])
 
-                # Filter repos that have the "lesson" topic
-                for repo in nodes:
-                    topics_data = repo.get("repositoryTopics", {}).get("nodes", [])
-                    topics = [
-                        node["topic"]["name"]
-                        for node in topics_data
-                        if node.get("topic")
-                    ]
-
-                    if "lesson" in topics:
-                        category_topics = [
-                            t for t in topics if t != "lesson" and t != "hacksu"
-                        ]
-                        # Get last commit date from default branch
-                        default_branch = repo.get("defaultBranchRef", {})
-                        commit_target = default_branch.get("target", {}) if default_branch else {}
-                        last_commit_date = commit_target.get("committedDate") if commit_target else repo["updatedAt"]
-                        
-                        all_repos.append(
-                            {
-                                "id": repo["id"],
-                                "name": repo["name"],
-                                "description": repo.get("description"),
-                                "html_url": repo["url"],
-                                "updated_at": repo["updatedAt"],
-                                "last_commit_date": last_commit_date,
-                                "language": (
-                                    repo.get("primaryLanguage", {}).get("name")
-                                    if repo.get("primaryLanguage")
-                                    else None
-                                ),
-                                "topics": category_topics,
-                            }
-                        )
-                        logger.debug(
-                            f"Added lesson repo: {repo['name']} with topics: {category_topics}"
-                        )
-
-                has_next_page = page_info.get("hasNextPage", False)
+                reached_since, high_water_mark = self._collect_page(
+                    nodes, since, all_repos, seen_ids, high_water_mark
+                )
+                has_next_page = page_info.get("hasNextPage", False) and not reached_since
                 cursor = page_info.get("endCursor")
 
-                # Rate limiting: GitHub allows 5000 points per hour for authenticated requests
-                # Each query costs 1 point, so we can be generous, but let's be safe
+                # Pace pages against the remaining GraphQL budget
                 if has_next_page:
-                    time.sleep(0.1)  # Small delay between pages
+                    time.sleep(self.page_delay())
 
             except Exception as e:
                 logger.error(f"Error fetching repos page: {e}")
                 raise
 
-        logger.info(f"Fetched {len(all_repos)} lesson repos from {self.org}")
-        return all_repos
+        logger.info(
+            f"Fetched {len(all_repos)} lesson repos from {self.org} "
+            f"({len(seen_ids)} repos scanned)"
+        )
+        return all_repos, seen_ids, high_water_mark
+
+    def _collect_page(self, nodes, since, all_repos, seen_ids, high_water_mark):
+        """
+        Keep the lesson repos from one page of nodes, newest `updatedAt` first.
+        Non-lesson nodes are dropped here, so only lesson records outlive the page.
+        Returns whether `since` was reached and the updated high-water mark.
+        """
+        for repo in nodes:
+            if not repo:
+                continue
+            if since and repo["updatedAt"] < since:
+                # Everything from here on is unchanged since the last crawl
+                return True, high_water_mark
+            seen_ids.add(repo["id"])
+            if high_water_mark is None or repo["updatedAt"] > high_water_mark:
+                high_water_mark = repo["updatedAt"]
+
+            lesson = self._parse_lesson_repo(repo)
+            if lesson:
+                all_repos.append(lesson)
+                logger.debug(f"Added lesson repo: {repo['name']} with topics: {lesson['topics']}")
+        return False, high_water_mark
+
+    def _search_repo_changes(
+        self, since: Optional[str] = None
+    ) -> Optional[Tuple[List[Dict[str, Any]], Set[str], Optional[str]]]:
+        """
+        `fetch_repo_changes` via the search API, which only returns lesson repos.
+        Returns None when search can't see them all (it caps results at 1000), so
+        the caller falls back to crawling the organization.
+        """
+        query = """
+        query($q: String!, $cursor: String) {
+          rateLimit { cost limit remaining resetAt }
+          search(query: $q, type: REPOSITORY, first: 100, after: $cursor) {
+            repositoryCount
+            pageInfo {
+              hasNextPage
+              endCursor
+            }
+            nodes {
+              ... on Repository {
+                ...LessonRepoFields
+              }
+            }
+          }
+        }
+        """ + REPO_FRAGMENT
+
+        all_repos = []
+        seen_ids = set()
+        high_water_mark = None
+        variables = {"q": f"org:{self.org} topic:lesson sort:updated-desc"}
+        has_next_page = True
+        while has_next_page:
+            search = self._make_request(query, variables).get("search") or {}
+            if search.get("repositoryCount", 0) > 1000:
+                logger.warning(
+                    f"Search matches {search['repositoryCount']} lesson repos, more than "
+                    f"it can return; crawling the organization instead"
+                )
+                return None
+            reached_since, high_water_mark = self._collect_page(
+                search.get("nodes", []), since, all_repos, seen_ids, high_water_mark
+            )
+            page_info = search.get("pageInfo", {})
+            has_next_page = page_info.get("hasNextPage", False) and not reached_since
+            variables["cursor"] = page_info.get("endCursor")
+            if has_next_page:
+                time.sleep(self.page_delay())
+
+        logger.info(f"Found {len(all_repos)} lesson repos in {self.org} via search")
+        return all_repos, seen_ids, high_water_mark
+
+    def _parse_lesson_repo(self, repo: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Build a lesson record from a repository node, or None if it isn't a lesson."""
+        topics_data = repo.get("repositoryTopics", {}).get("nodes", [])
+        topics = [node["topic"]["name"] for node in topics_data if node.get("topic")]
+        if "lesson" not in topics:
+            return None
+
+        category_topics = [t for t in topics if t != "lesson" and t != "hacksu"]
+        # Get last commit date from default branch
+        default_branch = repo.get("defaultBranchRef", {})
+        commit_target = default_branch.get("target", {}) if default_branch else {}
+        last_commit_date = commit_target.get("committedDate") if commit_target else repo["updatedAt"]
+
+        return {
+            "id": repo["id"],
+            "name": repo["name"],
+            "description": repo.get("description"),
+            "html_url": repo["url"],
+            "updated_at": repo["updatedAt"],
+            "last_commit_date": last_commit_date,
+            "language": (
+                repo.get("primaryLanguage", {}).get("name")
+                if repo.get("primaryLanguage")
+                else None
+            ),
+            "topics": category_topics,
+        }
+
+    def fetch_repo(self, repo_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Fetch a single repository as a lesson record.
+        Returns None if the repository doesn't exist or isn't a lesson.
+        """
+        query = """
+        query($org: String!, $name: String!) {
+          rateLimit { cost limit remaining resetAt }
+          repository(owner: $org, name: $name) {
+            ...LessonRepoFields
+          }
+        }
+        """ + REPO_FRAGMENT
+        data = self._make_request(query, {"org": self.org, "name": repo_name})
+        repo = data.get("repository")
+        return self._parse_lesson_repo(repo) if repo else None
 
     def fetch_readme(self, repo_name: str) -> Optional[str]:
         """
         Fetch README content for a specific repository.
         Falls back to REST API since GraphQL doesn't support file content easily.
         """
-        url = f"https://api.github.com/repos/{self.org}/{repo_name}/readme"
+        content, _, _ = self.fetch_readme_conditional(repo_name)
+        return content
+
+    def fetch_readme_conditional(
+        self, repo_name: str, validators: Optional[Dict[str, str]] = None
+    ) -> Tuple[Optional[str], Optional[Dict[str, str]], bool]:
+        """
+        Fetch README content, revalidating against previously stored validators.
+        Sends If-None-Match / If-Modified-Since when `validators` carries an `etag` /
+        `last_modified`. Returns (content, new validators, not_modified); on a 304
+        content is None and not_modified is True. GitHub does not count 304s
+        against the rate limit. If the request failed, content and validators are
+        both None, so callers can tell it apart from a repo without a README.
+        """
+        url = f"{self.api_url}/repos/{self.org}/{repo_name}/readme"
         headers = {
             "Accept": "application/vnd.github.v3+json",
             "Authorization": f"Bearer {self.token}",
             "User-Agent": "HacKSU-Lessons-Service",
         }
+        validators = validators or {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
 
         try:
-            response = requests.get(url, headers=headers, timeout=30)
+            with metrics.README_FETCH_SECONDS.time(method="rest"):
+                response = self._request("GET", url, headers=headers)
+            if response.status_code == 304:
+                logger.debug(f"README not modified for repo: {repo_name}")
+                return None, validators, True
+            metrics.API_POINTS.inc(api="rest")
             if response.status_code == 404:
                 logger.debug(f"README not found for repo: {repo_name}")
-                return None
+                return None, {}, False
             response.raise_for_status()
             data = response.json()
 
+            new_validators = {}
+            if response.headers.get("ETag"):
+                new_validators["etag"] = response.headers["ETag"]
+            if response.headers.get("Last-Modified"):
+                new_validators["last_modified"] = response.headers["Last-Modified"]
+
             if data.get("encoding") == "base64":
                 import base64
 
                 content = base64.b64decode(data["content"]).decode("utf-8")
                 logger.debug(f"Fetched README for {repo_name}, length: {len(content)}")
-                return content
+                return content, new_validators, False
             else:
                 logger.warn(f"Unexpected encoding for README: {data.get('encoding')}")
-                return data.get("content")
+                return data.get("content"), new_validators, False
         except requests.exceptions.RequestException as e:
             logger.error(f"Error fetching README for {repo_name}: {e}")
-            return None
+            return None, None, False
+
+    def fetch_readmes_conditional(
+        self, validators_by_name: Dict[str, Dict[str, str]]
+    ) -> Dict[str, Tuple[Optional[str], Optional[Dict[str, str]], bool]]:
+        """Revalidate many READMEs concurrently. See `fetch_readme_conditional`."""
+        names = list(validators_by_name)
+        results = self._map_concurrent(
+            lambda name: self.fetch_readme_conditional(name, validators_by_name[name]),
+            names,
+        )
+        return dict(zip(names, results))
+
+    def fetch_readmes(self, repo_names: List[str]) -> Dict[str, Optional[str]]:
+        """Fetch README content for many repositories at once. See `iter_readmes`."""
+        return dict(self.iter_readmes(repo_names))
+
+    def iter_readmes(self, repo_names: List[str]) -> Iterator[Tuple[str, Optional[str]]]:
+        """
+        Fetch README content for many repositories, yielding (name, content) as each
+        batch arrives so callers can write READMEs out without holding them all.
+        Each GraphQL request aliases one `repository` field per repo, so a batch of
+        `readme_batch_size` repos costs a single round trip. Repos whose README could
+        not be read from the blob (missing, binary or truncated) fall back to REST.
+        """
+        if not repo_names:
+            return
+        fetched = 0
+        fallback: List[str] = []
+
+        def fetch_batch(batch):
+            try:
+                return self._fetch_readme_batch(batch)
+            except Exception as e:
+                logger.error(f"README batch query failed, falling back to REST: {e}")
+                return {}
+
+        batches = [
+            repo_names[start : start + self.readme_batch_size]
+            for start in range(0, len(repo_names), self.readme_batch_size)
+        ]
+        for batch, found in zip(batches, self._imap_concurrent(fetch_batch, batches)):
+            for name in batch:
+                content = found.get(name)
+                if content is None:
+                    fallback.append(name)
+                else:
+                    fetched += 1
+                    yield name, content
+
+        for name, content in zip(fallback, self._imap_concurrent(self.fetch_readme, fallback)):
+            if content is not None:
+                fetched += 1
+            yield name, content
+
+        logger.info(
+            f"Fetched {fetched}/{len(repo_names)} READMEs ({len(fallback)} via REST fallback)"
+        )
+
+    def _fetch_readme_batch(self, repo_names: List[str]) -> Dict[str, Optional[str]]:
+        """Fetch README blobs for one batch of repositories using GraphQL aliases."""
+        blob_fields = "\n".join(
+            f'f{i}: object(expression: "{expression}") {{ ... on Blob {{ text isTruncated }} }}'
+            for i, expression in enumerate(README_EXPRESSIONS)
+        )
+        variable_defs = ["$org: String!"]
+        fields = ["rateLimit { cost limit remaining resetAt }"]
+        variables: Dict[str, Any] = {"org": self.org}
+        for i, name in enumerate(repo_names):
+            variable_defs.append(f"$n{i}: String!")
+            variables[f"n{i}"] = name
+            fields.append(f"r{i}: repository(owner: $org, name: $n{i}) {{ {blob_fields} }}")
+
+        query = f"query({', '.join(variable_defs)}) {{\n" + "\n".join(fields) + "\n}"
+        with metrics.README_FETCH_SECONDS.time(method="graphql_batch"):
+            data = self._make_request(query, variables)
+
+        readmes: Dict[str, Optional[str]] = {}
+        for i, name in enumerate(repo_names):
+            repo = data.get(f"r{i}") or {}
+            readmes[name] = None
+            for j in range(len(README_EXPRESSIONS)):
+                blob = repo.get(f"f{j}")
+                if blob and blob.get("text") is not None and not blob.get("isTruncated"):
+                    readmes[name] = blob["text"]
+                    break
+        return readmes
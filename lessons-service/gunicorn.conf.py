@@ -0,0 +1,23 @@
+"""Gunicorn configuration for running the lessons service in production.
+
+    uv run gunicorn -c gunicorn.conf.py main:app
+
+Every worker serves the read API, webhooks and /health. Each worker also runs a
+scheduler, but only the one holding the Redis leader lease refreshes the cache.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "gthread"
+threads = int(os.getenv("WEB_THREADS", "4"))
+timeout = 60
+accesslog = "-"
+
+
+def post_worker_init(worker):
+    """Start the scheduler and read cache inside each worker process."""
+    import main
+
+    main.start_service()
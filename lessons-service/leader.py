@@ -0,0 +1,89 @@
+"""Leader election so only one process refreshes the cache."""
+
+import logging
+import os
+import socket
+import uuid
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# KEYS: lease, fencing counter. ARGV: identity, ttl ms. Returns a new fencing token.
+ACQUIRE_SCRIPT = """
+if redis.call('set', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+  return redis.call('incr', KEYS[2])
+end
+return false
+"""
+
+# KEYS: lease. ARGV: identity, ttl ms. Extends the lease only if we still own it.
+RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+  return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# KEYS: lease. ARGV: identity. Deletes the lease only if we still own it.
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+  return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisLeaderLease:
+    """
+    Leadership across worker processes and replicas via a Redis lease.
+    The holder must renew before `ttl` seconds pass; if it dies, the lease expires
+    and the next follower to try takes over. Each acquisition gets a fencing token
+    from a counter that only grows, so writes from a leader that lost its lease
+    can be rejected (see `CacheGeneration.publish`).
+    """
+
+    def __init__(self, redis_client, key: str = "lessons:leader", ttl: float = 10.0):
+        self.redis_client = redis_client
+        self.key = key
+        self.fence_key = f"{key}:fence"
+        self.ttl_ms = int(ttl * 1000)
+        self.identity = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.fencing_token: Optional[int] = None
+        self._acquire = redis_client.register_script(ACQUIRE_SCRIPT)
+        self._renew = redis_client.register_script(RENEW_SCRIPT)
+        self._release = redis_client.register_script(RELEASE_SCRIPT)
+
+    def acquire(self) -> bool:
+        """Acquire or renew the lease. Returns whether we are leader."""
+        if self.fencing_token is not None:
+            if self._renew(keys=[self.key], args=[self.identity, self.ttl_ms]):
+                return True
+            logger.warning(f"Leader lease {self.key} expired before renewal")
+            self.fencing_token = None
+
+        token = self._acquire(
+            keys=[self.key, self.fence_key], args=[self.identity, self.ttl_ms]
+        )
+        if token:
+            self.fencing_token = int(token)
+            logger.info(
+                f"Acquired leader lease {self.key} as {self.identity} "
+                f"(fencing token {self.fencing_token})"
+            )
+            return True
+        return False
+
+    def release(self):
+        """Give up the lease so a follower can take over immediately."""
+        if self.fencing_token is None:
+            return
+        try:
+            self._release(keys=[self.key], args=[self.identity])
+            logger.info(f"Released leader lease {self.key}")
+        except Exception as e:
+            logger.error(f"Error releasing leader lease: {e}")
+        self.fencing_token = None
+
+    def holder(self) -> Optional[str]:
+        """Identity of the current leader, if any."""
+        return self.redis_client.get(self.key)
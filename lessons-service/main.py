@@ -2,8 +2,15 @@
 
 import os
 import logging
-from flask import Flask, jsonify
+import re
+import time
+from datetime import datetime, timezone
+from flask import Flask, Response, jsonify, request
+from werkzeug.http import unquote_etag
+import metrics
 from scheduler import LessonCacheScheduler
+from read_cache import ReadCache
+from webhooks import verify_signature, repos_from_event
 
 # Configure logging
 logging.basicConfig(
@@ -17,13 +24,43 @@ app = Flask(__name__)
 
 # Initialize scheduler
 scheduler = None
+read_cache = None
+
+REPO_NAME_PATTERN = re.compile(r"[a-zA-Z0-9._-]+")
+
+
+def freshness_headers():
+    """When the served data was fetched from GitHub, and whether it is being served stale."""
+    freshness = read_cache.freshness() if read_cache else None
+    if not freshness:
+        return {}
+    fetched_at = datetime.fromtimestamp(freshness["fetched_at"], timezone.utc)
+    return {
+        "X-Lessons-Fetched-At": fetched_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "X-Lessons-Stale": "true" if freshness["stale"] else "false",
+    }
+
+
+def cached_response(entry):
+    """Send a cached JSON body, honouring If-None-Match and Accept-Encoding."""
+    headers = {"ETag": entry.etag, "Vary": "Accept-Encoding", **freshness_headers()}
+    # Parsed rather than substring-matched: only the exact (strong) tag or "*" is a
+    # match, and "gzip;q=0" refuses gzip
+    if request.if_none_match.contains(unquote_etag(entry.etag)[0]):
+        return Response(status=304, headers=headers)
+    if request.accept_encodings["gzip"] > 0:
+        headers["Content-Encoding"] = "gzip"
+        return Response(entry.gzipped, mimetype="application/json", headers=headers)
+    return Response(entry.body, mimetype="application/json", headers=headers)
 
 
 @app.route("/health", methods=["GET"])
 def health():
-    """Health check endpoint."""
+    """Health check endpoint. Answers from the cached status snapshot."""
     try:
-        status = scheduler.get_status() if scheduler else {"running": False}
+        status = scheduler.cached_status() if scheduler else {"running": False}
+        if read_cache:
+            status["read_cache"] = read_cache.stats()
         cache_healthy = status.get("cache_healthy", False)
         if cache_healthy:
             return jsonify({"status": "healthy", **status}), 200
@@ -34,9 +71,82 @@ def health():
         return jsonify({"status": "error", "error": str(e)}), 500
 
 
-def main():
-    """Main function to start the service."""
-    global scheduler
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    """Prometheus metrics: the leader's refresh pipeline plus this worker's reads."""
+    pipeline_text = scheduler.cached_metrics() if scheduler else None
+    return Response(
+        metrics.render(pipeline_text), mimetype="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.route("/repos", methods=["GET"])
+def repos():
+    """Cached list of lesson repos."""
+    entry = read_cache.get_repos() if read_cache else None
+    if entry is None:
+        return jsonify({"error": "Lesson repositories are not cached yet"}), 503
+    return cached_response(entry)
+
+
+@app.route("/repos/<name>/readme", methods=["GET"])
+def readme(name):
+    """Cached README for one lesson repo."""
+    if not REPO_NAME_PATTERN.fullmatch(name):
+        return jsonify({"error": "Invalid repository name"}), 400
+    entry = read_cache.get_readme(name) if read_cache else None
+    if entry is None:
+        return jsonify({"error": "README not found"}), 404
+    return cached_response(entry)
+
+
+@app.route("/search", methods=["GET"])
+def search():
+    """Ranked search over lesson names, descriptions, topics, languages and READMEs."""
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"error": "Missing query parameter q"}), 400
+    limit = request.args.get("limit", 20, type=int)
+    if not 1 <= limit <= 100:
+        return jsonify({"error": "limit must be between 1 and 100"}), 400
+
+    index = read_cache.get_search_index() if read_cache else None
+    if index is None:
+        return jsonify({"error": "Lesson repositories are not cached yet"}), 503
+    start = time.perf_counter()
+    results = index.search(query, limit)
+    took_ms = round((time.perf_counter() - start) * 1000, 2)
+    response = jsonify({"query": query, "results": results, "took_ms": took_ms})
+    response.headers.update(freshness_headers())
+    return response
+
+
+@app.route("/webhooks/github", methods=["POST"])
+def github_webhook():
+    """Queue targeted refreshes for repos touched by a GitHub webhook event."""
+    secret = os.getenv("GITHUB_WEBHOOK_SECRET")
+    if not secret:
+        return jsonify({"error": "Webhooks are not configured"}), 404
+
+    body = request.get_data()
+    if not verify_signature(secret, body, request.headers.get("X-Hub-Signature-256")):
+        logger.warning("Rejected webhook with invalid signature")
+        return jsonify({"error": "Invalid signature"}), 401
+
+    event = request.headers.get("X-GitHub-Event", "")
+    if event == "ping":
+        return jsonify({"ok": True}), 200
+
+    payload = request.get_json(silent=True) or {}
+    repo_names = repos_from_event(event, payload, os.getenv("GITHUB_ORG", "hacksu"))
+    queued = [name for name in repo_names if scheduler and scheduler.enqueue_repo(name)]
+    logger.info(f"Webhook {event}: queued {queued} (affected {repo_names})")
+    return jsonify({"ok": True, "queued": queued}), 202
+
+
+def start_service():
+    """Create and start this process's scheduler and read cache."""
+    global scheduler, read_cache
 
     # Validate required environment variables
     github_token = os.getenv("GITHUB_TOKEN")
@@ -50,12 +160,22 @@ def main():
     # Initialize and start scheduler
     try:
         scheduler = LessonCacheScheduler()
+        read_cache = ReadCache(
+            scheduler.cache_manager,
+            max_bytes=int(os.getenv("READ_CACHE_MB", "32")) * 1024 * 1024,
+        )
+        scheduler.publish_listeners.append(read_cache.invalidate)
         scheduler.start()
         logger.info("Lessons service started successfully")
     except Exception as e:
         logger.error(f"Failed to start scheduler: {e}", exc_info=True)
         raise
 
+
+def main():
+    """Run the service on Flask's development server (see gunicorn.conf.py for production)."""
+    start_service()
+
     # Start Flask server for health checks
     port = int(os.getenv("PORT", "8080"))
     logger.info(f"Starting Flask server on port {port}")
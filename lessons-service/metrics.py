@@ -0,0 +1,178 @@
+"""Prometheus-style counters and histograms for the refresh pipeline and read API."""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+# Seconds; covers a fast Redis round trip up to a full crawl of a large org
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """A monotonically increasing count, optionally split by labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        """Current count; without labels, the total across all label values."""
+        with self._lock:
+            if not labels:
+                return sum(self._values.values())
+            return self._values.get(tuple(sorted(labels.items())), 0)
+
+    def samples(self, extra_labels: Dict[str, str]) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [
+            f"{self.name}{_format_labels({**dict(key), **extra_labels})} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+
+class Histogram:
+    """Observations counted into cumulative buckets, optionally split by labels."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        # labels -> (per-bucket counts, sum, count)
+        self._values: Dict[Tuple, Tuple[List[int], float, int]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            counts, total, count = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value, count + 1)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall-clock duration of a block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self, extra_labels: Dict[str, str]) -> List[str]:
+        with self._lock:
+            values = {key: (list(c), s, n) for key, (c, s, n) in self._values.items()}
+        lines = []
+        for key, (counts, total, count) in sorted(values.items()):
+            labels = {**dict(key), **extra_labels}
+            for bound, bucket_count in zip(self.buckets, counts):
+                bucket_labels = _format_labels({**labels, "le": _format_value(bound)})
+                lines.append(f"{self.name}_bucket{bucket_labels} {bucket_count}")
+            lines.append(f'{self.name}_bucket{_format_labels({**labels, "le": "+Inf"})} {count}')
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+class Registry:
+    """A set of metrics rendered together in the Prometheus text format."""
+
+    def __init__(self, per_worker: bool = False):
+        # Per-worker metrics carry the worker's pid so scrapes can sum across workers
+        self.per_worker = per_worker
+        self._metrics = []
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        metric = Counter(name, documentation)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, buckets=DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        extra_labels = {"worker": str(os.getpid())} if self.per_worker else {}
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples(extra_labels))
+        return "\n".join(lines) + "\n"
+
+
+# Recorded by the leader while refreshing, and shared with followers via Redis
+pipeline = Registry()
+# Recorded by every worker while serving
+serving = Registry(per_worker=True)
+
+REFRESH_SECONDS = pipeline.histogram(
+    "lessons_refresh_seconds", "Duration of a cache refresh, by kind and result."
+)
+REFRESH_STAGE_SECONDS = pipeline.histogram(
+    "lessons_refresh_stage_seconds", "Duration of each stage of a cache refresh."
+)
+GRAPHQL_REQUEST_SECONDS = pipeline.histogram(
+    "lessons_github_graphql_request_seconds", "Latency of GitHub GraphQL requests (pages)."
+)
+README_FETCH_SECONDS = pipeline.histogram(
+    "lessons_github_readme_fetch_seconds", "Latency of README fetches, by method."
+)
+REDIS_WRITE_SECONDS = pipeline.histogram(
+    "lessons_redis_write_seconds", "Latency of Redis cache writes, by operation."
+)
+API_POINTS = pipeline.counter(
+    "lessons_github_api_points_total", "GitHub rate-limit points consumed, by API."
+)
+README_CACHE = pipeline.counter(
+    "lessons_readme_cache_total",
+    "READMEs reused from the previous generation (hit) or fetched again (miss).",
+)
+README_FILLS = pipeline.counter(
+    "lessons_readme_fills_total",
+    "README cache misses filled on demand for readers, by result.",
+)
+BYTES_WRITTEN = pipeline.counter(
+    "lessons_cache_bytes_written_total", "Payload bytes written to Redis."
+)
+STALE_SERVES = pipeline.counter(
+    "lessons_stale_serves_total", "Failed refreshes that extended the stale cache instead."
+)
+
+READ_CACHE_REQUESTS = serving.counter(
+    "lessons_read_cache_requests_total", "Read API lookups answered from memory (hit) or Redis."
+)
+
+
+def render(pipeline_text: Optional[str] = None) -> str:
+    """Render this worker's serving metrics, plus the leader's pipeline metrics."""
+    return (pipeline_text or "") + serving.render()
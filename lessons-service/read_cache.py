@@ -0,0 +1,207 @@
+"""In-process read cache in front of Redis for the lessons read API."""
+
+import gzip
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import metrics
+from cache_manager import CacheManager
+from search_index import SearchIndex
+
+logger = logging.getLogger(__name__)
+
+
+class CachedResponse:
+    """A ready-to-send JSON body with its gzip form and ETag."""
+
+    __slots__ = ("body", "gzipped", "etag")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.gzipped = gzip.compress(body, compresslevel=6)
+        self.etag = f'"{hashlib.sha1(body).hexdigest()}"'
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + len(self.gzipped)
+
+
+class ReadCache:
+    """
+    Bounded LRU of serialized responses, keyed by cache key and evicted by size.
+    Entries belong to one cache generation: the cache is cleared when the scheduler
+    publishes, or when Redis reports a different current generation (another
+    replica published). If Redis is unreachable, cached entries keep being served.
+    """
+
+    def __init__(
+        self,
+        cache_manager: CacheManager,
+        max_bytes: int,
+        generation_check_interval: float = 1.0,
+    ):
+        self.cache_manager = cache_manager
+        self.max_bytes = max_bytes
+        self.generation_check_interval = generation_check_interval
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._size = 0
+        self._generation = None
+        self._last_generation_check = 0.0
+        self._lock = threading.Lock()
+        # Built on the first search against a generation; not counted in max_bytes
+        self._search_index: Optional[SearchIndex] = None
+        self._search_lock = threading.Lock()
+        # Freshness metadata of the generation, {} if it has none
+        self._freshness: Optional[dict] = None
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self, generation: Optional[int] = None):
+        """Drop every entry, e.g. after a new generation was published."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self._generation = generation
+            self._search_index = None
+            self._freshness = None
+        logger.debug(f"Read cache invalidated (generation {generation})")
+
+    def get_repos(self) -> Optional[CachedResponse]:
+        """The lesson repo list as a JSON array."""
+        return self._get(
+            "repos", lambda prefix: self.cache_manager.get_payload(f"{prefix}repos")
+        )
+
+    def get_readme(self, repo_name: str) -> Optional[CachedResponse]:
+        """A README as {"content", "html", "toc"}, matching the SvelteKit route."""
+
+        def load(prefix):
+            content = self.cache_manager.get_payload(f"{prefix}readme:{repo_name}")
+            if content is None:
+                return None
+            rendered = self.cache_manager.get_payload(f"{prefix}readme_html:{repo_name}")
+            rendered = json.loads(rendered) if rendered else {}
+            return json.dumps(
+                {
+                    "content": content,
+                    "html": rendered.get("html"),
+                    "toc": rendered.get("toc", []),
+                }
+            )
+
+        return self._get(f"readme:{repo_name}", load)
+
+    def freshness(self) -> Optional[dict]:
+        """
+        {"fetched_at", "stale_after", "stale"} for the generation being served,
+        read from Redis once per generation. None if it has no such metadata.
+        """
+        self._check_generation()
+        with self._lock:
+            meta = self._freshness
+            generation = self._generation
+        if meta is None and generation is not None:
+            meta = self.cache_manager.get_freshness(generation) or {}
+            with self._lock:
+                if generation == self._generation:
+                    self._freshness = meta
+        if not meta:
+            return None
+        # Going stale is a matter of time, not of a new generation
+        return {**meta, "stale": time.time() >= meta["stale_after"]}
+
+    def get_search_index(self) -> Optional[SearchIndex]:
+        """The current generation's search index, built from Redis on first use."""
+        self._check_generation()
+        with self._search_lock:
+            with self._lock:
+                index = self._search_index
+                generation = self._generation
+            if index is not None or generation is None:
+                return index
+            try:
+                prefix = self.cache_manager.generation_prefix(generation)
+                repos = json.loads(self.cache_manager.get_payload(f"{prefix}repos") or "[]")
+                terms = self.cache_manager.get_readme_terms(
+                    prefix, [repo["name"] for repo in repos]
+                )
+            except Exception as e:
+                logger.error(f"Error loading search index for generation {generation}: {e}")
+                return None
+            index = SearchIndex(repos, terms)
+            logger.info(
+                f"Built search index over {len(index)} repos ({len(terms)} READMEs) "
+                f"for generation {generation}"
+            )
+            with self._lock:
+                # Skip the insert if a publish raced with this load
+                if generation == self._generation:
+                    self._search_index = index
+            return index
+
+    def stats(self) -> dict:
+        """Current size and hit counts."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "generation": self._generation,
+            }
+
+    def _check_generation(self):
+        """Invalidate if another process has published since we last looked."""
+        now = time.monotonic()
+        if now - self._last_generation_check < self.generation_check_interval:
+            return
+        self._last_generation_check = now
+        # None means no generation or Redis is down; either way keep what we have
+        generation = self.cache_manager.current_generation()
+        if generation is not None and generation != self._generation:
+            self.invalidate(generation)
+
+    def _get(self, key: str, load) -> Optional[CachedResponse]:
+        self._check_generation()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                metrics.READ_CACHE_REQUESTS.inc(result="hit")
+                return entry
+            self.misses += 1
+            generation = self._generation
+        metrics.READ_CACHE_REQUESTS.inc(result="miss")
+
+        if generation is None:
+            return None
+        try:
+            body = load(self.cache_manager.generation_prefix(generation))
+        except Exception as e:
+            logger.error(f"Error loading {key} for read cache: {e}")
+            return None
+        if body is None:
+            return None
+
+        entry = CachedResponse(body.encode("utf-8"))
+        if entry.size > self.max_bytes:
+            return entry
+        with self._lock:
+            # Skip the insert if a publish raced with this load
+            if generation == self._generation:
+                old = self._entries.pop(key, None)
+                if old is not None:
+                    self._size -= old.size
+                self._entries[key] = entry
+                self._size += entry.size
+                while self._size > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._size -= evicted.size
+        return entry
@@ -0,0 +1,109 @@
+"""Single-flight fills of READMEs that readers missed in the cache."""
+
+import json
+import logging
+import threading
+from typing import Callable, List
+import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class ReadmeFillQueue:
+    """
+    Serves README cache misses reported by readers (the SvelteKit app). A reader
+    that misses `lessons:v{N}:readme:<name>` claims `marker_prefix + name` with
+    SET NX, with an expiry in case no leader is around. Only the reader that wins
+    pushes the name onto a Redis list, so a burst of readers missing the same
+    README queues it once. The leader pops names, coalesces duplicates and runs
+    `handler`, which fetches and caches the README and returns "cached", "missing"
+    or "failed". It then publishes {"name", "status"} on `channel` for the readers
+    waiting on it.
+
+    A "missing" result leaves the marker in place for `negative_ttl` seconds so
+    readers answer 404 without queueing again; otherwise it is deleted.
+    """
+
+    def __init__(
+        self,
+        redis_client,
+        handler: Callable[[str], str],
+        negative_ttl: int = 60,
+        poll_timeout: int = 1,
+    ):
+        self.redis_client = redis_client
+        self.handler = handler
+        self.negative_ttl = negative_ttl
+        # BLPOP timeout; also how long stop() may wait for the thread to notice
+        self.poll_timeout = poll_timeout
+        self.key = "lessons:readme_fill_queue"
+        self.marker_prefix = "lessons:readme_fill:"
+        self.channel = "lessons:readme_filled"
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start serving fill requests (leader only)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop serving fill requests."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.poll_timeout + 5)
+
+    def pending(self) -> int:
+        """Number of queued fill requests."""
+        try:
+            return self.redis_client.llen(self.key)
+        except Exception as e:
+            logger.error(f"Error reading README fill queue: {e}")
+            return 0
+
+    def _take(self) -> List[str]:
+        """Wait for a request, then take everything queued, without duplicates."""
+        popped = self.redis_client.blpop([self.key], timeout=self.poll_timeout)
+        if not popped:
+            return []
+        pipe = self.redis_client.pipeline()
+        pipe.lrange(self.key, 0, -1)
+        pipe.delete(self.key)
+        rest, _ = pipe.execute()
+        return list(dict.fromkeys([popped[1], *rest]))
+
+    def _finish(self, repo_name: str, status: str):
+        """Release the repo's marker and tell waiting readers how it went."""
+        marker = f"{self.marker_prefix}{repo_name}"
+        pipe = self.redis_client.pipeline(transaction=False)
+        if status == "missing":
+            pipe.set(marker, "missing", ex=self.negative_ttl)
+        else:
+            pipe.delete(marker)
+        pipe.publish(self.channel, json.dumps({"name": repo_name, "status": status}))
+        pipe.execute()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                batch = self._take()
+            except Exception as e:
+                logger.error(f"Error polling README fill queue: {e}")
+                self._stop_event.wait(self.poll_timeout)
+                continue
+
+            for repo_name in batch:
+                try:
+                    status = self.handler(repo_name)
+                except Exception as e:
+                    logger.error(f"README fill for {repo_name} failed: {e}", exc_info=True)
+                    status = "failed"
+                metrics.README_FILLS.inc(result=status)
+                try:
+                    self._finish(repo_name, status)
+                except Exception as e:
+                    # Readers time out and the marker expires on its own
+                    logger.error(f"Error publishing README fill for {repo_name}: {e}")
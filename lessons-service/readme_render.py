@@ -0,0 +1,88 @@
+"""Render README markdown to sanitized HTML with a table of contents.
+
+Runs in a process pool (see LessonCacheScheduler), so everything here must be
+importable and picklable at module level.
+"""
+
+import hashlib
+import html
+import posixpath
+import re
+from typing import Any, Dict, List
+from urllib.parse import urlsplit
+
+import markdown
+import nh3
+
+# Kept in line with SANITIZE_CONFIG in src/lib/utils/markdown.ts, plus heading ids
+# so table-of-contents anchors work
+ALLOWED_TAGS = {
+    "p", "br", "strong", "em", "u", "s", "code", "pre", "a", "ul", "ol", "li",
+    "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "hr", "img",
+    "table", "thead", "tbody", "tr", "th", "td",
+}  # fmt: skip
+ALLOWED_ATTRIBUTES = {
+    "*": {"class", "title"},
+    "a": {"href"},
+    "img": {"src", "alt"},
+    **{f"h{level}": {"id"} for level in range(1, 7)},
+}
+URL_SCHEMES = {"http", "https", "mailto", "tel"}
+EXTENSIONS = ["extra", "sane_lists", "nl2br", "toc"]
+ABSOLUTE_URL = re.compile(r"^(?:[a-z][a-z0-9+.\-]*:|//|#)", re.IGNORECASE)
+
+
+def _repo_path(url: str) -> str:
+    """A README-relative URL as a path from the repository root."""
+    parts = urlsplit(url)
+    path = posixpath.normpath(parts.path.lstrip("/")) if parts.path else ""
+    suffix = (f"?{parts.query}" if parts.query else "") + (
+        f"#{parts.fragment}" if parts.fragment else ""
+    )
+    return path + suffix
+
+
+def _rewrite_links(org: str, repo_name: str):
+    """Attribute filter pointing relative links and images back at the repository."""
+
+    def rewrite(tag: str, attribute: str, value: str):
+        if attribute not in ("href", "src") or not value or ABSOLUTE_URL.match(value):
+            return value
+        path = _repo_path(value)
+        if tag == "img":
+            return f"https://raw.githubusercontent.com/{org}/{repo_name}/HEAD/{path}"
+        return f"https://github.com/{org}/{repo_name}/blob/HEAD/{path}"
+
+    return rewrite
+
+
+def _flatten_toc(tokens: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    entries = []
+    for token in tokens:
+        entries.append(
+            {"level": token["level"], "id": token["id"], "title": html.unescape(token["name"])}
+        )
+        entries.extend(_flatten_toc(token["children"]))
+    return entries
+
+
+def render_readme(content: str, org: str, repo_name: str) -> Dict[str, Any]:
+    """
+    Render README markdown like the website does (GFM-style, line breaks kept),
+    sanitize it, and rewrite relative links to the repo on GitHub.
+    Returns {"html", "toc", "source_sha256"}; `toc` lists every heading in order.
+    """
+    md = markdown.Markdown(extensions=EXTENSIONS)
+    rendered = md.convert(content)
+    sanitized = nh3.clean(
+        rendered,
+        tags=ALLOWED_TAGS,
+        attributes=ALLOWED_ATTRIBUTES,
+        attribute_filter=_rewrite_links(org, repo_name),
+        url_schemes=URL_SCHEMES,
+    )
+    return {
+        "html": sanitized,
+        "toc": _flatten_toc(md.toc_tokens),
+        "source_sha256": hashlib.sha256(content.encode("utf-8")).hexdigest(),
+    }
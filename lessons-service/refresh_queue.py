@@ -0,0 +1,140 @@
+"""Deduplicating work queue for targeted repository refreshes."""
+
+import logging
+import threading
+import time
+from typing import Callable, List
+
+logger = logging.getLogger(__name__)
+
+
+class RepoRefreshQueue:
+    """
+    Collects repository names awaiting a refresh in a Redis set, so any worker
+    process can enqueue while only the leader drains. A name that is already
+    pending is not queued twice, and the leader waits `debounce` seconds before
+    draining so a burst of events collapses into one fetch. A refresh that fails is
+    queued again after `retry_delay` seconds, doubling each time, up to
+    `max_attempts` tries.
+    """
+
+    def __init__(
+        self,
+        redis_client,
+        handler: Callable[[str], None],
+        debounce: float = 5.0,
+        poll_interval: float = 1.0,
+        retry_delay: float = 30.0,
+        max_attempts: int = 5,
+    ):
+        self.redis_client = redis_client
+        self.handler = handler
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.max_attempts = max_attempts
+        self.key = "lessons:refresh_pending"
+        # Failed refreshes, scored by when to try again, and how often each has failed
+        self.retry_key = "lessons:refresh_retry"
+        self.attempts_key = "lessons:refresh_attempts"
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def enqueue(self, repo_name: str) -> bool:
+        """Queue a repository. Returns False if it was already pending."""
+        try:
+            return bool(self.redis_client.sadd(self.key, repo_name))
+        except Exception as e:
+            logger.error(f"Error queueing refresh of {repo_name}: {e}")
+            return False
+
+    def pending(self) -> List[str]:
+        """Names currently waiting to be refreshed."""
+        try:
+            return sorted(self.redis_client.smembers(self.key))
+        except Exception as e:
+            logger.error(f"Error reading pending refreshes: {e}")
+            return []
+
+    def start(self):
+        """Start draining the queue (leader only)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop draining the queue."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _drain(self) -> List[str]:
+        """Atomically take every pending name."""
+        pipe = self.redis_client.pipeline()
+        pipe.smembers(self.key)
+        pipe.delete(self.key)
+        names, _ = pipe.execute()
+        return sorted(names)
+
+    def _promote_retries(self):
+        """Move failed refreshes whose backoff has passed back into the pending set."""
+        due = self.redis_client.zrangebyscore(self.retry_key, 0, time.time())
+        if not due:
+            return
+        pipe = self.redis_client.pipeline()
+        pipe.sadd(self.key, *due)
+        pipe.zrem(self.retry_key, *due)
+        pipe.execute()
+
+    def _retry_later(self, repo_name: str):
+        """Schedule another try of a failed refresh, or give up after `max_attempts`."""
+        attempts = self.redis_client.hincrby(self.attempts_key, repo_name, 1)
+        if attempts >= self.max_attempts:
+            logger.error(f"Giving up on refreshing {repo_name} after {attempts} attempts")
+            self.redis_client.hdel(self.attempts_key, repo_name)
+            return
+        delay = self.retry_delay * 2 ** (attempts - 1)
+        self.redis_client.zadd(self.retry_key, {repo_name: time.time() + delay})
+        logger.info(f"Retrying refresh of {repo_name} in {delay:.0f}s")
+
+    def _refresh(self, repo_name: str):
+        """Run the handler for one drained name, queueing it again if it fails."""
+        try:
+            self.handler(repo_name)
+        except Exception as e:
+            logger.error(f"Targeted refresh of {repo_name} failed: {e}", exc_info=True)
+            try:
+                self._retry_later(repo_name)
+            except Exception as e:
+                logger.error(f"Error scheduling a retry of {repo_name}: {e}")
+            return
+        try:
+            self.redis_client.hdel(self.attempts_key, repo_name)
+        except Exception as e:
+            logger.error(f"Error clearing refresh attempts of {repo_name}: {e}")
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self._promote_retries()
+                has_work = self.redis_client.scard(self.key) > 0
+            except Exception as e:
+                logger.error(f"Error polling refresh queue: {e}")
+                has_work = False
+            if not has_work:
+                self._stop_event.wait(self.poll_interval)
+                continue
+
+            # Let a burst of events for the same repos pile up before draining
+            if self._stop_event.wait(self.debounce):
+                return
+            try:
+                batch = self._drain()
+            except Exception as e:
+                logger.error(f"Error draining refresh queue: {e}")
+                continue
+
+            for repo_name in batch:
+                self._refresh(repo_name)
@@ -0,0 +1,55 @@
+"""Replay a recorded GitHub webhook payload against a running lessons service.
+
+Usage:
+    uv run replay_webhook.py EVENT PAYLOAD_FILE [URL]
+
+Example:
+    GITHUB_WEBHOOK_SECRET=dev uv run replay_webhook.py push fixtures/webhooks/push.json
+
+The payload is signed with GITHUB_WEBHOOK_SECRET exactly as GitHub would sign it,
+so the signature check and event handling can be exercised without network access.
+"""
+
+import hashlib
+import hmac
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import requests
+
+
+def main() -> int:
+    if len(sys.argv) < 3:
+        print("Usage: replay_webhook.py EVENT PAYLOAD_FILE [URL]", file=sys.stderr)
+        return 2
+
+    event = sys.argv[1]
+    body = Path(sys.argv[2]).read_bytes()
+    port = os.getenv("PORT", "8080")
+    url = sys.argv[3] if len(sys.argv) >= 4 else f"http://localhost:{port}/webhooks/github"
+
+    secret = os.getenv("GITHUB_WEBHOOK_SECRET")
+    if not secret:
+        print("GITHUB_WEBHOOK_SECRET environment variable is required", file=sys.stderr)
+        return 2
+
+    signature = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    resp = requests.post(
+        url,
+        data=body,
+        headers={
+            "Content-Type": "application/json",
+            "X-GitHub-Event": event,
+            "X-GitHub-Delivery": str(uuid.uuid4()),
+            "X-Hub-Signature-256": f"sha256={signature}",
+        },
+        timeout=30,
+    )
+    print(f"{resp.status_code} {resp.text.strip()}")
+    return 0 if resp.ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
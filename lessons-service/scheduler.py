@@ -1,98 +1,674 @@
 """Scheduler for refreshing lesson repository cache."""
 
 import os
+import json
 import logging
-import schedule
+import random
 import time
 import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import Optional
+import metrics
 from github_client import GitHubClient
+from circuit_breaker import CircuitOpenError
 from cache_manager import CacheManager
+from refresh_queue import RepoRefreshQueue
+from readme_fill import ReadmeFillQueue
+from change_feed import ChangeFeed, diff_repos
+from categories import build_category_tree
+from leader import RedisLeaderLease
+from readme_render import render_readme
 
 logger = logging.getLogger(__name__)
 
+# Stored in place of a README's rendering when rendering it failed
+RENDER_FAILED = {"html": None, "toc": [], "source_sha256": None}
+
 
 class LessonCacheScheduler:
     """Schedules periodic refresh of lesson repository cache."""
 
-    def __init__(self):
-        github_token = os.getenv("GITHUB_TOKEN")
-        github_org = os.getenv("GITHUB_ORG", "hacksu")
+    def __init__(
+        self,
+        github_client: Optional[GitHubClient] = None,
+        cache_manager: Optional[CacheManager] = None,
+    ):
+        if github_client is None:
+            github_token = os.getenv("GITHUB_TOKEN")
+            github_org = os.getenv("GITHUB_ORG", "hacksu")
+
+            if not github_token:
+                raise ValueError("GITHUB_TOKEN environment variable is required")
 
-        if not github_token:
-            raise ValueError("GITHUB_TOKEN environment variable is required")
+            github_client = GitHubClient(github_token, github_org)
 
-        self.github_client = GitHubClient(github_token, github_org)
-        self.cache_manager = CacheManager()
+        self.github_client = github_client
+        self.cache_manager = cache_manager or CacheManager()
         self.last_refresh_time = None
-        self.refresh_interval = 10
+        # With webhooks pushing changes, polling is only a slow safety net
+        self.webhooks_enabled = bool(os.getenv("GITHUB_WEBHOOK_SECRET"))
+        # Base refresh interval; the actual delay adapts to the GitHub API budget
+        self.refresh_interval = int(
+            os.getenv("REFRESH_MINUTES", "60" if self.webhooks_enabled else "10")
+        )
+        self.min_refresh_interval = int(os.getenv("MIN_REFRESH_MINUTES", "2"))
+        self.max_refresh_interval = int(
+            os.getenv("MAX_REFRESH_MINUTES", "180" if self.webhooks_enabled else "60")
+        )
+        # Generations must outlive the longest wait between refreshes (jitter
+        # included), or a quiet backoff lets the whole cache expire
+        self.cache_manager.ttl = max(
+            self.cache_manager.ttl, int(self.max_refresh_interval * 60 * 1.1) + 5 * 60
+        )
+        # Readers are told data is stale once a refresh is this overdue
+        self.stale_after = int(
+            os.getenv("STALE_AFTER_MINUTES", str(self.max_refresh_interval))
+        )
+        self.next_refresh_time = None
+        self.last_change_count = 0
+        # Incremental refreshes only crawl repos updated since the high-water mark;
+        # a periodic full crawl still catches deletions and topic removals.
+        self.full_refresh_interval = int(os.getenv("FULL_REFRESH_MINUTES", "60"))
+        self.last_full_refresh_time = None
+        self.high_water_mark = None
+        self.readme_revalidation = {}
+        # READMEs are rendered to HTML off the scheduler thread; 0 disables rendering
+        self.render_workers = int(os.getenv("README_RENDER_WORKERS", "2"))
+        self._renderer = None
+        # The scheduler thread and the README fill thread both render
+        self._renderer_lock = threading.Lock()
+        # Seconds spent in each stage of the last refresh (see _stage)
+        self.last_refresh_stages = {}
         self._running = False
         self._thread = None
+        self._stop_event = threading.Event()
+        # Called with the generation number after each successful publish
+        self.publish_listeners = []
+        # Serializes full/incremental refreshes with webhook-triggered ones
+        self._refresh_lock = threading.Lock()
+        self.refresh_queue = RepoRefreshQueue(
+            self.cache_manager.redis_client,
+            self.refresh_repo,
+            debounce=float(os.getenv("WEBHOOK_DEBOUNCE_SECONDS", "5")),
+        )
+        # README misses reported by readers, fetched once per repo however many wait
+        self.readme_fills = ReadmeFillQueue(
+            self.cache_manager.redis_client,
+            self.fill_readme,
+            negative_ttl=int(os.getenv("README_MISS_TTL_SECONDS", "60")),
+        )
+        # What each published generation changed, for readers keeping their own copy
+        self.change_feed = ChangeFeed(
+            self.cache_manager.redis_client,
+            max_length=int(os.getenv("CHANGE_FEED_LENGTH", "1000")),
+        )
+
+        # Every worker process (in every replica) runs a scheduler, but only the
+        # holder of the Redis lease refreshes; renewing at a third of the TTL
+        self.leader_lease = RedisLeaderLease(
+            self.cache_manager.redis_client,
+            ttl=float(os.getenv("LEADER_LEASE_SECONDS", "10")),
+        )
+        self.is_leader = False
+        self.lease_renew_interval = self.leader_lease.ttl_ms / 1000 / 3
+        self._lease_thread = None
+
+        # /health answers from this snapshot, refreshed by a background thread,
+        # so a slow Redis never blocks a probe
+        self.status_key = "lessons:status"
+        # The leader's pipeline metrics, shared with followers the same way
+        self.metrics_key = "lessons:metrics"
+        self._metrics_snapshot = ""
+        self.status_interval = float(os.getenv("STATUS_INTERVAL_SECONDS", "5"))
+        self._status_snapshot = {"running": False, "cache_healthy": False}
+        self._status_updated_at = None
+        self._status_thread = None
 
     def refresh_cache(self):
         """Fetch repos from GitHub and update cache."""
+        with self._refresh_lock:
+            self._refresh_cache()
+
+    @contextmanager
+    def _stage(self, name: str):
+        """Time one stage of a refresh, for /metrics and the status snapshot."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.last_refresh_stages[name] = round(elapsed, 3)
+            metrics.REFRESH_STAGE_SECONDS.observe(elapsed, stage=name)
+
+    def _refresh_cache(self):
+        start = time.perf_counter()
+        kind = "incremental"
+        result = "failure"
+        self.last_refresh_stages = {}
+        fetched_at = time.time()
+        generation = None
         try:
-            logger.info("Starting cache refresh...")
-            repos = self.github_client.fetch_lesson_repos()
-            success = self.cache_manager.cache_repos(repos)
+            with self._stage("read_previous"):
+                previous = self.cache_manager.get_repos()
+            if self._full_refresh_due(previous):
+                logger.info("Starting full cache refresh...")
+                kind = "full"
+                with self._stage("fetch_repos"):
+                    repos, _, high_water_mark = self.github_client.fetch_repo_changes()
+            else:
+                logger.info("Starting incremental cache refresh...")
+                with self._stage("fetch_repos"):
+                    changed, seen_ids, high_water_mark = (
+                        self.github_client.fetch_repo_changes(since=self.high_water_mark)
+                    )
+                    repos = self._merge_changes(previous, changed, seen_ids)
+
+            # Everything is written into a new generation that readers only see
+            # once it is published, READMEs included
+            generation = self.cache_manager.new_generation()
+            with self._stage("index_repos"):
+                generation.set_repos(repos)
+                generation.set_category_tree(build_category_tree(repos))
+            with self._stage("readmes"):
+                self.refresh_readmes(repos, previous, generation)
+            generation.set_meta(fetched_at, fetched_at + self.stale_after * 60)
+
+            with self._stage("publish"):
+                success = generation.publish(self.leader_lease.fencing_token)
             if success:
+                result = "success"
+                self._notify_published(generation.number)
+                self._publish_changes(generation, previous, repos)
+                self.last_change_count = self._count_changes(previous, repos)
                 self.last_refresh_time = time.time()
+                if kind == "full":
+                    self.last_full_refresh_time = self.last_refresh_time
+                self.high_water_mark = high_water_mark or self.high_water_mark
                 logger.info(
-                    f"Cache refresh completed successfully. Cached {len(repos)} repos."
+                    f"Cache refresh completed successfully. Cached {len(repos)} repos "
+                    f"in generation {generation.number}. Stage timings: "
+                    f"{self.last_refresh_stages}"
                 )
             else:
                 logger.error("Cache refresh failed: could not write to cache")
+        except CircuitOpenError as e:
+            # GitHub is known to be down; don't log a traceback every cycle
+            result = "circuit_open"
+            logger.warning(f"Skipping cache refresh: {e}")
+            self._serve_stale()
         except Exception as e:
             logger.error(f"Cache refresh failed: {e}", exc_info=True)
-            # Serve stale: if existing cache is present, extend its TTL so we don't go empty
-            stale = self.cache_manager.get_repos()
-            if stale:
-                self.cache_manager.cache_repos(stale)
-                logger.warning(
-                    "GitHub fetch failed; serving stale lesson cache and extended its TTL",
-                    exc_info=False,
-                )
+            self._serve_stale()
+        finally:
+            if generation is not None and result != "success":
+                # Chunks may already have been flushed; don't leave them for the TTL
+                generation.discard()
+            metrics.REFRESH_SECONDS.observe(
+                time.perf_counter() - start, kind=kind, result=result
+            )
+
+    def _serve_stale(self):
+        """
+        Keep the existing cache alive so we don't go empty. Its freshness metadata
+        is left as is, so readers can tell it is being served stale.
+        """
+        if self.cache_manager.extend_ttl():
+            metrics.STALE_SERVES.inc()
+            logger.warning("GitHub fetch failed; serving stale lesson cache")
+        else:
+            logger.warning("GitHub fetch failed and no stale cache is available")
+
+    def enqueue_repo(self, repo_name: str) -> bool:
+        """Queue a targeted refresh of one repo. Returns False if already queued."""
+        return self.refresh_queue.enqueue(repo_name)
+
+    def refresh_repo(self, repo_name: str):
+        """Refresh a single repo entry and its README (e.g. after a webhook)."""
+        with self._refresh_lock:
+            logger.info(f"Refreshing lesson repo {repo_name}...")
+            repo = self.github_client.fetch_repo(repo_name)
+            previous = self.cache_manager.get_repos()
+            if previous is None:
+                # Nothing to patch yet; the next scheduled refresh rebuilds the cache
+                logger.info(f"No cached repo list to update for {repo_name}")
+                return
+
+            repos = [
+                r
+                for r in previous
+                if r["name"] != repo_name and not (repo and r["id"] == repo["id"])
+            ]
+            generation = self.cache_manager.new_generation()
+            try:
+                # Carry the other READMEs over; a removed repo's README is left out
+                generation.carry_over_readmes([r["name"] for r in repos])
+                if repo:
+                    # Just updated, so it belongs at the front of the updatedAt ordering
+                    repos.insert(0, repo)
+                    self.refresh_readmes([repo], previous, generation)
+                generation.set_repos(repos)
+                generation.set_category_tree(build_category_tree(repos))
+                # The other repos are only as fresh as the last full or incremental
+                # refresh
+                freshness = self.cache_manager.get_freshness(generation.previous_number)
+                if freshness:
+                    generation.set_meta(freshness["fetched_at"], freshness["stale_after"])
+                if not generation.publish(self.leader_lease.fencing_token):
+                    # Raised so the refresh queue tries this repo again
+                    raise RuntimeError(f"Could not write cache after refreshing {repo_name}")
+            except Exception:
+                generation.discard()
+                raise
+            self._notify_published(generation.number)
+            self._publish_changes(generation, previous, repos)
+
+            self.last_change_count = self._count_changes(previous, repos)
+            logger.info(
+                f"Refreshed lesson repo {repo_name} "
+                f"({'updated' if repo else 'removed, no longer a lesson'})"
+            )
+
+    def fill_readme(self, repo_name: str) -> str:
+        """
+        Fetch and cache one README a reader missed. Returns "cached", "missing" (not
+        a cached lesson repo, or it has no README) or "failed".
+        """
+        if self.cache_manager.get_readme(repo_name) is not None:
+            # Filled by an earlier request or a refresh since it was queued
+            return "cached"
+        repos = self.cache_manager.get_repos()
+        # Only lesson repos, so readers can't spend the API budget on arbitrary names
+        if repos is None or all(repo["name"] != repo_name for repo in repos):
+            return "missing"
+
+        try:
+            content = self.github_client.fetch_readme(repo_name)
+        except CircuitOpenError:
+            logger.warning(f"GitHub circuit open; not filling README for {repo_name}")
+            return "failed"
+        if content is None:
+            return "missing"
+
+        rendered = None
+        if self.render_workers > 0:
+            future = self._submit_render(content, repo_name)
+            try:
+                rendered = future.result(timeout=60)
+            except Exception as e:
+                # Readers render the markdown themselves
+                logger.error(f"Rendering README for {repo_name} failed: {e}")
+                # Stored anyway so the next refresh carries the README over
+                rendered = RENDER_FAILED
+        number = self.cache_manager.cache_readme(repo_name, content, rendered=rendered)
+        if number is None:
+            return "failed"
+        # Readers following the change feed have no copy of this README yet
+        self.change_feed.publish_readme(number, repo_name)
+        logger.info(f"Filled README cache miss for {repo_name}")
+        return "cached"
+
+    def _notify_published(self, generation_number: int):
+        """Tell listeners (e.g. in-process caches) a new generation is live."""
+        for listener in self.publish_listeners:
+            try:
+                listener(generation_number)
+            except Exception as e:
+                logger.error(f"Publish listener failed: {e}", exc_info=True)
+
+    def _publish_changes(self, generation, previous, repos):
+        """Announce what a just-published generation changed on the change feed."""
+        changes = (
+            diff_repos(previous, repos, generation.changed_readmes)
+            if previous is not None
+            else None
+        )
+        self.change_feed.publish(generation.number, generation.previous_number, changes)
+
+    def _full_refresh_due(self, previous) -> bool:
+        """Whether this cycle must crawl the whole organization."""
+        if previous is None or self.high_water_mark is None:
+            return True
+        if self.last_full_refresh_time is None:
+            return True
+        elapsed = time.time() - self.last_full_refresh_time
+        return elapsed >= self.full_refresh_interval * 60
+
+    def _count_changes(self, previous, repos) -> int:
+        """Number of repos added, removed or modified relative to the previous list."""
+        previous_by_id = {repo["id"]: repo for repo in previous or []}
+        current_ids = {repo["id"] for repo in repos}
+        modified = sum(1 for repo in repos if previous_by_id.get(repo["id"]) != repo)
+        removed = sum(1 for repo_id in previous_by_id if repo_id not in current_ids)
+        return modified + removed
+
+    def _next_delay(self) -> float:
+        """Seconds until the next refresh, adapted to the remaining API budget."""
+        retry = self.github_client.breaker.seconds_until_retry()
+        if retry > 0:
+            # GitHub is down: probe again as soon as the circuit allows
+            return retry + random.uniform(0, 5)
+
+        base = self.refresh_interval * 60
+        fraction = self.github_client.budget_fraction()
+        if fraction is not None and fraction < 0.1:
+            # Nearly out of budget: wait for it to reset
+            delay = max(self.github_client.seconds_until_reset(), base)
+            logger.warning(
+                f"GitHub API budget at {fraction:.0%}, backing off for {delay:.0f}s"
+            )
+        elif fraction is not None and fraction < 0.25:
+            delay = base * 2
+        elif self.last_change_count > 0 and (fraction is None or fraction > 0.5):
+            # Things are moving and we can afford to look more often
+            delay = base / 2
+        else:
+            delay = base
+
+        delay = min(
+            max(delay, self.min_refresh_interval * 60), self.max_refresh_interval * 60
+        )
+        # Jitter so retries and replicas don't line up
+        return delay * random.uniform(0.9, 1.1)
+
+    def _merge_changes(self, previous, changed, seen_ids):
+        """Merge changed lesson repos into the previously cached list."""
+        # Changed repos are the most recently updated, so they go first to keep
+        # the list ordered by updatedAt. Repos seen without the lesson topic drop out.
+        unchanged = [repo for repo in previous if repo["id"] not in seen_ids]
+        logger.info(
+            f"Merging {len(changed)} changed lesson repos into {len(unchanged)} unchanged"
+        )
+        return changed + unchanged
+
+    def refresh_readmes(self, repos, previous, generation):
+        """Fill a generation's READMEs, re-fetching only repos whose default branch moved."""
+        previous_by_id = {repo["id"]: repo for repo in previous or []}
+        stale = []
+        moved = []
+        unchanged = []
+        for repo in repos:
+            old = previous_by_id.get(repo["id"])
+            if not old or old["name"] != repo["name"]:
+                stale.append(repo["name"])
+            elif old.get("last_commit_date") != repo.get("last_commit_date"):
+                moved.append(repo["name"])
             else:
-                logger.warning("GitHub fetch failed and no stale cache is available")
+                unchanged.append(repo["name"])
+
+        # Unchanged READMEs are copied over server-side, unless they were evicted
+        stale.extend(
+            generation.carry_over_readmes(unchanged, require_html=self.render_workers > 0)
+        )
+        # Old content hashes of every README that may be rewritten, in one round trip
+        generation.prefetch_readme_hashes(stale + moved)
+        # A moved branch rarely touches the README, so revalidate those conditionally
+        stale.extend(self._revalidate_readmes(moved, generation))
+
+        metrics.README_CACHE.inc(len(repos) - len(stale), result="hit")
+        metrics.README_CACHE.inc(len(stale), result="miss")
+        # Written out as each batch arrives; the generation flushes as it fills up
+        fetched = self.github_client.iter_readmes(stale)
+        cached = self._write_readmes(
+            generation, ((name, content, None) for name, content in fetched)
+        )
+        logger.info(
+            f"Cached {cached}/{len(stale)} changed READMEs "
+            f"({len(repos) - len(stale)} unchanged)"
+        )
+
+    def _revalidate_readmes(self, repo_names, generation):
+        """
+        Revalidate cached READMEs with conditional REST requests.
+        Returns the names that still need a full fetch (cache entry evicted).
+        """
+        stats = {"requests": 0, "not_modified": 0, "bytes_saved": 0}
+        evicted = []
+        changed = []
+        validators_by_name = {
+            name: self.cache_manager.get_readme_validators(name) for name in repo_names
+        }
+        results = self.github_client.fetch_readmes_conditional(validators_by_name)
+        for name, (content, new_validators, not_modified) in results.items():
+            validators = validators_by_name[name]
+            stats["requests"] += 1
+            if not_modified:
+                if generation.carry_over_readmes(
+                    [name], require_html=self.render_workers > 0
+                ):
+                    evicted.append(name)
+                    continue
+                stats["not_modified"] += 1
+                stats["bytes_saved"] += int(validators.get("bytes", 0))
+            elif content is not None:
+                changed.append((name, content, new_validators))
+            elif new_validators is None:
+                # The request failed; keep serving the cached README rather than
+                # dropping it. Only a 404 (no README any more) leaves it out
+                if generation.carry_over_readmes(
+                    [name], require_html=self.render_workers > 0
+                ):
+                    evicted.append(name)
+        self._write_readmes(generation, changed)
+
+        if repo_names:
+            logger.info(
+                f"Revalidated {stats['requests']} READMEs: {stats['not_modified']} "
+                f"not modified, {stats['bytes_saved']} bytes saved"
+            )
+        self.readme_revalidation = stats
+        return evicted
+
+    def _write_readmes(self, generation, readmes) -> int:
+        """
+        Write (name, content, validators) READMEs into a generation, rendering each
+        to HTML on the process pool while later ones are still arriving.
+        Returns how many were written.
+        """
+        pending = deque()
+        written = 0
+        for name, content, validators in readmes:
+            if content is None:
+                continue
+            generation.set_readme(name, content, validators)
+            written += 1
+            if self.render_workers > 0:
+                pending.append((name, self._submit_render(content, name)))
+                # Bound in-flight renders so rendered HTML doesn't pile up
+                if len(pending) > self.render_workers * 4:
+                    self._store_render(generation, *pending.popleft())
+        while pending:
+            self._store_render(generation, *pending.popleft())
+        return written
+
+    def _submit_render(self, content: str, repo_name: str):
+        with self._renderer_lock:
+            for attempt in range(2):
+                if self._renderer is None:
+                    self._renderer = ProcessPoolExecutor(
+                        max_workers=self.render_workers,
+                        mp_context=multiprocessing.get_context("forkserver"),
+                    )
+                try:
+                    return self._renderer.submit(
+                        render_readme, content, self.github_client.org, repo_name
+                    )
+                except BrokenProcessPool:
+                    logger.warning("README render pool broke, starting a new one")
+                    self._renderer = None
+            raise BrokenProcessPool("README render pool keeps breaking")
+
+    def _store_render(self, generation, repo_name, future):
+        try:
+            rendered = future.result(timeout=60)
+        except Exception as e:
+            # Readers fall back to rendering the markdown themselves
+            logger.error(f"Rendering README for {repo_name} failed: {e}")
+            rendered = RENDER_FAILED
+        generation.set_readme_html(repo_name, rendered)
 
     def start(self):
-        """Start the scheduler in a background thread."""
+        """Start the scheduler and status threads in the background."""
         if self._running:
             logger.warn("Scheduler is already running")
             return
 
-        # Run immediately on startup
-        logger.info("Running initial cache refresh...")
-        self.refresh_cache()
-
-        # Schedule periodic refreshes
-        schedule.every(self.refresh_interval).minutes.do(
-            self.refresh_cache
-        )  # I love this syntax
-        logger.info(f"Scheduled cache refresh every {self.refresh_interval} minutes")
+        logger.info(
+            f"Scheduling cache refresh around every {self.refresh_interval} minutes "
+            f"(adaptive between {self.min_refresh_interval} and {self.max_refresh_interval})"
+        )
 
         self._running = True
+        self._stop_event.clear()
 
-        def run_scheduler():
-            while self._running:
-                schedule.run_pending()
-                time.sleep(1)
-
-        self._thread = threading.Thread(target=run_scheduler, daemon=True)
+        self._lease_thread = threading.Thread(target=self._run_lease, daemon=True)
+        self._lease_thread.start()
+        self._thread = threading.Thread(target=self._run_scheduler, daemon=True)
         self._thread.start()
+        self._status_thread = threading.Thread(target=self._run_status, daemon=True)
+        self._status_thread.start()
         logger.info("Scheduler started")
 
+    def _hold_leadership(self) -> bool:
+        """Acquire or keep leadership, starting/stopping leader-only work on changes."""
+        try:
+            leader = self.leader_lease.acquire()
+        except Exception as e:
+            logger.error(f"Leader election failed: {e}")
+            leader = False
+
+        if leader and not self.is_leader:
+            logger.info("This process is now the scheduler leader")
+            self.refresh_queue.start()
+            self.readme_fills.start()
+        elif not leader and self.is_leader:
+            logger.warning("Lost scheduler leadership")
+            self.refresh_queue.stop()
+            self.readme_fills.stop()
+        self.is_leader = leader
+        return leader
+
+    def _run_lease(self):
+        while self._running:
+            self._hold_leadership()
+            if self._stop_event.wait(self.lease_renew_interval):
+                break
+
+    def _run_scheduler(self):
+        while self._running:
+            if not self.is_leader:
+                # Another process refreshes; the lease thread tells us if it goes away
+                if self._stop_event.wait(1):
+                    break
+                continue
+
+            # A new leader refreshes immediately rather than waiting an interval
+            self.refresh_cache()
+            delay = self._next_delay()
+            self.next_refresh_time = time.time() + delay
+            logger.info(f"Next cache refresh in {delay:.0f}s")
+            if self._stop_event.wait(delay):
+                break
+
     def stop(self):
         """Stop the scheduler."""
         self._running = False
-        if self._thread:
-            self._thread.join(timeout=5)
+        self._stop_event.set()
+        self.refresh_queue.stop()
+        self.readme_fills.stop()
+        for thread in (self._lease_thread, self._thread, self._status_thread):
+            if thread:
+                thread.join(timeout=5)
+        if self.is_leader:
+            self.leader_lease.release()
+            self.is_leader = False
+        if self._renderer is not None:
+            self._renderer.shutdown(cancel_futures=True)
+            self._renderer = None
         logger.info("Scheduler stopped")
 
+    def _run_status(self):
+        while self._running:
+            self._update_status_snapshot()
+            if self._stop_event.wait(self.status_interval):
+                break
+
+    def _update_status_snapshot(self):
+        """Recompute the status snapshot. The leader shares it with followers via Redis."""
+        try:
+            if self.is_leader:
+                status = self.get_status()
+                self._metrics_snapshot = metrics.pipeline.render()
+                pipe = self.cache_manager.redis_client.pipeline(transaction=False)
+                pipe.set(self.status_key, json.dumps(status), ex=int(self.status_interval * 6))
+                pipe.set(
+                    self.metrics_key, self._metrics_snapshot, ex=int(self.status_interval * 6)
+                )
+                pipe.execute()
+            else:
+                pipe = self.cache_manager.redis_client.pipeline(transaction=False)
+                pipe.get(self.status_key)
+                pipe.get(self.metrics_key)
+                shared, shared_metrics = pipe.execute()
+                # No leader has shared a status yet (or recently), so nothing vouches
+                # for the cache
+                status = (
+                    json.loads(shared)
+                    if shared
+                    else {"cache_healthy": False, "reason": "no leader status"}
+                )
+                status.update({"running": self._running, "leader": False})
+                self._metrics_snapshot = shared_metrics or ""
+        except Exception as e:
+            logger.error(f"Status update failed: {e}")
+            status = {**self._status_snapshot, "cache_healthy": False}
+        self._status_snapshot = status
+        self._status_updated_at = time.time()
+
+    def cached_metrics(self) -> str:
+        """The leader's pipeline metrics as of the last status snapshot."""
+        return self._metrics_snapshot
+
+    def cached_status(self) -> dict:
+        """Last status snapshot, without touching Redis. Marks it unhealthy if stale."""
+        status = dict(self._status_snapshot)
+        if self._status_updated_at is None:
+            status["status_age_seconds"] = None
+            return status
+        age = time.time() - self._status_updated_at
+        status["status_age_seconds"] = round(age, 1)
+        if age > self.status_interval * 3:
+            # The status thread is stuck, most likely on an unresponsive Redis
+            status["cache_healthy"] = False
+        return status
+
     def get_status(self) -> dict:
         """Get scheduler status."""
         return {
             "running": self._running,
+            "leader": self.is_leader,
+            "leader_identity": self.leader_lease.identity,
+            "fencing_token": self.leader_lease.fencing_token,
             "last_refresh_time": self.last_refresh_time,
             "refresh_interval_minutes": self.refresh_interval,
+            "webhooks_enabled": self.webhooks_enabled,
+            "pending_repo_refreshes": self.refresh_queue.pending(),
+            "pending_readme_fills": self.readme_fills.pending(),
+            "next_refresh_time": self.next_refresh_time,
+            "last_change_count": self.last_change_count,
+            "rate_limits": dict(self.github_client.rate_limits),
+            "github_circuit": self.github_client.breaker.snapshot(),
+            "last_full_refresh_time": self.last_full_refresh_time,
+            "full_refresh_interval_minutes": self.full_refresh_interval,
+            "high_water_mark": self.high_water_mark,
+            "readme_revalidation": self.readme_revalidation,
+            "last_refresh_stages": self.last_refresh_stages,
             "cache_healthy": self.cache_manager.health_check(),
+            "cache_generation": self.cache_manager.current_generation(),
+            "cache_ttl_seconds": self.cache_manager.ttl,
+            "change_feed_version": self.change_feed.version(),
+            "cache_freshness": self.cache_manager.get_freshness(),
         }
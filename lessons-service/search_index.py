@@ -0,0 +1,101 @@
+"""Inverted index for ranked search over lesson metadata and READMEs."""
+
+import heapq
+import math
+import re
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from how if in into is it of on or that the this "
+    "to was we will with you your".split()
+)
+# Most frequent README terms kept per repo, bounding the stored term lists
+MAX_README_TERMS = 200
+# Terms a trailing prefix may expand to, so a short prefix stays cheap
+MAX_PREFIX_TERMS = 50
+# A match in a repo's name counts for more than one deep in its README
+FIELD_WEIGHTS = {"name": 5.0, "topics": 4.0, "description": 3.0, "language": 2.0, "readme": 1.0}
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercase word tokens, without stopwords and single characters."""
+    if not text:
+        return []
+    return [
+        token
+        for token in TOKEN_PATTERN.findall(text.lower())
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+def readme_terms(content: str) -> Dict[str, int]:
+    """Term counts of a README, stored next to it so unchanged READMEs aren't re-read."""
+    return dict(Counter(tokenize(content)).most_common(MAX_README_TERMS))
+
+
+class SearchIndex:
+    """
+    Term -> {repo name: weight} postings over every lesson repo in a generation.
+    Each field contributes its weight times a dampened term frequency; queries add
+    up postings scaled by inverse document frequency. The last query term also
+    matches as a prefix, so results update as the user types.
+    """
+
+    def __init__(
+        self,
+        repos: List[Dict[str, Any]],
+        readme_terms_by_name: Dict[str, Dict[str, int]],
+    ):
+        self.repos = {repo["name"]: repo for repo in repos}
+        postings: Dict[str, Dict[str, float]] = {}
+        for repo in repos:
+            name = repo["name"]
+            fields = {
+                "name": Counter(tokenize(name)),
+                "topics": Counter(t for topic in repo.get("topics", []) for t in tokenize(topic)),
+                "description": Counter(tokenize(repo.get("description"))),
+                "language": Counter(tokenize(repo.get("language"))),
+                "readme": readme_terms_by_name.get(name) or {},
+            }
+            for field, counts in fields.items():
+                weight = FIELD_WEIGHTS[field]
+                for term, count in counts.items():
+                    doc = postings.setdefault(term, {})
+                    doc[name] = doc.get(name, 0.0) + weight * (1 + math.log(count))
+        self.postings = postings
+        self.terms = sorted(postings)
+
+    def __len__(self) -> int:
+        return len(self.repos)
+
+    def _expand(self, token: str, prefix: bool) -> List[str]:
+        if not prefix:
+            return [token] if token in self.postings else []
+        start = bisect_left(self.terms, token)
+        matches = []
+        for term in self.terms[start : start + MAX_PREFIX_TERMS]:
+            if not term.startswith(token):
+                break
+            matches.append(term)
+        return matches
+
+    def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Repos matching any query term, best first, each with a `score`."""
+        tokens = tokenize(query)
+        scores: Dict[str, float] = {}
+        for i, token in enumerate(tokens):
+            for term in self._expand(token, prefix=i == len(tokens) - 1):
+                docs = self.postings[term]
+                idf = math.log(1 + len(self.repos) / len(docs))
+                # Prefix matches rank below exact ones
+                if term != token:
+                    idf *= 0.5
+                for name, weight in docs.items():
+                    scores[name] = scores.get(name, 0.0) + weight * idf
+
+        # Partial selection: common terms can match most of the catalog
+        ranked = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [{**self.repos[name], "score": round(score, 3)} for name, score in ranked]
@@ -0,0 +1,103 @@
+"""Tests for CacheManager generations against fakeredis."""
+
+import pytest
+
+
+def fail_scan(*args, **kwargs):
+    raise AssertionError("generation keys should come from the key set, not SCAN")
+
+
+def test_generation_records_its_keys(cache_manager):
+    generation = cache_manager.new_generation()
+    repo = {"name": "lesson-a", "topics": ["web"], "updated_at": "2025-01-01T00:00:00Z"}
+    generation.set_repos([repo])
+    generation.set_readme("lesson-a", "# Lesson A")
+    generation.set_meta(0, 60)
+    assert generation.publish()
+
+    keys = set(cache_manager.generation_keys(generation.number))
+    prefix = generation.prefix
+    assert {
+        f"{prefix}repos",
+        f"{prefix}repo_index",
+        f"{prefix}topic:web",
+        f"{prefix}readme:lesson-a",
+        f"{prefix}readme_terms:lesson-a",
+        f"{prefix}readme_validators:lesson-a",
+        f"{prefix}meta",
+        f"{prefix}keys",
+    } == keys
+    assert set(cache_manager.redis_client.scan_iter(match=f"{prefix}*")) == keys
+
+
+def test_carried_over_readmes_are_recorded(cache_manager):
+    first = cache_manager.new_generation()
+    first.set_readme("lesson-a", "# Lesson A")
+    assert first.publish()
+
+    second = cache_manager.new_generation()
+    assert second.carry_over_readmes(["lesson-a"], require_html=False) == []
+    assert f"{second.prefix}readme:lesson-a" in cache_manager.generation_keys(second.number)
+
+
+def test_discarded_generation_expires_flushed_chunks(cache_manager, monkeypatch):
+    current = cache_manager.new_generation()
+    current.set_readme("lesson-a", "# Lesson A")
+    assert current.publish()
+
+    failed = cache_manager.new_generation()
+    failed.set_readme("lesson-a", "# Lesson A, v2")
+    failed.flush()
+    monkeypatch.setattr(cache_manager.redis_client, "scan_iter", fail_scan)
+    failed.discard()
+
+    redis_client = cache_manager.redis_client
+    for key in cache_manager.generation_keys(failed.number):
+        assert 0 < redis_client.ttl(key) <= cache_manager.generation_grace
+    assert redis_client.ttl(f"{current.prefix}readme:lesson-a") > cache_manager.generation_grace
+
+
+def test_discard_keeps_a_generation_that_was_published(cache_manager):
+    generation = cache_manager.new_generation()
+    generation.set_readme("lesson-a", "# Lesson A")
+    assert generation.publish()
+
+    generation.discard()
+    assert cache_manager.redis_client.ttl(f"{generation.prefix}readme:lesson-a") > 60
+
+
+def test_expire_generation_falls_back_to_scanning(cache_manager):
+    prefix = cache_manager.generation_prefix(7)
+    cache_manager.redis_client.set(f"{prefix}repos", "[]")
+
+    cache_manager.expire_generation(7)
+    assert 0 < cache_manager.redis_client.ttl(f"{prefix}repos") <= cache_manager.generation_grace
+
+
+def fail_read(*args, **kwargs):
+    raise AssertionError("README hashes should come from the prefetched validators")
+
+
+def write_readmes(cache_manager, readmes):
+    generation = cache_manager.new_generation()
+    generation.prefetch_readme_hashes(list(readmes))
+    for name, content in readmes.items():
+        generation.set_readme(name, content)
+    assert generation.publish()
+    return generation
+
+
+@pytest.mark.parametrize("codec", [None, "gzip"])
+def test_unchanged_readmes_are_found_without_reading_payloads(cache_manager, monkeypatch, codec):
+    cache_manager.codec = codec
+    write_readmes(cache_manager, {"lesson-a": "# A", "lesson-b": "# B"})
+
+    monkeypatch.setattr(cache_manager, "stored_hash", fail_read)
+    monkeypatch.setattr(cache_manager.binary_client, "get", fail_read)
+    generation = write_readmes(cache_manager, {"lesson-a": "# A", "lesson-b": "# B, v2"})
+
+    assert generation.changed_readmes == {"lesson-b"}
+    assert generation.unchanged_payloads == (1 if codec else 0)
+    monkeypatch.undo()
+    assert cache_manager.get_readme("lesson-a") == "# A"
+    assert cache_manager.get_readme("lesson-b") == "# B, v2"
@@ -0,0 +1,89 @@
+"""Tests for the circuit breaker's state machine."""
+
+import pytest
+
+import circuit_breaker
+from circuit_breaker import CircuitBreaker
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker("test", failure_threshold=3, cooldown=30, max_cooldown=100)
+
+
+def fail(breaker: CircuitBreaker, times: int):
+    for _ in range(times):
+        assert breaker.allow()
+        breaker.record_failure()
+
+
+def test_opens_after_threshold(breaker):
+    fail(breaker, 2)
+    assert breaker.state == "closed"
+
+    fail(breaker, 1)
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.seconds_until_retry() == 30
+    assert breaker.snapshot()["opens"] == 1
+
+
+def test_success_resets_the_failure_count(breaker):
+    fail(breaker, 2)
+    breaker.record_success()
+    fail(breaker, 2)
+    assert breaker.state == "closed"
+
+
+def test_half_open_lets_one_probe_through(breaker, clock):
+    fail(breaker, 3)
+    clock.now += 29
+    assert not breaker.allow()
+
+    clock.now += 1
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    assert not breaker.allow()
+
+
+def test_successful_probe_closes(breaker, clock):
+    fail(breaker, 3)
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_success()
+
+    assert breaker.state == "closed"
+    assert breaker.snapshot()["consecutive_failures"] == 0
+    assert breaker.allow()
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens_with_longer_cooldown(breaker, clock):
+    fail(breaker, 3)
+    for cooldown in (60, 100, 100):
+        clock.now += breaker.cooldown
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == "open"
+        assert breaker.cooldown == cooldown
+        assert not breaker.allow()
+
+    clock.now += breaker.cooldown
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.cooldown == 30
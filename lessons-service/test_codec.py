@@ -0,0 +1,42 @@
+"""Tests for the framed payload format in codec.py."""
+
+import importlib.util
+
+import pytest
+
+import codec
+
+CONTENT = "# Lesson\n\nUnicode too: café ☕\n" * 50
+
+requires_zstd = pytest.mark.skipif(
+    importlib.util.find_spec("compression") is None, reason="zstd needs Python 3.14"
+)
+
+
+@pytest.mark.parametrize("name", ["none", "gzip", pytest.param("zstd", marks=requires_zstd)])
+def test_round_trip(name):
+    value = codec.encode(CONTENT, name)
+
+    assert value.startswith(codec.MAGIC)
+    assert value[4] == codec.CODECS[name]
+    assert codec.decode(value) == CONTENT
+    assert codec.stored_hash(value[: codec.HEADER_SIZE]) == codec.hash_content(CONTENT)
+
+
+def test_compression_shrinks_repetitive_content():
+    assert len(codec.encode(CONTENT, "gzip")) < len(codec.encode(CONTENT, "none"))
+
+
+def test_unframed_values_are_plain_text():
+    value = CONTENT.encode("utf-8")
+
+    assert codec.decode(value) == CONTENT
+    assert codec.stored_hash(value[: codec.HEADER_SIZE]) is None
+    assert codec.stored_hash(None) is None
+
+
+def test_unknown_codec():
+    with pytest.raises(ValueError):
+        codec.encode(CONTENT, "brotli")
+    with pytest.raises(ValueError):
+        codec.decode(codec.MAGIC + bytes([9]) + codec.hash_content(CONTENT) + b"x")
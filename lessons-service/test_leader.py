@@ -0,0 +1,97 @@
+"""Tests for the leader lease and fenced publishing, against fakeredis.
+
+Usage:
+    uv run --group test pytest test_leader.py
+"""
+
+import unittest
+
+import fakeredis
+
+from cache_manager import CacheManager
+from leader import RedisLeaderLease
+
+
+class LeaderLeaseTest(unittest.TestCase):
+    def setUp(self):
+        server = fakeredis.FakeServer()
+        self.redis_client = fakeredis.FakeRedis(server=server, decode_responses=True)
+        self.cache_manager = CacheManager(
+            redis_client=self.redis_client,
+            binary_client=fakeredis.FakeRedis(server=server),
+        )
+
+    def lease(self) -> RedisLeaderLease:
+        return RedisLeaderLease(self.redis_client, ttl=10.0)
+
+    def expire(self, lease: RedisLeaderLease):
+        """Let a lease lapse, as if its holder stopped renewing."""
+        self.redis_client.delete(lease.key)
+
+    def test_acquire_renew_release(self):
+        first, second = self.lease(), self.lease()
+
+        self.assertTrue(first.acquire())
+        self.assertEqual(first.fencing_token, 1)
+        self.assertEqual(first.holder(), first.identity)
+        self.assertFalse(second.acquire())
+        self.assertIsNone(second.fencing_token)
+
+        # Renewing keeps the lease and its token
+        self.assertTrue(first.acquire())
+        self.assertEqual(first.fencing_token, 1)
+        self.assertGreater(self.redis_client.pttl(first.key), 0)
+
+        first.release()
+        self.assertIsNone(first.fencing_token)
+        self.assertIsNone(first.holder())
+        self.assertTrue(second.acquire())
+        self.assertEqual(second.fencing_token, 2)
+
+    def test_release_leaves_a_new_holder_alone(self):
+        first, second = self.lease(), self.lease()
+        self.assertTrue(first.acquire())
+        self.expire(first)
+        self.assertTrue(second.acquire())
+
+        first.release()
+        self.assertEqual(second.holder(), second.identity)
+
+    def test_expired_lease_is_not_renewed(self):
+        first, second = self.lease(), self.lease()
+        self.assertTrue(first.acquire())
+        self.expire(first)
+        self.assertTrue(second.acquire())
+
+        self.assertFalse(first.acquire())
+        self.assertIsNone(first.fencing_token)
+        self.assertEqual(second.holder(), second.identity)
+
+    def test_stale_token_cannot_publish(self):
+        first, second = self.lease(), self.lease()
+        self.assertTrue(first.acquire())
+        stale = self.cache_manager.new_generation()
+        self.expire(first)
+
+        self.assertTrue(second.acquire())
+        current = self.cache_manager.new_generation()
+        self.assertTrue(current.publish(second.fencing_token))
+
+        self.assertFalse(stale.publish(first.fencing_token))
+        self.assertEqual(self.cache_manager.current_generation(), current.number)
+
+    def test_newer_token_can_publish(self):
+        lease = self.lease()
+        self.assertTrue(lease.acquire())
+        first = self.cache_manager.new_generation()
+        self.assertTrue(first.publish(lease.fencing_token))
+
+        lease.release()
+        self.assertTrue(lease.acquire())
+        second = self.cache_manager.new_generation()
+        self.assertTrue(second.publish(lease.fencing_token))
+        self.assertEqual(self.cache_manager.current_generation(), second.number)
+
+
+if __name__ == "__main__":
+    unittest.main()
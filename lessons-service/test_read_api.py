@@ -0,0 +1,52 @@
+"""Tests for conditional and compressed responses from the read routes."""
+
+import gzip
+import json
+
+import pytest
+
+REPOS = [
+    {
+        "name": "intro-to-python",
+        "description": "Learn the basics",
+        "topics": ["beginner"],
+        "updated_at": "2025-01-01T00:00:00Z",
+    }
+]
+
+
+@pytest.fixture
+def etag(client, cache_manager):
+    generation = cache_manager.new_generation()
+    generation.set_repos(REPOS)
+    assert generation.publish()
+    return client.get("/repos").headers["ETag"]
+
+
+@pytest.mark.parametrize("header", ["{etag}", '"other", {etag}', "*"])
+def test_matching_etag_is_not_modified(client, etag, header):
+    response = client.get("/repos", headers={"If-None-Match": header.format(etag=etag)})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+
+@pytest.mark.parametrize("header", ["W/{etag}", '"{bare}0"', '"0{bare}"'])
+def test_weak_or_different_etag_is_sent_in_full(client, etag, header):
+    header = header.format(etag=etag, bare=etag.strip('"'))
+    response = client.get("/repos", headers={"If-None-Match": header})
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("header", ["gzip", "br, gzip;q=0.5", "*"])
+def test_gzip_is_sent_when_accepted(client, etag, header):
+    response = client.get("/repos", headers={"Accept-Encoding": header})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(response.data)) == REPOS
+
+
+@pytest.mark.parametrize("header", [None, "identity", "gzip;q=0", "br, gzip;q=0"])
+def test_gzip_is_not_sent_when_refused(client, etag, header):
+    headers = {"Accept-Encoding": header} if header else {}
+    response = client.get("/repos", headers=headers)
+    assert "Content-Encoding" not in response.headers
+    assert response.json == REPOS
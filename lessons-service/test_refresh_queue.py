@@ -0,0 +1,73 @@
+"""Tests for the webhook refresh queue's retries of failed refreshes."""
+
+from refresh_queue import RepoRefreshQueue
+
+
+class FlakyHandler:
+    """Fails the first `failures` calls, then succeeds."""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.calls = []
+
+    def __call__(self, repo_name: str):
+        self.calls.append(repo_name)
+        if len(self.calls) <= self.failures:
+            raise ConnectionError("GitHub unavailable")
+
+
+def drain_once(queue: RepoRefreshQueue):
+    """One pass of the leader loop, without its thread or waits."""
+    queue._promote_retries()
+    for repo_name in queue._drain():
+        queue._refresh(repo_name)
+
+
+def test_failed_refresh_is_retried(redis_client):
+    handler = FlakyHandler(failures=1)
+    queue = RepoRefreshQueue(redis_client, handler, retry_delay=0)
+    queue.enqueue("lesson-a")
+
+    drain_once(queue)
+    assert handler.calls == ["lesson-a"]
+    assert queue.pending() == []
+    assert redis_client.zscore(queue.retry_key, "lesson-a") is not None
+
+    drain_once(queue)
+    assert handler.calls == ["lesson-a", "lesson-a"]
+    assert redis_client.zcard(queue.retry_key) == 0
+    assert redis_client.hget(queue.attempts_key, "lesson-a") is None
+
+
+def test_retry_waits_for_its_backoff(redis_client):
+    handler = FlakyHandler(failures=1)
+    queue = RepoRefreshQueue(redis_client, handler, retry_delay=60)
+    queue.enqueue("lesson-a")
+
+    drain_once(queue)
+    drain_once(queue)
+    assert handler.calls == ["lesson-a"]
+    assert queue.pending() == []
+
+
+def test_backoff_doubles(redis_client):
+    queue = RepoRefreshQueue(redis_client, FlakyHandler(failures=3), retry_delay=10)
+
+    due = []
+    for _ in range(3):
+        queue._refresh("lesson-a")
+        due.append(redis_client.zscore(queue.retry_key, "lesson-a"))
+    assert 9 < due[1] - due[0] < 11
+    assert 19 < due[2] - due[1] < 21
+
+
+def test_gives_up_after_max_attempts(redis_client):
+    handler = FlakyHandler(failures=10)
+    queue = RepoRefreshQueue(redis_client, handler, retry_delay=0, max_attempts=3)
+    queue.enqueue("lesson-a")
+
+    for _ in range(5):
+        drain_once(queue)
+    assert handler.calls == ["lesson-a"] * 3
+    assert redis_client.zcard(queue.retry_key) == 0
+    assert redis_client.hget(queue.attempts_key, "lesson-a") is None
@@ -0,0 +1,148 @@
+"""Tests for LessonCacheScheduler against fakeredis and a stub GitHub client."""
+
+import time
+
+import pytest
+
+import metrics
+from circuit_breaker import CircuitOpenError
+from scheduler import LessonCacheScheduler
+
+
+class StubGitHubClient:
+    """Answers README revalidations with canned results; repo fetches fail."""
+
+    def __init__(self):
+        self.revalidations = {}
+        self.fetch_error = CircuitOpenError("GitHub circuit is open")
+
+    def fetch_readmes_conditional(self, validators_by_name):
+        return {name: self.revalidations[name] for name in validators_by_name}
+
+    def fetch_repo_changes(self, since=None):
+        raise self.fetch_error
+
+
+@pytest.fixture
+def github_client():
+    return StubGitHubClient()
+
+
+@pytest.fixture
+def scheduler(monkeypatch, github_client, cache_manager):
+    monkeypatch.setenv("README_RENDER_WORKERS", "0")
+    return LessonCacheScheduler(github_client=github_client, cache_manager=cache_manager)
+
+
+def cache_readme(cache_manager, repo_name: str, content: str):
+    generation = cache_manager.new_generation()
+    generation.set_readme(repo_name, content, {"etag": '"v1"'})
+    assert generation.publish()
+
+
+def revalidate(scheduler, repo_name: str):
+    generation = scheduler.cache_manager.new_generation()
+    evicted = scheduler._revalidate_readmes([repo_name], generation)
+    assert generation.publish()
+    return evicted
+
+
+def test_not_modified_readme_is_carried_over(scheduler, github_client, cache_manager):
+    cache_readme(cache_manager, "lesson-a", "# Lesson A")
+    github_client.revalidations["lesson-a"] = (None, {"etag": '"v1"'}, True)
+
+    assert revalidate(scheduler, "lesson-a") == []
+    assert cache_manager.get_readme("lesson-a") == "# Lesson A"
+    assert scheduler.readme_revalidation["not_modified"] == 1
+
+
+def test_modified_readme_is_rewritten(scheduler, github_client, cache_manager):
+    cache_readme(cache_manager, "lesson-a", "# Lesson A")
+    github_client.revalidations["lesson-a"] = ("# Lesson A, v2", {"etag": '"v2"'}, False)
+
+    assert revalidate(scheduler, "lesson-a") == []
+    assert cache_manager.get_readme("lesson-a") == "# Lesson A, v2"
+    assert cache_manager.get_readme_validators("lesson-a")["etag"] == '"v2"'
+
+
+def test_failed_revalidation_keeps_the_cached_readme(scheduler, github_client, cache_manager):
+    cache_readme(cache_manager, "lesson-a", "# Lesson A")
+    github_client.revalidations["lesson-a"] = (None, None, False)
+
+    assert revalidate(scheduler, "lesson-a") == []
+    assert cache_manager.get_readme("lesson-a") == "# Lesson A"
+
+
+def test_failed_revalidation_of_an_evicted_readme_fetches_it(
+    scheduler, github_client, cache_manager
+):
+    cache_readme(cache_manager, "lesson-a", "# Lesson A")
+    github_client.revalidations["lesson-b"] = (None, None, False)
+
+    assert revalidate(scheduler, "lesson-b") == ["lesson-b"]
+
+
+def test_deleted_readme_is_dropped(scheduler, github_client, cache_manager):
+    cache_readme(cache_manager, "lesson-a", "# Lesson A")
+    github_client.revalidations["lesson-a"] = (None, {}, False)
+
+    assert revalidate(scheduler, "lesson-a") == []
+    assert cache_manager.get_readme("lesson-a") is None
+
+
+def cache_generation(cache_manager, stale_after: float):
+    generation = cache_manager.new_generation()
+    generation.set_readme("lesson-a", "# Lesson A")
+    generation.set_meta(time.time() - 60, stale_after)
+    assert generation.publish()
+    return generation
+
+
+@pytest.mark.parametrize("error", [CircuitOpenError("open"), ConnectionError("reset")])
+def test_failed_refresh_serves_stale(scheduler, github_client, cache_manager, error):
+    generation = cache_generation(cache_manager, stale_after=time.time() - 1)
+    redis_client = cache_manager.redis_client
+    readme_key = f"{generation.prefix}readme:lesson-a"
+    redis_client.expire(cache_manager.current_key, 60)
+    redis_client.expire(readme_key, 60)
+    github_client.fetch_error = error
+    serves = metrics.STALE_SERVES.value()
+
+    scheduler.refresh_cache()
+
+    assert metrics.STALE_SERVES.value() == serves + 1
+    assert cache_manager.current_generation() == generation.number
+    assert redis_client.ttl(cache_manager.current_key) > 60
+    assert redis_client.ttl(readme_key) > 60
+    # Freshness is left as written, so readers see the data is stale
+    freshness = cache_manager.get_freshness()
+    assert freshness["stale"]
+    assert freshness["fetched_at"] < time.time() - 59
+
+
+def test_failed_refresh_without_a_cache(scheduler):
+    serves = metrics.STALE_SERVES.value()
+    scheduler.refresh_cache()
+    assert metrics.STALE_SERVES.value() == serves
+
+
+def test_extend_ttl_waits_for_half_the_ttl(cache_manager):
+    generation = cache_generation(cache_manager, stale_after=time.time() + 600)
+    redis_client = cache_manager.redis_client
+    readme_key = f"{generation.prefix}readme:lesson-a"
+    half = cache_manager.ttl // 2
+
+    redis_client.expire(cache_manager.current_key, half + 10)
+    redis_client.expire(readme_key, half + 10)
+    assert cache_manager.extend_ttl()
+    assert redis_client.ttl(readme_key) <= half + 10
+
+    redis_client.expire(cache_manager.current_key, half - 10)
+    assert cache_manager.extend_ttl()
+    assert redis_client.ttl(cache_manager.current_key) > half
+    assert redis_client.ttl(readme_key) > half
+
+
+def test_fresh_cache_is_not_stale(cache_manager):
+    cache_generation(cache_manager, stale_after=time.time() + 600)
+    assert not cache_manager.get_freshness()["stale"]
@@ -0,0 +1,118 @@
+"""Tests for search indexing, ranking and the /search route."""
+
+from search_index import MAX_README_TERMS, SearchIndex, readme_terms, tokenize
+
+
+def repo(name: str, **fields):
+    return {
+        "name": name,
+        "description": fields.get("description"),
+        "topics": fields.get("topics", []),
+        "language": fields.get("language"),
+        "updated_at": "2025-01-01T00:00:00Z",
+    }
+
+
+REPOS = [
+    repo("intro-to-python", description="Learn the basics", topics=["beginner"]),
+    repo("web-scraping", description="Scrape pages with Python", language="HTML"),
+    repo("rust-game", description="A small game", topics=["rust", "gamedev"]),
+]
+READMES = {
+    "intro-to-python": "# Intro\n\nVariables, loops and functions.",
+    "rust-game": "Uses python scripts for the build. Python python python.",
+}
+
+
+def publish(cache_manager, repos, readmes):
+    generation = cache_manager.new_generation()
+    generation.set_repos(repos)
+    for name, content in readmes.items():
+        generation.set_readme(name, content)
+    assert generation.publish()
+
+
+def names(results):
+    return [result["name"] for result in results]
+
+
+def test_tokenize():
+    assert tokenize("The C++ and C# of a Web-App!") == ["c++", "c#", "web", "app"]
+    assert tokenize(None) == []
+
+
+def test_readme_terms_are_capped():
+    content = " ".join(f"term{i} " * (i + 1) for i in range(MAX_README_TERMS + 50))
+    terms = readme_terms(content)
+    assert len(terms) == MAX_README_TERMS
+    assert f"term{MAX_README_TERMS + 49}" in terms
+    assert "term0" not in terms
+
+
+def test_fields_are_ranked_by_weight():
+    index = SearchIndex(REPOS, {name: readme_terms(text) for name, text in READMES.items()})
+    results = index.search("python")
+
+    # Name beats description, which beats a README mentioning it often
+    assert names(results) == ["intro-to-python", "web-scraping", "rust-game"]
+    assert results[0]["score"] > results[1]["score"] > results[2]["score"]
+
+
+def test_last_term_matches_as_prefix():
+    index = SearchIndex(REPOS, {})
+    assert names(index.search("gam")) == ["rust-game"]
+    # Only the last term is a prefix
+    assert index.search("gam rust")[0]["name"] == "rust-game"
+    assert index.search("gam zzz") == []
+
+
+def test_exact_match_ranks_above_prefix_match():
+    repos = [repo("data"), repo("database")]
+    assert names(SearchIndex(repos, {}).search("data")) == ["data", "database"]
+
+
+def test_limit():
+    index = SearchIndex(REPOS, {name: readme_terms(text) for name, text in READMES.items()})
+    assert len(index.search("python", limit=2)) == 2
+
+
+def test_updated_readme_drops_its_old_terms(cache_manager, read_cache):
+    publish(cache_manager, REPOS, {"rust-game": "Built with bevy."})
+    assert names(read_cache.get_search_index().search("bevy")) == ["rust-game"]
+
+    publish(cache_manager, REPOS, {"rust-game": "Built with macroquad."})
+    index = read_cache.get_search_index()
+    assert index.search("bevy") == []
+    assert names(index.search("macroquad")) == ["rust-game"]
+
+
+def test_carried_over_readme_stays_searchable(cache_manager, read_cache):
+    publish(cache_manager, REPOS, {"rust-game": "Built with bevy."})
+    generation = cache_manager.new_generation()
+    generation.set_repos(REPOS)
+    assert generation.carry_over_readmes(["rust-game"], require_html=False) == []
+    assert generation.publish()
+
+    assert names(read_cache.get_search_index().search("bevy")) == ["rust-game"]
+
+
+def test_search_route(client, cache_manager):
+    publish(cache_manager, REPOS, READMES)
+    response = client.get("/search?q=python&limit=1")
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["query"] == "python"
+    assert names(body["results"]) == ["intro-to-python"]
+
+
+def test_search_route_rejects_bad_queries(client, cache_manager):
+    publish(cache_manager, REPOS, READMES)
+    assert client.get("/search").status_code == 400
+    assert client.get("/search?q=%20").status_code == 400
+    assert client.get("/search?q=python&limit=0").status_code == 400
+    assert client.get("/search?q=python&limit=101").status_code == 400
+
+
+def test_search_route_without_a_cache(client):
+    assert client.get("/search?q=python").status_code == 503
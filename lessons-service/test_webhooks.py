@@ -0,0 +1,130 @@
+"""Tests for webhook signature verification, event parsing and the webhook route."""
+
+import hashlib
+import hmac
+import json
+from pathlib import Path
+
+import pytest
+
+from webhooks import repos_from_event, verify_signature
+
+SECRET = "webhook-secret"
+FIXTURES = Path(__file__).parent / "fixtures" / "webhooks"
+
+
+def sign(body: bytes, secret: str = SECRET) -> str:
+    return "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+
+
+def fixture(name: str) -> bytes:
+    return (FIXTURES / f"{name}.json").read_bytes()
+
+
+class StubScheduler:
+    def __init__(self):
+        self.queued = []
+
+    def enqueue_repo(self, repo_name: str) -> bool:
+        if repo_name in self.queued:
+            return False
+        self.queued.append(repo_name)
+        return True
+
+
+@pytest.fixture
+def scheduler(monkeypatch, client):
+    import main
+
+    scheduler = StubScheduler()
+    monkeypatch.setattr(main, "scheduler", scheduler)
+    monkeypatch.setenv("GITHUB_WEBHOOK_SECRET", SECRET)
+    monkeypatch.setenv("GITHUB_ORG", "hacksu")
+    return scheduler
+
+
+def post(client, event: str, body: bytes, signature=None):
+    headers = {"X-GitHub-Event": event, "Content-Type": "application/json"}
+    if signature is not None:
+        headers["X-Hub-Signature-256"] = signature
+    return client.post("/webhooks/github", data=body, headers=headers)
+
+
+def test_verify_signature():
+    body = b'{"zen": "Keep it logically awesome."}'
+    assert verify_signature(SECRET, body, sign(body))
+    assert not verify_signature(SECRET, body, None)
+    assert not verify_signature(SECRET, body, "")
+    assert not verify_signature(SECRET, body, sign(body)[len("sha256=") :])
+    assert not verify_signature(SECRET, body, sign(body, "other-secret"))
+    assert not verify_signature(SECRET, body + b" ", sign(body))
+    assert not verify_signature(SECRET, body, "sha1=" + hashlib.sha1(body).hexdigest())
+
+
+def test_push_to_default_branch(client, scheduler):
+    body = fixture("push")
+    response = post(client, "push", body, sign(body))
+
+    assert response.status_code == 202
+    assert response.get_json()["queued"] == ["intro-to-python"]
+    assert scheduler.queued == ["intro-to-python"]
+
+
+def test_rename_refreshes_both_names(client, scheduler):
+    body = fixture("repository_renamed")
+    payload = json.loads(body)
+    response = post(client, "repository", body, sign(body))
+
+    assert response.status_code == 202
+    assert scheduler.queued == [
+        payload["repository"]["name"],
+        payload["changes"]["repository"]["name"]["from"],
+    ]
+
+
+BAD_SIGNATURES = {
+    "missing": lambda body: None,
+    "empty": lambda body: "",
+    "no digest": lambda body: "sha256=",
+    "wrong digest": lambda body: "sha256=" + "0" * 64,
+    "other body": lambda body: sign(b"{}"),
+    "wrong secret": lambda body: sign(body, "other-secret"),
+}
+
+
+@pytest.mark.parametrize("make_signature", BAD_SIGNATURES.values(), ids=BAD_SIGNATURES.keys())
+def test_bad_signatures_are_rejected(client, scheduler, make_signature):
+    body = fixture("push")
+    response = post(client, "push", body, make_signature(body))
+
+    assert response.status_code == 401
+    assert scheduler.queued == []
+
+
+def test_webhooks_off_without_a_secret(client, scheduler, monkeypatch):
+    monkeypatch.delenv("GITHUB_WEBHOOK_SECRET")
+    body = fixture("push")
+    assert post(client, "push", body, sign(body)).status_code == 404
+    assert scheduler.queued == []
+
+
+def test_ping(client, scheduler):
+    body = b'{"zen": "Design for failure."}'
+    assert post(client, "ping", body, sign(body)).status_code == 200
+
+
+def test_unhandled_events_queue_nothing(client, scheduler):
+    body = fixture("push")
+    response = post(client, "issues", body, sign(body))
+
+    assert response.status_code == 202
+    assert response.get_json()["queued"] == []
+    assert scheduler.queued == []
+
+
+def test_repos_from_event_filters():
+    payload = json.loads(fixture("push"))
+    assert repos_from_event("push", payload, "HacKSU") == ["intro-to-python"]
+    assert repos_from_event("push", payload, "someone-else") == []
+    assert repos_from_event("push", {**payload, "ref": "refs/heads/feature"}, "hacksu") == []
+    assert repos_from_event("push", {}, "hacksu") == []
@@ -0,0 +1,43 @@
+"""GitHub webhook verification and event parsing."""
+
+import hashlib
+import hmac
+import logging
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Events that can change a lesson entry or its README
+HANDLED_EVENTS = {"push", "repository"}
+
+
+def verify_signature(secret: str, body: bytes, signature: Optional[str]) -> bool:
+    """Check an X-Hub-Signature-256 header against the raw request body."""
+    if not signature or not signature.startswith("sha256="):
+        return False
+    expected = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(f"sha256={expected}", signature)
+
+
+def repos_from_event(event: str, payload: Dict[str, Any], org: str) -> List[str]:
+    """Names of the organization's repositories affected by a webhook event."""
+    if event not in HANDLED_EVENTS:
+        return []
+
+    repo = payload.get("repository") or {}
+    owner = (repo.get("owner") or {}).get("login", "")
+    if not repo.get("name") or owner.lower() != org.lower():
+        return []
+
+    if event == "push":
+        # Only the default branch feeds the cached entry and README
+        default_ref = f"refs/heads/{repo.get('default_branch', '')}"
+        if payload.get("ref") != default_ref:
+            return []
+
+    names = [repo["name"]]
+    # A rename also has to drop the entry cached under the old name
+    old_name = (payload.get("changes") or {}).get("repository", {}).get("name", {}).get("from")
+    if old_name:
+        names.append(old_name)
+    return names
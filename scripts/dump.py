@@ -1,32 +1,281 @@
+import argparse
+import gzip
+import hashlib
+import json
+import os
 import sys
+import tarfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
 from pathlib import Path
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from snapshots import SnapshotStore
 
 
 """
 Simple backup utility for site admins.
 
 Usage:
-    python scripts/dump.py ADMIN_SESSION_COOKIE [BASE_URL]
+    python scripts/dump.py ADMIN_SESSION_COOKIE [BASE_URL] [--workers N] [--full]
+                           [--archive] [--compress none|gzip|zstd]
+                           [--store DIR] [--no-snapshot]
 
 Example:
     python scripts/dump.py abc123 http://localhost:3000
 
 This will:
-  - Call /admin/api/dump/json and save the result as dump.json
+  - Call /admin/api/dump/tables and stream each listed table into
+    ./dump/<table>.ndjson.gz, then write ./dump/manifest.json
   - Call /admin/api/dump/assets and download all listed files
     into an ./assets directory, mirroring their /uploads paths.
+
+Tables are streamed straight to disk a chunk at a time, so memory use does not grow
+with the size of the database.
+
+Each run then records a snapshot in the content-addressed store (see snapshots.py),
+which only adds the files that changed since earlier snapshots.
+
+Assets are downloaded concurrently. Files whose size and mtime already match the
+manifest are skipped, so repeated backups only fetch what changed. Finished files
+are recorded in dump_state.json, so an interrupted run picks up where it stopped.
+
+With --archive, the assets come as a single tar stream from
+/admin/api/dump/assets/archive instead of one request per file. Only files modified
+since the oldest out-of-date one are sent, and each is checked against the SHA-256
+the server puts in its tar header.
 """
 
+CHUNK_SIZE = 1024 * 1024
+STATE_FILE = "dump_state.json"
+# How often the state file is rewritten while downloading
+STATE_SAVE_INTERVAL = 5.0
+PROGRESS_INTERVAL = 1.0
+# pax header record with an archive entry's SHA-256 (see src/lib/server/tar.ts)
+CHECKSUM_KEY = "HACKSU.sha256"
+# tarfile stream modes for --compress
+TAR_MODES = {"none": "r|", "gzip": "r|gz", "zstd": "r|zst"}
+
+
+def dump_table(session: requests.Session, url: str, path: Path) -> dict:
+    """Stream one table's NDJSON into a gzip file. Returns its manifest entry."""
+    tmp_path = path.with_name(f"{path.name}.part")
+    digest = hashlib.sha256()
+    rows = 0
+    with session.get(url, stream=True, timeout=60) as r:
+        r.raise_for_status()
+        # No timestamp or name in the gzip header: an unchanged table compresses to the
+        # same bytes, so snapshots share it
+        with open(tmp_path, "wb") as raw, gzip.GzipFile(
+            filename="", fileobj=raw, mode="wb", mtime=0
+        ) as f:
+            for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
+                f.write(chunk)
+                digest.update(chunk)
+                rows += chunk.count(b"\n")
+    os.replace(tmp_path, path)
+    return {"file": path.name, "rows": rows, "sha256": digest.hexdigest()}
+
+
+def parse_mtime(value: str) -> float:
+    """Epoch seconds of a manifest mtime (ISO 8601, e.g. 2024-01-01T12:00:00.000Z)."""
+    return datetime.fromisoformat(value).timestamp()
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """Write a file via a temp file and rename, so it is never left half-written."""
+    tmp_path = path.with_name(f"{path.name}.part")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def load_state(path: Path) -> dict:
+    """Downloaded files from a previous run: {path: {"size", "mtime"}}."""
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+    except ValueError:
+        print(f"Warning: ignoring unreadable state file {path}", file=sys.stderr)
+        return {}
+
+
+def is_current(item: dict, local_path: Path, state: dict) -> bool:
+    """Whether the local copy of a manifest entry is already up to date."""
+    try:
+        st = local_path.stat()
+    except FileNotFoundError:
+        return False
+    if st.st_size != item.get("size"):
+        return False
+    recorded = state.get(item["path"])
+    if recorded and recorded == {"size": item.get("size"), "mtime": item.get("mtime")}:
+        return True
+    # Downloads get the server's mtime, so a matching one means it was fetched before
+    mtime = item.get("mtime")
+    return bool(mtime) and abs(st.st_mtime - parse_mtime(mtime)) < 1
+
+
+class Progress:
+    """Thread-safe download counters, printed about once a second."""
+
+    def __init__(self, total_files: int, total_bytes: int):
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.files = 0
+        self.bytes = 0
+        self.start = time.monotonic()
+        self._last_print = 0.0
+        self._lock = threading.Lock()
+
+    def add_bytes(self, count: int) -> None:
+        with self._lock:
+            self.bytes += count
+            now = time.monotonic()
+            if now - self._last_print < PROGRESS_INTERVAL:
+                return
+            self._last_print = now
+        self.print()
+
+    def file_done(self) -> None:
+        with self._lock:
+            self.files += 1
+
+    def rate(self) -> float:
+        """Bytes per second since the start."""
+        return self.bytes / max(time.monotonic() - self.start, 1e-6)
+
+    def print(self, end: str = "\r") -> None:
+        print(
+            f"  {self.files}/{self.total_files} files, "
+            f"{self.bytes / 2**20:.1f}/{self.total_bytes / 2**20:.1f} MiB, "
+            f"{self.rate() / 2**20:.1f} MiB/s   ",
+            end=end,
+            flush=True,
+        )
+
+
+def download(
+    session: requests.Session, url: str, local_path: Path, item: dict, progress: Progress
+) -> bool:
+    """
+    Stream one asset into place via a temp file, then give it the manifest mtime.
+    Returns False if the server no longer has it.
+    """
+    local_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = local_path.with_name(f"{local_path.name}.part")
+    try:
+        with session.get(url, stream=True, timeout=60) as r:
+            if r.status_code == 404:
+                return False
+            r.raise_for_status()
+            with open(tmp_path, "wb") as f:
+                for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
+                    f.write(chunk)
+                    progress.add_bytes(len(chunk))
+    except BaseException:
+        # Don't leave partial files for restore.py to upload
+        tmp_path.unlink(missing_ok=True)
+        raise
+    os.replace(tmp_path, local_path)
+    mtime = item.get("mtime")
+    if mtime:
+        timestamp = parse_mtime(mtime)
+        os.utime(local_path, (timestamp, timestamp))
+    return True
+
+
+def save_member(
+    tar: tarfile.TarFile, member: tarfile.TarInfo, local_path: Path, progress: Progress
+):
+    """
+    Write one archive entry into place via a temp file if it matches its checksum.
+    Returns True, or the error.
+    """
+    expected = member.pax_headers.get(CHECKSUM_KEY)
+    if not expected:
+        return ValueError("no checksum in the archive")
+    local_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = local_path.with_name(f"{local_path.name}.part")
+    digest = hashlib.sha256()
+    try:
+        with tar.extractfile(member) as src, open(tmp_path, "wb") as f:
+            while chunk := src.read(CHUNK_SIZE):
+                f.write(chunk)
+                digest.update(chunk)
+                progress.add_bytes(len(chunk))
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    if digest.hexdigest() != expected:
+        tmp_path.unlink()
+        return ValueError("checksum mismatch")
+    os.replace(tmp_path, local_path)
+    os.utime(local_path, (member.mtime, member.mtime))
+    return True
+
+
+def download_archive(
+    session: requests.Session,
+    url: str,
+    out_dir: Path,
+    pending: list,
+    compression: str,
+    progress: Progress,
+):
+    """
+    Fetch the pending assets as one tar stream. Yields (item, result) for each, like
+    the per-file downloads: True once saved, False if the server no longer has it, or
+    the error. Entries the server sends that aren't pending are skipped.
+    """
+    wanted = {item["path"]: item for item in pending}
+    params = {"compression": compression}
+    mtimes = [item.get("mtime") for item in pending]
+    if all(mtimes):
+        # Everything pending was modified at or after the oldest of them
+        params["since"] = min(mtimes, key=parse_mtime)
+
+    error = False
+    try:
+        with session.get(url, params=params, stream=True, timeout=60) as r:
+            r.raise_for_status()
+            with tarfile.open(fileobj=r.raw, mode=TAR_MODES[compression]) as tar:
+                for member in tar:
+                    # Only manifest paths are written, so the archive can't point outside
+                    # the assets directory
+                    item = wanted.pop(member.name, None)
+                    if item is not None and member.isfile():
+                        yield item, save_member(tar, member, out_dir / member.name, progress)
+    except (requests.exceptions.RequestException, tarfile.TarError, OSError) as e:
+        # Whatever didn't arrive failed; run again to fetch just those
+        error = e
+    for item in wanted.values():
+        yield item, error
+
 
 def main() -> int:
-    if len(sys.argv) < 2:
-        print("Usage: dump.py ADMIN_SESSION_COOKIE [BASE_URL]", file=sys.stderr)
-        return 2
+    parser = argparse.ArgumentParser(description="Back up the site database and uploads.")
+    parser.add_argument("admin_cookie", metavar="ADMIN_SESSION_COOKIE")
+    parser.add_argument("base_url", metavar="BASE_URL", nargs="?", default="http://localhost:3000")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent downloads (default 8)")
+    parser.add_argument("--full", action="store_true", help="re-download every asset")
+    parser.add_argument("--archive", action="store_true", help="fetch assets as one tar stream")
+    parser.add_argument(
+        "--compress",
+        choices=TAR_MODES,
+        default="none",
+        help="compression for --archive (default none; uploads are mostly images)",
+    )
+    parser.add_argument("--store", type=Path, help="snapshot store (default scripts/backups)")
+    parser.add_argument("--no-snapshot", action="store_true", help="don't record a snapshot")
+    args = parser.parse_args()
 
-    admin_cookie = sys.argv[1]
-    base_url = sys.argv[2] if len(sys.argv) >= 3 else "http://localhost:3000"
+    admin_cookie = args.admin_cookie
+    base_url = args.base_url
 
     # Add scheme if missing
     if not base_url.startswith(("http://", "https://")):
@@ -35,22 +284,53 @@ def main() -> int:
     # Normalize base URL (no trailing slash)
     base_url = base_url.rstrip("/")
 
+    # One keep-alive connection per worker
     session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=args.workers)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
     session.cookies.set("admin_session", admin_cookie)
 
     here = Path(__file__).resolve().parent
     out_dir = here / "assets"
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    # 1) Fetch full JSON dump
-    json_url = f"{base_url}/admin/api/dump/json"
-    print(f"Fetching JSON dump from {json_url} ...")
-    resp = session.get(json_url)
+    # 1) Stream each table to dump/<table>.ndjson.gz
+    tables_url = f"{base_url}/admin/api/dump/tables"
+    print(f"Fetching table list from {tables_url} ...")
+    resp = session.get(tables_url)
     resp.raise_for_status()
+    tables = resp.json()
+
+    dump_dir = here / "dump"
+    dump_dir.mkdir(parents=True, exist_ok=True)
+    # The manifest goes last, so its presence means every table file is complete
+    manifest_path = dump_dir / "manifest.json"
+    manifest_path.unlink(missing_ok=True)
+    entries = []
+    for table in tables.get("tables", []):
+        name = table["name"]
+        start = time.monotonic()
+        entry = dump_table(session, f"{tables_url}/{name}", dump_dir / f"{name}.ndjson.gz")
+        size = (dump_dir / entry["file"]).stat().st_size
+        print(
+            f"  -> {name}: {entry['rows']} row(s), {size / 1024:.1f} KiB compressed, "
+            f"{time.monotonic() - start:.1f}s"
+        )
+        entries.append({"name": name, **entry})
 
-    dump_path = here / "dump.json"
-    dump_path.write_bytes(resp.content)
-    print(f"Saved JSON dump to {dump_path}")
+    write_atomic(
+        manifest_path,
+        json.dumps(
+            {
+                "generatedAt": tables.get("generatedAt"),
+                "schemaVersion": tables.get("schemaVersion"),
+                "tables": entries,
+            },
+            indent=2,
+        ).encode("utf-8"),
+    )
+    print(f"Saved {len(entries)} table(s) to {dump_dir}")
 
     # 2) Fetch assets manifest
     assets_url = f"{base_url}/admin/api/dump/assets"
@@ -60,41 +340,112 @@ def main() -> int:
     manifest = resp_assets.json()
 
     public_base = manifest.get("publicBase", "/uploads").rstrip("/")
-    files = manifest.get("files", [])
+    files = [item for item in manifest.get("files", []) if item.get("path")]
 
     print(f"Found {len(files)} asset file(s) in manifest")
 
-    downloaded = 0
-    for item in files:
-        rel_path = item.get("path")
-        if not rel_path:
-            continue
-
-        # Construct remote URL and local path
-        remote_url = f"{base_url}{public_base}/{rel_path}"
-        local_path = out_dir / rel_path  # e.g. assets/leadership/abc.png
-        local_path.parent.mkdir(parents=True, exist_ok=True)
-
-        try:
-            print(f"  -> Downloading {remote_url} -> {local_path}")
-            with session.get(remote_url, stream=True) as r:
-                if r.status_code == 404:
-                    print(f"     Skipped (404 not found)")
-                    continue
-                r.raise_for_status()
-                with open(local_path, "wb") as f:
-                    for chunk in r.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
+    state_path = here / STATE_FILE
+    state = {} if args.full else load_state(state_path)
+    pending = [
+        item for item in files if args.full or not is_current(item, out_dir / item["path"], state)
+    ]
+    skipped = len(files) - len(pending)
+    if skipped:
+        print(f"Skipping {skipped} asset file(s) that are already up to date")
+
+    progress = Progress(len(pending), sum(item.get("size", 0) for item in pending))
+    state_lock = threading.Lock()
+    last_save = time.monotonic()
+    downloaded = missing = failed = 0
+
+    def save_state() -> None:
+        with state_lock:
+            data = json.dumps(state, indent=1).encode("utf-8")
+        write_atomic(state_path, data)
+
+    def record(item: dict, result) -> None:
+        """Count a finished download: True, False (404) or the error."""
+        nonlocal downloaded, missing, failed, last_save
+        progress.file_done()
+        if result is True:
             downloaded += 1
-        except Exception as e:  # pragma: no cover - best-effort backup
-            print(f"     Error downloading {remote_url}: {e}", file=sys.stderr)
+            with state_lock:
+                state[item["path"]] = {"size": item.get("size"), "mtime": item.get("mtime")}
+        elif result is False:
+            missing += 1
+            print(f"\n     Skipped {item['path']} (404 not found)")
+        else:
+            failed += 1
+            print(f"\n     Error downloading {item['path']}: {result}", file=sys.stderr)
 
-    print(f"Downloaded {downloaded} asset file(s) into {out_dir}")
+        if time.monotonic() - last_save >= STATE_SAVE_INTERVAL:
+            save_state()
+            last_save = time.monotonic()
+
+    try:
+        if args.archive:
+            if pending:
+                for item, result in download_archive(
+                    session, f"{assets_url}/archive", out_dir, pending, args.compress, progress
+                ):
+                    record(item, result)
+        else:
+            with ThreadPoolExecutor(max_workers=args.workers) as pool:
+                futures = {
+                    pool.submit(
+                        download,
+                        session,
+                        f"{base_url}{public_base}/{item['path']}",
+                        out_dir / item["path"],  # e.g. assets/leadership/abc.png
+                        item,
+                        progress,
+                    ): item
+                    for item in pending
+                }
+                try:
+                    for future in as_completed(futures):
+                        try:
+                            result = future.result()
+                        except Exception as e:  # pragma: no cover - best-effort backup
+                            result = e
+                        record(futures[future], result)
+                except KeyboardInterrupt:
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    raise
+    except KeyboardInterrupt:
+        print("\nInterrupted; saving progress (run again to resume)", file=sys.stderr)
+        save_state()
+        return 130
+
+    save_state()
+    progress.print(end="\n")
+    elapsed = time.monotonic() - progress.start
+    print(
+        f"Downloaded {downloaded} asset file(s) into {out_dir} in {elapsed:.1f}s "
+        f"({skipped} up to date, {missing} missing, {failed} failed)"
+    )
+    if failed:
+        # A snapshot would silently miss or keep stale copies of those files
+        print("Not recording a snapshot because some downloads failed", file=sys.stderr)
+        return 1
+
+    # 3) Record a snapshot of the tables and every asset we now have
+    if not args.no_snapshot:
+        store = SnapshotStore(args.store or here / "backups", workers=args.workers)
+        assets = {
+            item["path"]: {**item, "path": out_dir / item["path"]}
+            for item in files
+            if (out_dir / item["path"]).is_file()
+        }
+        start = time.monotonic()
+        snapshot = store.create(entries, dump_dir, assets, source=base_url)
+        print(
+            f"Recorded snapshot {snapshot['id']} in {store.root} "
+            f"({snapshot['newBytes'] / 2**20:.1f} MiB new, {time.monotonic() - start:.1f}s)"
+        )
     print("Done.")
     return 0
 
 
 if __name__ == "__main__":
     raise SystemExit(main())
-
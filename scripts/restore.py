@@ -1,115 +1,387 @@
+import argparse
+import gzip
+import hashlib
 import json
+import random
 import sys
+import tarfile
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import chain
 from pathlib import Path
+from urllib.parse import urlencode
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from snapshots import SnapshotStore, hash_file
 
 """
 Restore utility for site admins.
 
 Usage:
-    python scripts/restore.py ADMIN_SESSION_COOKIE [BASE_URL]
+    python scripts/restore.py ADMIN_SESSION_COOKIE [BASE_URL] [--workers N] [--fresh]
+                              [--batch-size N] [--archive] [--compress none|gzip|zstd]
+                              [--snapshot ID] [--store DIR]
 
 Example:
     python scripts/restore.py abc123 http://localhost:3000
 
 This expects that you have previously run `dump.py` so that:
-  - `scripts/dump.json` exists (full JSON dump)
+  - `scripts/dump/` exists with manifest.json and a <table>.ndjson.gz per table
+    (or `scripts/dump.json`, the single-document format of older dumps)
   - `scripts/assets/` exists with files mirroring `/uploads/**` paths
 
 It will:
-  - POST dump.json to /admin/api/dump/json to restore DB contents
-  - Walk `assets/` and POST each file to /admin/api/dump/assets
+  - POST each file under `assets/` to /admin/api/dump/assets, a few at a time
+  - Check every table file against the manifest, then POST each table to
+    /admin/api/dump/tables/<table> in batches of at most --batch-size rows, then
+    replace every table in one transaction once they are all in
+
+With --snapshot, the tables and uploads of that snapshot (see snapshots.py) are
+restored instead, after checking its objects against their hashes.
+
+Uploaded files are appended to restore.log (restore-<snapshot id>.log for a
+snapshot). Files listed there, or already on the
+server with the same size, are skipped, so an interrupted restore is resumed by
+running it again.
+
+With --archive, assets are sent as tar archives of up to 64 MiB to
+/admin/api/dump/assets/archive instead of one request per file. Every entry carries
+its SHA-256, and the server only keeps entries that match it.
 """
 
+CHUNK_SIZE = 1024 * 1024
+# Rows per restore batch are also capped by size, and by the server at 1000
+BATCH_BYTES = 1024 * 1024
+MAX_ATTEMPTS = 5
+# Connect and read timeouts; the read timeout covers the server saving the file
+TIMEOUT = (10, 300)
+# Limits per archive with --archive, so a retry resends a bounded amount
+ARCHIVE_BYTES = 64 * 1024 * 1024
+ARCHIVE_FILES = 1000
+# pax header record with an archive entry's SHA-256 (see src/lib/server/tar.ts)
+CHECKSUM_KEY = "HACKSU.sha256"
+# tarfile stream modes for --compress
+TAR_MODES = {"none": "w|", "gzip": "w|gz", "zstd": "w|zst"}
 
-def main() -> int:
-    if len(sys.argv) < 2:
-        print("Usage: restore.py ADMIN_SESSION_COOKIE [BASE_URL]", file=sys.stderr)
-        return 2
 
-    admin_cookie = sys.argv[1]
-    base_url = sys.argv[2] if len(sys.argv) >= 3 else "http://localhost:3000"
+class AuthError(Exception):
+    """The server redirected us, most likely to the login page."""
 
-    # Add scheme if missing
-    if not base_url.startswith(("http://", "https://")):
-        base_url = f"https://{base_url}"
 
-    # Normalize base URL (no trailing slash)
-    base_url = base_url.rstrip("/")
+class RequestRejected(RuntimeError):
+    """A 4xx response, with its JSON body if it had one."""
 
-    session = requests.Session()
-    session.cookies.set("admin_session", admin_cookie)
+    def __init__(self, message: str, body: dict):
+        super().__init__(message)
+        self.body = body
 
-    here = Path(__file__).resolve().parent
-    dump_path = here / "dump.json"
-    assets_dir = here / "assets"
 
-    if not dump_path.is_file():
-        print(f"Error: dump.json not found at {dump_path}", file=sys.stderr)
-        return 1
+def json_body(r: requests.Response) -> dict:
+    """A response's JSON object, or {} if it has none."""
+    try:
+        body = r.json()
+    except ValueError:
+        return {}
+    return body if isinstance(body, dict) else {}
 
-    if not assets_dir.is_dir():
-        print(f"Warning: assets directory not found at {assets_dir} (continuing without assets)", file=sys.stderr)
 
-    # IMPORTANT: Upload assets FIRST, then restore JSON dump
-    # This is because the JSON restore wipes admin sessions, which would invalidate our cookie
-    
-    # 1) Restore assets FIRST (before JSON dump wipes admin sessions)
-    if assets_dir.is_dir():
-        assets_url = f"{base_url}/admin/api/dump/assets"
-        print(f"Restoring assets from {assets_dir} to {assets_url} ...")
+def post_with_retry(session: requests.Session, url: str, label: str, make_body) -> dict:
+    """
+    POST a body from `make_body()` (called again for each attempt, returning
+    (data, content_type)), retrying connection errors, timeouts, 429s and 5xx with
+    exponential backoff. Returns the JSON response; raises AuthError on a redirect.
+    """
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        data, content_type = make_body()
+        try:
+            r = session.post(
+                url,
+                data=data,
+                headers={"Content-Type": content_type},
+                timeout=TIMEOUT,
+                allow_redirects=False,
+            )
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            error = str(e)
+        else:
+            if r.is_redirect:
+                raise AuthError(
+                    f"got redirected (auth failure?). Location: "
+                    f"{r.headers.get('Location')}, status: {r.status_code}"
+                )
+            if r.status_code == 200:
+                return r.json()
+            error = f"{r.status_code} {r.text}"
+            if r.status_code != 429 and r.status_code < 500:
+                raise RequestRejected(error, json_body(r))
 
-        # Open log file for tracking uploaded files
-        log_file = here / "restore.log"
-        log_fp = log_file.open("a", encoding="utf-8")
+        if attempt == MAX_ATTEMPTS:
+            raise RuntimeError(f"{error} (gave up after {MAX_ATTEMPTS} attempts)")
+        delay = min(2 ** (attempt - 1), 30) * random.uniform(0.5, 1.5)
+        print(f"     Retrying {label} in {delay:.1f}s: {error}", file=sys.stderr)
+        time.sleep(delay)
+
+
+def upload(session: requests.Session, url: str, rel_path: str, path: Path) -> dict:
+    """
+    Upload one asset as the raw request body, which the server streams to disk.
+    Returns it as written, like upload_archive.
+    """
+    with path.open("rb") as f:
+
+        def make_body():
+            # Each attempt resends from the start; requests streams the open file
+            f.seek(0)
+            return f, "application/octet-stream"
+
+        post_with_retry(session, f"{url}?{urlencode({'path': rel_path})}", rel_path, make_body)
+    return {"written": [rel_path], "failed": []}
 
-        # Walk all files under assets_dir
-        files_restored = 0
-        for path in assets_dir.rglob("*"):
-            if not path.is_file():
-                continue
 
-            rel_path = path.relative_to(assets_dir).as_posix()  # e.g. leadership/abc.png
-            print(f"  -> Uploading {rel_path} ...")
+def archive_batches(pending: dict):
+    """Split {upload path: file} into archives of bounded size and file count."""
+    batch, size = {}, 0
+    for rel_path, path in pending.items():
+        file_size = path.stat().st_size
+        if batch and (len(batch) >= ARCHIVE_FILES or size + file_size > ARCHIVE_BYTES):
+            yield batch
+            batch, size = {}, 0
+        batch[rel_path] = path
+        size += file_size
+    if batch:
+        yield batch
 
+
+def upload_archive(session: requests.Session, url: str, batch: dict, compression: str) -> dict:
+    """
+    Upload a batch of assets as one tar archive, built in a temp file so retries can
+    resend it. Returns the server's {"written": [paths], "failed": [{path, error}]}.
+    """
+    with tempfile.TemporaryFile() as f:
+        with tarfile.open(fileobj=f, mode=TAR_MODES[compression], format=tarfile.PAX_FORMAT) as tar:
+            for rel_path, path in batch.items():
+                # Built by hand rather than with gettarinfo(), which would turn snapshot
+                # objects shared by several paths into hard link entries
+                st = path.stat()
+                info = tarfile.TarInfo(rel_path)
+                info.size = st.st_size
+                info.mtime = st.st_mtime
+                info.mode = 0o644
+                info.pax_headers = {CHECKSUM_KEY: hash_file(path)}
+                with path.open("rb") as src:
+                    tar.addfile(info, src)
+
+        def make_body():
+            f.seek(0)
+            return f, "application/x-tar"
+
+        return post_with_retry(
+            session,
+            f"{url}?compression={compression}",
+            f"an archive of {len(batch)} file(s)",
+            make_body,
+        )
+
+
+def read_log(log_file: Path) -> set:
+    """Paths uploaded by earlier runs."""
+    try:
+        return set(log_file.read_text(encoding="utf-8").splitlines())
+    except FileNotFoundError:
+        return set()
+
+
+def server_sizes(session: requests.Session, assets_url: str) -> dict:
+    """{path: size} of the uploads already on the server, or {} if it can't be listed."""
+    try:
+        r = session.get(assets_url, timeout=TIMEOUT, allow_redirects=False)
+        r.raise_for_status()
+        return {item["path"]: item.get("size") for item in r.json().get("files", [])}
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"Warning: could not list assets on the server ({e})", file=sys.stderr)
+        return {}
+
+
+def local_assets(assets_dir: Path) -> dict:
+    """{upload path: file} for a dump.py assets directory."""
+    # Skip dump.py's in-progress downloads
+    return {
+        path.relative_to(assets_dir).as_posix(): path  # e.g. leadership/abc.png
+        for path in sorted(assets_dir.rglob("*"))
+        if path.is_file() and path.suffix != ".part"
+    }
+
+
+def restore_assets(
+    session: requests.Session, assets_url: str, local: dict, log_file: Path, args
+) -> int:
+    """
+    Upload every asset ({upload path: file}) not restored yet. Returns 0, or 1 on an
+    auth failure.
+    """
+    if args.fresh:
+        done, on_server = set(), {}
+    else:
+        done, on_server = read_log(log_file), server_sizes(session, assets_url)
+    pending = {
+        rel_path: path
+        for rel_path, path in local.items()
+        if rel_path not in done and on_server.get(rel_path) != path.stat().st_size
+    }
+    print(
+        f"{len(local)} asset file(s) found, {len(local) - len(pending)} already restored, "
+        f"uploading {len(pending)} with {args.workers} worker(s)"
+    )
+
+    files_restored = failed = 0
+    start = time.monotonic()
+    with log_file.open("a", encoding="utf-8") as log_fp, ThreadPoolExecutor(args.workers) as pool:
+        if args.archive:
+            futures = {
+                pool.submit(
+                    upload_archive, session, f"{assets_url}/archive", batch, args.compress
+                ): list(batch)
+                for batch in archive_batches(pending)
+            }
+        else:
+            futures = {
+                pool.submit(upload, session, assets_url, rel_path, path): [rel_path]
+                for rel_path, path in pending.items()
+            }
+        for future in as_completed(futures):
+            rel_paths = futures[future]
+            label = f"an archive of {len(rel_paths)} file(s)" if args.archive else rel_paths[0]
             try:
-                with path.open("rb") as f:
-                    files = {"file": (path.name, f)}
-                    data = {"path": rel_path}
-                    r = session.post(assets_url, data=data, files=files, timeout=30)
-
-                # If we get redirected here, likely lost auth – stop rather than continuing silently
-                if r.is_redirect:
-                    print(
-                        f"     Error uploading {rel_path}: got redirected (auth failure?). "
-                        f"Final URL: {r.url}, status: {r.status_code}",
-                        file=sys.stderr,
-                    )
-                    log_fp.close()
-                    return 1
-
-                if r.status_code == 200:
-                    # Success - log it
-                    log_fp.write(f"{rel_path}\n")
-                    log_fp.flush()
-                    files_restored += 1
-                else:
-                    print(f"     Error uploading {rel_path}: {r.status_code} {r.text}", file=sys.stderr)
-            except requests.exceptions.RequestException as e:
-                print(f"     Error uploading {rel_path}: {e}", file=sys.stderr)
-                # Continue with next file even if this one failed
-
-        log_fp.close()
-        print(f"Restored {files_restored} asset file(s) from {assets_dir}")
-        print(f"Log saved to {log_file} (use restore_resume.py to continue if interrupted)")
-
-    # 2) Restore JSON dump LAST (this wipes admin sessions, so do it after assets)
+                result = future.result()
+            except AuthError as e:
+                # Lost auth: stop rather than failing every remaining file
+                print(f"     Error uploading {label}: {e}", file=sys.stderr)
+                pool.shutdown(wait=True, cancel_futures=True)
+                return 1
+            except RequestRejected as e:
+                # A rejected archive may have been written partway; log what made it,
+                # so only the rest is sent again next run
+                written = e.body.get("written", [])
+                reasons = {item["path"]: item["error"] for item in e.body.get("failed", [])}
+                error = e.body.get("error") or str(e)
+                result = {
+                    "written": written,
+                    "failed": [
+                        {"path": rel_path, "error": reasons.get(rel_path, error)}
+                        for rel_path in rel_paths
+                        if rel_path not in written
+                    ],
+                }
+            except Exception as e:
+                failed += len(rel_paths)
+                print(f"     Error uploading {label}: {e}", file=sys.stderr)
+                continue
+
+            # The server drops archive entries that don't match their checksum
+            for item in result["failed"]:
+                failed += 1
+                print(f"     Error uploading {item['path']}: {item['error']}", file=sys.stderr)
+            for rel_path in result["written"]:
+                log_fp.write(f"{rel_path}\n")
+            log_fp.flush()
+            files_restored += len(result["written"])
+            print(f"  -> [{files_restored + failed}/{len(pending)}] Uploaded {label}")
+
+    elapsed = time.monotonic() - start
+    print(f"Restored {files_restored} asset file(s) in {elapsed:.1f}s")
+    if failed:
+        print(f"{failed} file(s) failed; run again to retry just those", file=sys.stderr)
+    print(f"Log saved to {log_file}")
+    return 0
+
+
+def iter_batches(path: Path, max_rows: int):
+    """NDJSON lines of a gzipped table file, grouped into bounded batches."""
+    batch, size = [], 0
+    with gzip.open(path, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            if batch and (len(batch) >= max_rows or size + len(line) > BATCH_BYTES):
+                yield batch
+                batch, size = [], 0
+            batch.append(line)
+            size += len(line)
+    if batch:
+        yield batch
+
+
+def check_tables(tables: list, path_for) -> bool:
+    """Whether every table file is present and matches its manifest checksum."""
+    ok = True
+    for table in tables:
+        path = path_for(table)
+        digest = hashlib.sha256()
+        try:
+            with gzip.open(path, "rb") as f:
+                while chunk := f.read(CHUNK_SIZE):
+                    digest.update(chunk)
+        except (OSError, EOFError) as e:
+            print(f"Error: cannot read {path}: {e}", file=sys.stderr)
+            ok = False
+            continue
+        if digest.hexdigest() != table["sha256"]:
+            print(f"Error: {path} does not match the checksum of {table['name']}", file=sys.stderr)
+            ok = False
+    return ok
+
+
+def restore_tables(
+    session: requests.Session, tables_url: str, tables: list, path_for, args
+) -> int:
+    """
+    Replace each table (manifest entries, read from `path_for(entry)`) with its dump,
+    in bounded batches. Returns 0 or 1.
+    """
+    print(f"Checking {len(tables)} table file(s) ...")
+    if not check_tables(tables, path_for):
+        return 1
+
+    # Every table is staged first, then they are all replaced in one transaction
+    for table in tables:
+        name, path = table["name"], path_for(table)
+        url = f"{tables_url}/{name}"
+        staged = 0
+        start = time.monotonic()
+        # The first batch starts a fresh staging copy; an empty table still sends one
+        batches = iter_batches(path, args.batch_size)
+        for i, batch in enumerate(chain(batches, [[]])):
+            if i > 0 and not batch:
+                break
+            params = "?stage=1&replace=1" if i == 0 else "?stage=1"
+            result = post_with_retry(
+                session,
+                f"{url}{params}",
+                f"{name} batch {i + 1}",
+                lambda: (b"".join(batch), "application/x-ndjson"),
+            )
+            staged += result["staged"]
+            print(f"  -> {name}: {staged}/{table['rows']} row(s) staged", end="\r", flush=True)
+        print(f"  -> {name}: {staged} row(s) staged in {time.monotonic() - start:.1f}s")
+
+    # This also replaces admin sessions, which ends ours, so nothing is sent after it
+    print("Replacing tables with the staged copies ...")
+    body = json.dumps({"commit": [table["name"] for table in tables]}).encode("utf-8")
+    result = post_with_retry(session, tables_url, "commit", lambda: (body, "application/json"))
+    for name, inserted in result["inserted"].items():
+        print(f"  -> {name}: {inserted} row(s) restored")
+    return 0
+
+
+def restore_json(session: requests.Session, json_url: str, dump_path: Path) -> int:
+    """Restore a single-document dump.json written by older versions of dump.py."""
     print(f"\nLoading JSON dump from {dump_path} ...")
     with dump_path.open("rb") as f:
         dump_bytes = f.read()
 
-    json_url = f"{base_url}/admin/api/dump/json"
     print(f"Posting JSON dump to {json_url} ...")
     print("  (Note: This will wipe admin sessions, so assets must be uploaded first)")
     resp = session.post(json_url, data=dump_bytes, headers={"Content-Type": "application/json"})
@@ -122,7 +394,7 @@ def main() -> int:
             file=sys.stderr,
         )
         return 1
-    
+
     try:
         resp.raise_for_status()
     except Exception as e:  # pragma: no cover
@@ -136,6 +408,121 @@ def main() -> int:
         print("DB restore response:", json.dumps(result, indent=2))
     except Exception:
         print("DB restore completed (non-JSON response)")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Restore the site database and uploads.")
+    parser.add_argument("admin_cookie", metavar="ADMIN_SESSION_COOKIE")
+    parser.add_argument("base_url", metavar="BASE_URL", nargs="?", default="http://localhost:3000")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent uploads (default 4)")
+    parser.add_argument(
+        "--fresh", action="store_true", help="upload every asset, ignoring restore.log"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=500, help="rows per table batch (default 500, max 1000)"
+    )
+    parser.add_argument("--archive", action="store_true", help="send assets as tar archives")
+    parser.add_argument(
+        "--compress",
+        choices=TAR_MODES,
+        default="none",
+        help="compression for --archive (default none; uploads are mostly images)",
+    )
+    parser.add_argument("--snapshot", help='snapshot id (or unique prefix, or "latest")')
+    parser.add_argument("--store", type=Path, help="snapshot store (default scripts/backups)")
+    args = parser.parse_args()
+    if not 1 <= args.batch_size <= 1000:
+        parser.error("--batch-size must be between 1 and 1000")
+
+    admin_cookie = args.admin_cookie
+    base_url = args.base_url
+
+    # Add scheme if missing
+    if not base_url.startswith(("http://", "https://")):
+        base_url = f"https://{base_url}"
+
+    # Normalize base URL (no trailing slash)
+    base_url = base_url.rstrip("/")
+
+    # One keep-alive connection per worker
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=args.workers)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.cookies.set("admin_session", admin_cookie)
+
+    here = Path(__file__).resolve().parent
+    tables_url = f"{base_url}/admin/api/dump/tables"
+    assets_url = f"{base_url}/admin/api/dump/assets"
+
+    if args.snapshot:
+        store = SnapshotStore(args.store or here / "backups", workers=args.workers)
+        try:
+            snapshot = store.load(args.snapshot)
+        except KeyError as e:
+            print(f"Error: {e.args[0]}", file=sys.stderr)
+            return 1
+        print(f"Verifying snapshot {snapshot['id']} ...")
+        problems = store.verify(snapshot)
+        if problems:
+            for problem in problems:
+                print(f"Error: {problem}", file=sys.stderr)
+            return 1
+        tables = snapshot["tables"]
+
+        def path_for(table):
+            return store.object_path(table["object"])
+
+        assets = {
+            rel_path: store.object_path(item["object"])
+            for rel_path, item in snapshot["assets"].items()
+        }
+        log_file = here / f"restore-{snapshot['id']}.log"
+    else:
+        dump_dir = here / "dump"
+        dump_path = here / "dump.json"
+        assets_dir = here / "assets"
+
+        tables = None
+        if (dump_dir / "manifest.json").is_file():
+            manifest = json.loads((dump_dir / "manifest.json").read_text(encoding="utf-8"))
+            tables = manifest["tables"]
+
+            def path_for(table):
+                return dump_dir / table["file"]
+
+        elif not dump_path.is_file():
+            print(f"Error: neither {dump_dir}/manifest.json nor {dump_path} found", file=sys.stderr)
+            return 1
+
+        if assets_dir.is_dir():
+            assets = local_assets(assets_dir)
+        else:
+            print(f"Warning: assets directory not found at {assets_dir} (continuing without assets)", file=sys.stderr)
+            assets = None
+        log_file = here / "restore.log"
+
+    # IMPORTANT: Upload assets FIRST, then restore the database
+    # This is because the restore wipes admin sessions, which would invalidate our cookie
+
+    # 1) Restore assets FIRST (before the database restore wipes admin sessions)
+    if assets is not None:
+        print(f"Restoring assets to {assets_url} ...")
+        if restore_assets(session, assets_url, assets, log_file, args):
+            return 1
+
+    # 2) Restore the database LAST (this wipes admin sessions, so do it after assets)
+    try:
+        if tables is not None:
+            print(f"\nRestoring tables to {tables_url} ...")
+            if restore_tables(session, tables_url, tables, path_for, args):
+                return 1
+        elif restore_json(session, f"{base_url}/admin/api/dump/json", dump_path):
+            return 1
+    except (AuthError, RuntimeError, requests.exceptions.RequestException) as e:
+        print(f"Error restoring database: {e}", file=sys.stderr)
+        return 1
 
     print("\nRestore completed.")
     return 0
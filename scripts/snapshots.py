@@ -0,0 +1,332 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from itertools import count
+from pathlib import Path
+
+"""
+Content-addressed snapshot store for backups.
+
+Usage:
+    python scripts/snapshots.py list
+    python scripts/snapshots.py diff [OLD] [NEW]
+    python scripts/snapshots.py verify [SNAPSHOT]
+    python scripts/snapshots.py prune --keep N
+
+Every file (table dumps and uploads) is stored once under
+backups/objects/<first two hex digits>/<sha256>, and each `dump.py` run writes a
+small backups/snapshots/<id>.json that maps table names and upload paths to object
+hashes. Unchanged files are shared between snapshots, so a new snapshot only costs
+the bytes that changed. `restore.py --snapshot ID` restores any snapshot.
+
+Objects are hard links to the files dump.py downloaded when the filesystem allows
+it, so keeping the ./assets mirror next to the store costs nothing extra. dump.py
+only ever replaces files there, never edits them in place; `verify` re-hashes
+objects to catch anything that did.
+
+Snapshot ids are UTC timestamps (20240101T120000Z); commands accept any unique
+prefix of one, or "latest".
+"""
+
+
+def hash_file(path: Path) -> str:
+    """Hex SHA-256 of a file's contents."""
+    with path.open("rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def write_json_atomic(path: Path, data) -> None:
+    tmp_path = path.with_name(f"{path.name}.part")
+    tmp_path.write_text(json.dumps(data, indent=1, sort_keys=True), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def write_json_new(path: Path, data) -> bool:
+    """Like write_json_atomic, but returns False rather than replace an existing file."""
+    text = json.dumps(data, indent=1, sort_keys=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.part")
+    tmp_path.write_text(text, encoding="utf-8")
+    try:
+        # Linking into place fails if the file exists, unlike a rename
+        os.link(tmp_path, path)
+    except FileExistsError:
+        return False
+    except OSError:
+        # No hard links here; exclusive creation doesn't overwrite either
+        try:
+            with path.open("x", encoding="utf-8") as f:
+                f.write(text)
+        except FileExistsError:
+            return False
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return True
+
+
+class SnapshotStore:
+    """Objects and snapshot manifests under one directory."""
+
+    def __init__(self, root: Path, workers: int = 8):
+        self.root = root
+        self.objects_dir = root / "objects"
+        self.snapshots_dir = root / "snapshots"
+        # (size, mtime, inode) -> hash per path, so unchanged files aren't re-read
+        self.hash_cache_path = root / "hash_cache.json"
+        self.workers = workers
+
+    def object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / digest
+
+    def has_object(self, digest: str) -> bool:
+        return self.object_path(digest).is_file()
+
+    def add_object(self, path: Path, digest: str) -> bool:
+        """Store a file under its hash. Returns False if it was already stored."""
+        target = self.object_path(digest)
+        if target.is_file():
+            return False
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(f"{digest}.part")
+        tmp_path.unlink(missing_ok=True)
+        try:
+            os.link(path, tmp_path)
+        except OSError:
+            # Another filesystem, or one without hard links
+            shutil.copyfile(path, tmp_path)
+        os.replace(tmp_path, target)
+        return True
+
+    def hash_files(self, paths: dict) -> dict:
+        """{key: sha256} for {key: path}, hashed in parallel and cached by stat."""
+        try:
+            cache = json.loads(self.hash_cache_path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            cache = {}
+
+        stats = {key: path.stat() for key, path in paths.items()}
+        signatures = {
+            key: [st.st_size, st.st_mtime_ns, st.st_ino] for key, st in stats.items()
+        }
+        hashes = {
+            key: cache[key][1]
+            for key, signature in signatures.items()
+            if key in cache and cache[key][0] == signature
+        }
+        stale = [key for key in paths if key not in hashes]
+        # hashlib releases the GIL while hashing, so threads hash in parallel
+        with ThreadPoolExecutor(self.workers) as pool:
+            for key, digest in zip(stale, pool.map(hash_file, (paths[key] for key in stale))):
+                hashes[key] = digest
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        write_json_atomic(
+            self.hash_cache_path, {key: [signatures[key], hashes[key]] for key in paths}
+        )
+        return hashes
+
+    def create(self, tables: list, tables_dir: Path, assets: dict, source: str) -> dict:
+        """
+        Snapshot table files (manifest entries from dump.py, read from tables_dir)
+        and assets ({upload path: {"path", "size", "mtime"}}). Returns the snapshot.
+        """
+        self.snapshots_dir.mkdir(parents=True, exist_ok=True)
+        table_paths = {f"table:{table['name']}": tables_dir / table["file"] for table in tables}
+        asset_paths = {f"asset:{rel_path}": item["path"] for rel_path, item in assets.items()}
+        hashes = self.hash_files({**table_paths, **asset_paths})
+
+        new_bytes = 0
+        for key, path in {**table_paths, **asset_paths}.items():
+            if self.add_object(path, hashes[key]):
+                new_bytes += path.stat().st_size
+
+        now = datetime.now(timezone.utc)
+        snapshot = {
+            "createdAt": now.isoformat(timespec="seconds"),
+            "source": source,
+            "newBytes": new_bytes,
+            "tables": [
+                {**table, "object": hashes[f"table:{table['name']}"]} for table in tables
+            ],
+            "assets": {
+                rel_path: {
+                    "object": hashes[f"asset:{rel_path}"],
+                    "size": item["size"],
+                    "mtime": item.get("mtime"),
+                }
+                for rel_path, item in sorted(assets.items())
+            },
+        }
+        # Ids have one-second resolution, so a second snapshot within the same second
+        # gets a counter suffix (which still sorts after it) instead of replacing it
+        base_id = now.strftime("%Y%m%dT%H%M%SZ")
+        for n in count():
+            snapshot["id"] = f"{base_id}-{n:02d}" if n else base_id
+            if write_json_new(self.snapshots_dir / f"{snapshot['id']}.json", snapshot):
+                return snapshot
+
+    def ids(self) -> list:
+        """Snapshot ids, oldest first."""
+        if not self.snapshots_dir.is_dir():
+            return []
+        return sorted(path.stem for path in self.snapshots_dir.glob("*.json"))
+
+    def resolve(self, ref: str) -> str:
+        """The snapshot id for "latest" or a unique id prefix."""
+        ids = self.ids()
+        if ref == "latest":
+            if not ids:
+                raise KeyError("no snapshots yet")
+            return ids[-1]
+        if ref in ids:
+            # Otherwise an id would be ambiguous with its suffixed siblings
+            return ref
+        matches = [snapshot_id for snapshot_id in ids if snapshot_id.startswith(ref)]
+        if len(matches) != 1:
+            raise KeyError(f"{ref!r} matches {len(matches)} snapshots")
+        return matches[0]
+
+    def load(self, ref: str) -> dict:
+        path = self.snapshots_dir / f"{self.resolve(ref)}.json"
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def referenced_objects(self, snapshot: dict) -> set:
+        """Hashes of every object a snapshot points at."""
+        objects = {table["object"] for table in snapshot["tables"]}
+        objects.update(item["object"] for item in snapshot["assets"].values())
+        return objects
+
+    def verify(self, snapshot: dict) -> list:
+        """Problems with a snapshot's objects: missing, or contents not matching the hash."""
+        objects = sorted(self.referenced_objects(snapshot))
+        missing = [digest for digest in objects if not self.has_object(digest)]
+        present = [digest for digest in objects if self.has_object(digest)]
+        with ThreadPoolExecutor(self.workers) as pool:
+            actual = pool.map(lambda digest: hash_file(self.object_path(digest)), present)
+            corrupt = [digest for digest, found in zip(present, actual) if found != digest]
+        return [f"missing object {digest}" for digest in missing] + [
+            f"corrupt object {digest}" for digest in corrupt
+        ]
+
+    def prune(self, keep: int) -> tuple:
+        """
+        Delete all but the newest `keep` snapshots, then every object no remaining
+        snapshot points at. Returns (snapshots removed, objects removed, bytes freed).
+        """
+        ids = self.ids()
+        removed = ids[: max(len(ids) - keep, 0)]
+        for snapshot_id in removed:
+            (self.snapshots_dir / f"{snapshot_id}.json").unlink()
+
+        live = set()
+        for snapshot_id in self.ids():
+            live.update(self.referenced_objects(self.load(snapshot_id)))
+        objects_removed = bytes_freed = 0
+        if self.objects_dir.is_dir():
+            for path in self.objects_dir.glob("*/*"):
+                if path.name not in live:
+                    bytes_freed += path.stat().st_size
+                    path.unlink()
+                    objects_removed += 1
+        return len(removed), objects_removed, bytes_freed
+
+
+def diff(old: dict, new: dict) -> dict:
+    """Tables and upload paths added, removed or changed between two snapshots."""
+    old_tables = {table["name"]: table for table in old["tables"]}
+    new_tables = {table["name"]: table for table in new["tables"]}
+    old_assets, new_assets = old["assets"], new["assets"]
+    return {
+        "tables": sorted(
+            name
+            for name in old_tables.keys() | new_tables.keys()
+            if old_tables.get(name, {}).get("object") != new_tables.get(name, {}).get("object")
+        ),
+        "added": sorted(new_assets.keys() - old_assets.keys()),
+        "removed": sorted(old_assets.keys() - new_assets.keys()),
+        "changed": sorted(
+            path
+            for path in old_assets.keys() & new_assets.keys()
+            if old_assets[path]["object"] != new_assets[path]["object"]
+        ),
+    }
+
+
+def main() -> int:
+    here = Path(__file__).resolve().parent
+    parser = argparse.ArgumentParser(description="Manage backup snapshots.")
+    parser.add_argument("--store", type=Path, default=here / "backups", help="snapshot store")
+    parser.add_argument("--workers", type=int, default=8, help="parallel hashing (default 8)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="list snapshots, oldest first")
+    diff_parser = commands.add_parser("diff", help="compare two snapshots")
+    diff_parser.add_argument("old", nargs="?", help="defaults to the one before NEW")
+    diff_parser.add_argument("new", nargs="?", default="latest")
+    verify_parser = commands.add_parser("verify", help="re-hash a snapshot's objects")
+    verify_parser.add_argument("snapshot", nargs="?", help="defaults to every snapshot")
+    prune_parser = commands.add_parser("prune", help="delete old snapshots and unused objects")
+    prune_parser.add_argument("--keep", type=int, required=True, help="newest snapshots to keep")
+    args = parser.parse_args()
+    if args.command == "prune" and args.keep < 1:
+        parser.error("--keep must be at least 1")
+
+    store = SnapshotStore(args.store, args.workers)
+    try:
+        if args.command == "list":
+            for snapshot_id in store.ids():
+                snapshot = store.load(snapshot_id)
+                size = sum(item["size"] for item in snapshot["assets"].values())
+                rows = sum(table["rows"] for table in snapshot["tables"])
+                print(
+                    f"{snapshot_id}  {rows} row(s) in {len(snapshot['tables'])} table(s), "
+                    f"{len(snapshot['assets'])} upload(s), {size / 2**20:.1f} MiB, "
+                    f"{snapshot.get('newBytes', 0) / 2**20:.1f} MiB new"
+                )
+
+        elif args.command == "diff":
+            new_id = store.resolve(args.new)
+            if args.old:
+                old_id = store.resolve(args.old)
+            else:
+                ids = store.ids()
+                if ids.index(new_id) == 0:
+                    print(f"{new_id} is the first snapshot", file=sys.stderr)
+                    return 1
+                old_id = ids[ids.index(new_id) - 1]
+            changes = diff(store.load(old_id), store.load(new_id))
+            print(f"{old_id} -> {new_id}")
+            for name in changes["tables"]:
+                print(f"  table {name} changed")
+            for kind, sign in (("added", "+"), ("removed", "-"), ("changed", "~")):
+                for path in changes[kind]:
+                    print(f"  {sign} {path}")
+
+        elif args.command == "verify":
+            refs = [args.snapshot] if args.snapshot else store.ids()
+            failed = False
+            for ref in refs:
+                problems = store.verify(store.load(ref))
+                print(f"{store.resolve(ref)}: {'ok' if not problems else 'FAILED'}")
+                for problem in problems:
+                    print(f"  {problem}", file=sys.stderr)
+                failed = failed or bool(problems)
+            return 1 if failed else 0
+
+        elif args.command == "prune":
+            snapshots, objects, freed = store.prune(args.keep)
+            print(
+                f"Removed {snapshots} snapshot(s) and {objects} object(s), "
+                f"freeing {freed / 2**20:.1f} MiB"
+            )
+    except KeyError as e:
+        print(f"Error: {e.args[0]}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,226 @@
+import { readdir, stat } from 'fs/promises';
+import { join, relative } from 'path';
+import { asc, count, getTableColumns, getTableName, gt, sql } from 'drizzle-orm';
+import type { PgTable } from 'drizzle-orm/pg-core';
+import { db } from '$lib/server/db';
+import {
+	adminSessions,
+	location,
+	leadership,
+	meetings,
+	redirects,
+	notes,
+	information,
+	lessonIcons
+} from '$lib/server/db/schema';
+
+interface DumpTable {
+	table: PgTable;
+	// Primary key property; rows are streamed in its order, so a large table is never
+	// loaded whole
+	key: string;
+	// Timestamp columns, sent as ISO strings and turned back into Dates on restore
+	dateFields: string[];
+}
+
+/**
+ * Tables included in backups, in restore order (a table referenced by another comes
+ * first, and deletes go in reverse). Admin sessions go last: replacing them ends the
+ * session doing the restore.
+ */
+export const DUMP_TABLES: Record<string, DumpTable> = {
+	location: { table: location, key: 'id', dateFields: ['createdAt', 'updatedAt'] },
+	leadership: { table: leadership, key: 'id', dateFields: [] },
+	meetings: { table: meetings, key: 'id', dateFields: ['date'] },
+	redirects: { table: redirects, key: 'slug', dateFields: ['createdAt', 'updatedAt'] },
+	notes: { table: notes, key: 'id', dateFields: ['date', 'createdAt', 'updatedAt'] },
+	information: { table: information, key: 'id', dateFields: ['createdAt', 'updatedAt'] },
+	lessonIcons: { table: lessonIcons, key: 'categoryName', dateFields: ['createdAt', 'updatedAt'] },
+	adminSessions: { table: adminSessions, key: 'id', dateFields: ['createdAt', 'expiresAt'] }
+};
+
+// Rows per query when streaming a table, and the most rows accepted per restore batch
+export const DUMP_PAGE_SIZE = 500;
+export const MAX_RESTORE_BATCH = 1000;
+
+// Helper to parse ISO timestamp fields into Date instances
+export function parseDate(value: unknown): Date | null {
+	if (typeof value === 'string') {
+		const d = new Date(value);
+		return isNaN(d.getTime()) ? null : d;
+	}
+	if (value instanceof Date) return value;
+	return null;
+}
+
+/**
+ * Converts a dumped row back into insertable values.
+ */
+export function restoreRow(tableName: string, row: any): any {
+	const restored = { ...row };
+	for (const field of DUMP_TABLES[tableName].dateFields) {
+		restored[field] = parseDate(row[field]);
+	}
+	if (tableName === 'notes') {
+		// Use createdAt as fallback if date is null (for legacy data)
+		restored.date = restored.date || restored.createdAt || new Date();
+	}
+	return restored;
+}
+
+export async function countRows(tableName: string): Promise<number> {
+	const [{ rows }] = await db.select({ rows: count() }).from(DUMP_TABLES[tableName].table);
+	return rows;
+}
+
+/**
+ * Streams a table as NDJSON, one query of `DUMP_PAGE_SIZE` rows at a time, paging by
+ * primary key.
+ */
+export function streamTable(tableName: string): ReadableStream<Uint8Array> {
+	const { table, key } = DUMP_TABLES[tableName];
+	const primaryKey = getTableColumns(table)[key];
+	const encoder = new TextEncoder();
+	let lastKey: unknown = undefined;
+
+	return new ReadableStream({
+		async pull(controller) {
+			const rows: any[] = await db
+				.select()
+				.from(table)
+				.where(lastKey === undefined ? undefined : gt(primaryKey, lastKey))
+				.orderBy(asc(primaryKey))
+				.limit(DUMP_PAGE_SIZE);
+			if (rows.length > 0) {
+				lastKey = rows[rows.length - 1][key];
+				controller.enqueue(encoder.encode(rows.map((row) => JSON.stringify(row) + '\n').join('')));
+			}
+			if (rows.length < DUMP_PAGE_SIZE) {
+				controller.close();
+			}
+		}
+	});
+}
+
+// Restores fill a staging copy of each table, and the copies replace their tables in
+// one transaction once every batch of every table is in, so a restore that fails partway
+// leaves the database as it was
+function stagingName(tableName: string): string {
+	return `${getTableName(DUMP_TABLES[tableName].table)}_restore`;
+}
+
+/**
+ * Adds restored rows (see `restoreRow`) to a table's staging copy. With `create`, the
+ * copy is first created afresh, dropping whatever an abandoned restore left behind.
+ */
+export async function stageRows(tableName: string, rows: any[], create: boolean) {
+	const { table } = DUMP_TABLES[tableName];
+	const target = sql.identifier(getTableName(table));
+	const staging = sql.identifier(stagingName(tableName));
+	// jsonb_populate_recordset matches database column names, not property names
+	const columns = Object.entries(getTableColumns(table));
+	const records = rows.map((row) =>
+		Object.fromEntries(columns.map(([key, column]) => [column.name, row[key] ?? null]))
+	);
+
+	await db.transaction(async (tx) => {
+		if (create) {
+			await tx.execute(sql`drop table if exists ${staging}`);
+			await tx.execute(sql`create table ${staging} (like ${target} including defaults)`);
+		}
+		if (records.length > 0) {
+			await tx.execute(
+				sql`insert into ${staging} select * from jsonb_populate_recordset(null::${target}, ${JSON.stringify(records)}::jsonb)`
+			);
+		}
+	});
+}
+
+export type CommitResult =
+	| { ok: true; inserted: Record<string, number> }
+	| { ok: false; unstaged: string[] };
+
+/**
+ * Replaces tables with their staging copies in one transaction and drops the copies.
+ * Nothing is replaced unless every table was staged.
+ */
+export async function commitStaged(tableNames: string[]): Promise<CommitResult> {
+	// Restore order, whatever order they were named in
+	const names = Object.keys(DUMP_TABLES).filter((name) => tableNames.includes(name));
+
+	return db.transaction(async (tx): Promise<CommitResult> => {
+		const unstaged: string[] = [];
+		for (const name of names) {
+			const [{ staged }] = await tx.execute<{ staged: boolean }>(
+				sql`select to_regclass(${stagingName(name)}) is not null as staged`
+			);
+			if (!staged) unstaged.push(name);
+		}
+		if (unstaged.length > 0) return { ok: false, unstaged };
+
+		// Rows that refer to other tables are deleted before the rows they refer to
+		for (const name of [...names].reverse()) {
+			await tx.delete(DUMP_TABLES[name].table);
+		}
+		const inserted: Record<string, number> = {};
+		for (const name of names) {
+			const { table } = DUMP_TABLES[name];
+			const target = sql.identifier(getTableName(table));
+			const staging = sql.identifier(stagingName(name));
+			await tx.execute(sql`insert into ${target} select * from ${staging}`);
+			await tx.execute(sql`drop table ${staging}`);
+			const [{ rows }] = await tx.select({ rows: count() }).from(table);
+			inserted[name] = rows;
+		}
+		return { ok: true, inserted };
+	});
+}
+
+export interface UploadFile {
+	path: string;
+	size: number;
+	mtime: string;
+}
+
+// On disk, uploads live under static/uploads
+export function uploadsRoot(): string {
+	return join(process.cwd(), 'static', 'uploads');
+}
+
+// Basic path validation to prevent directory traversal
+export function isSafeUploadPath(relPath: string): boolean {
+	return !relPath.includes('..') && !relPath.startsWith('/') && !relPath.includes('\\');
+}
+
+/**
+ * Every file under the uploads directory, or none if it does not exist yet.
+ */
+export async function listUploads(): Promise<UploadFile[]> {
+	const rootDir = uploadsRoot();
+	const results: UploadFile[] = [];
+
+	async function walk(currentDir: string) {
+		const entries = await readdir(currentDir, { withFileTypes: true });
+		for (const entry of entries) {
+			const fullPath = join(currentDir, entry.name);
+			if (entry.isDirectory()) {
+				await walk(fullPath);
+			} else if (entry.isFile()) {
+				const stats = await stat(fullPath);
+				results.push({
+					path: relative(rootDir, fullPath).replace(/\\/g, '/'),
+					size: stats.size,
+					mtime: stats.mtime.toISOString()
+				});
+			}
+		}
+	}
+
+	try {
+		await walk(rootDir);
+	} catch (err) {
+		// If the uploads directory does not exist yet, just return empty list
+		return [];
+	}
+	return results;
+}
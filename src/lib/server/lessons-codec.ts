@@ -0,0 +1,44 @@
+import * as zlib from 'node:zlib';
+
+/**
+ * Decoder for lesson cache payloads written by the lessons service with `CACHE_CODEC` set
+ * (see lessons-service/codec.py). Framed values are laid out as:
+ *
+ *   offset  size  field
+ *   0       4     magic, ASCII "LCF1"
+ *   4       1     codec: 0 = none, 1 = gzip, 2 = zstd
+ *   5       32    SHA-256 of the uncompressed UTF-8 content
+ *   37      ...   content, compressed with the codec
+ *
+ * Anything without the magic is a plain UTF-8 string.
+ */
+const MAGIC = Buffer.from('LCF1', 'ascii');
+const HEADER_SIZE = 37;
+
+// zstd landed in node:zlib after Node 22's typings, so look it up at runtime
+const zstdDecompressSync = (zlib as { zstdDecompressSync?: (buf: Buffer) => Buffer })
+	.zstdDecompressSync;
+
+export function decodeLessonsValue(value: Buffer): string {
+	if (value.length < HEADER_SIZE || !value.subarray(0, MAGIC.length).equals(MAGIC)) {
+		return value.toString('utf-8');
+	}
+
+	const codec = value[4];
+	const payload = value.subarray(HEADER_SIZE);
+	switch (codec) {
+		case 0:
+			return payload.toString('utf-8');
+		case 1:
+			return zlib.gunzipSync(payload).toString('utf-8');
+		case 2:
+			if (!zstdDecompressSync) {
+				throw new Error(
+					'This runtime cannot decode zstd lesson cache values; use CACHE_CODEC=gzip'
+				);
+			}
+			return zstdDecompressSync(payload).toString('utf-8');
+		default:
+			throw new Error(`Unknown lesson cache codec id: ${codec}`);
+	}
+}
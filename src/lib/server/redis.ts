@@ -1,6 +1,7 @@
-import { createClient } from 'redis';
+import { createClient, RESP_TYPES } from 'redis';
 import { env } from '$env/dynamic/private';
 import { logger } from './logger';
+import { decodeLessonsValue } from './lessons-codec';
 
 let redisClient: ReturnType<typeof createClient> | null = null;
 let connectionPromise: Promise<void> | null = null;
@@ -54,10 +55,34 @@ async function ensureConnected(): Promise<ReturnType<typeof createClient>> {
 	return redisClient;
 }
 
+/**
+ * Key prefix of the lesson cache generation currently published by the lessons service.
+ * Each refresh writes a complete `lessons:v{N}:*` keyspace and then flips `lessons:current`,
+ * so a repo list and its READMEs are always read from the same snapshot.
+ */
+async function currentLessonsPrefix(client: ReturnType<typeof createClient>): Promise<string> {
+	const generation = await client.get('lessons:current');
+	// Fall back to the unversioned keys written by older lessons-service builds
+	return generation ? `lessons:v${generation}:` : 'lessons:';
+}
+
+/**
+ * Reads a lesson payload (repo list, README, category tree), which the lessons service
+ * may store compressed.
+ */
+async function getLessonsPayload(
+	client: ReturnType<typeof createClient>,
+	key: string
+): Promise<string | null> {
+	const value = await client.withTypeMapping({ [RESP_TYPES.BLOB_STRING]: Buffer }).get(key);
+	return value ? decodeLessonsValue(value) : null;
+}
+
 export async function getCachedRepos(): Promise<any[] | null> {
 	try {
 		const client = await ensureConnected();
-		const data = await client.get('lessons:repos');
+		const prefix = await currentLessonsPrefix(client);
+		const data = await getLessonsPayload(client, `${prefix}repos`);
 		if (data) {
 			return JSON.parse(data);
 		}
@@ -68,15 +93,240 @@ export async function getCachedRepos(): Promise<any[] | null> {
 	}
 }
 
-export async function getCachedReadme(repoName: string): Promise<string | null> {
+export interface TocEntry {
+	level: number;
+	id: string;
+	title: string;
+}
+
+export interface RenderedReadme {
+	html: string | null;
+	toc: TocEntry[];
+}
+
+export interface CachedReadme {
+	content: string;
+	/**
+	 * README HTML pre-rendered by the lessons service: sanitized, with heading ids for the
+	 * table of contents and relative links pointing at the repository on GitHub. Null if
+	 * it has not been rendered.
+	 */
+	rendered: RenderedReadme | null;
+}
+
+/**
+ * A README's markdown and pre-rendered HTML, both read from the same cache generation in
+ * one round trip, so the HTML always belongs to the markdown it is served with.
+ */
+export async function getCachedReadme(repoName: string): Promise<CachedReadme | null> {
 	try {
 		const client = await ensureConnected();
-		const key = `lessons:readme:${repoName}`;
-		const content = await client.get(key);
-		return content || null;
+		const prefix = await currentLessonsPrefix(client);
+		const [content, html] = await client
+			.withTypeMapping({ [RESP_TYPES.BLOB_STRING]: Buffer })
+			.mGet([`${prefix}readme:${repoName}`, `${prefix}readme_html:${repoName}`]);
+		const markdown = content ? decodeLessonsValue(content) : null;
+		if (!markdown) return null;
+		return {
+			content: markdown,
+			rendered: html ? parseRenderedReadme(repoName, decodeLessonsValue(html)) : null
+		};
 	} catch (err) {
 		logger.error(`Error retrieving README for ${repoName} from Redis`, err);
 		return null;
 	}
 }
 
+function parseRenderedReadme(repoName: string, data: string): RenderedReadme | null {
+	try {
+		const { html, toc } = JSON.parse(data);
+		return { html, toc };
+	} catch (err) {
+		// The markdown is still worth serving without its HTML
+		logger.error(`Error parsing rendered README for ${repoName}`, err);
+		return null;
+	}
+}
+
+export async function getCachedRepo(repoName: string): Promise<any | null> {
+	try {
+		const client = await ensureConnected();
+		const prefix = await currentLessonsPrefix(client);
+		const data = await client.hGet(`${prefix}repo_index`, repoName);
+		return data ? JSON.parse(data) : null;
+	} catch (err) {
+		logger.error(`Error retrieving repo ${repoName} from Redis`, err);
+		return null;
+	}
+}
+
+/**
+ * Lesson repos carrying a topic, most recently committed first.
+ */
+export async function getCachedTopicRepos(topic: string): Promise<any[] | null> {
+	try {
+		const client = await ensureConnected();
+		const prefix = await currentLessonsPrefix(client);
+		const names = await client.zRange(`${prefix}topic:${topic}`, 0, -1, { REV: true });
+		if (names.length === 0) {
+			return null;
+		}
+		const records = await client.hmGet(`${prefix}repo_index`, names);
+		return records
+			.filter((record): record is string => !!record)
+			.map((record) => JSON.parse(record));
+	} catch (err) {
+		logger.error(`Error retrieving repos for topic ${topic} from Redis`, err);
+		return null;
+	}
+}
+
+/**
+ * Category tree precomputed by the lessons service, in the shape `buildCategoryTree` returns.
+ */
+export async function getCachedCategoryTree(): Promise<Record<string, unknown> | null> {
+	try {
+		const client = await ensureConnected();
+		const prefix = await currentLessonsPrefix(client);
+		const data = await getLessonsPayload(client, `${prefix}category_tree`);
+		return data ? JSON.parse(data) : null;
+	} catch (err) {
+		logger.error('Error retrieving category tree from Redis', err);
+		return null;
+	}
+}
+
+export interface CacheFreshness {
+	/** When the lessons service fetched the cached data from GitHub */
+	fetchedAt: Date;
+	/** True while the lessons service serves old data because GitHub refreshes are failing */
+	stale: boolean;
+}
+
+/**
+ * Freshness metadata the lessons service stores with each cache generation. Null when
+ * the cache is empty or was written before the metadata existed.
+ */
+export async function getCacheFreshness(): Promise<CacheFreshness | null> {
+	try {
+		const client = await ensureConnected();
+		const prefix = await currentLessonsPrefix(client);
+		const meta = await client.hGetAll(`${prefix}meta`);
+		if (!meta.fetched_at || !meta.stale_after) return null;
+		return {
+			fetchedAt: new Date(Number(meta.fetched_at) * 1000),
+			stale: Date.now() >= Number(meta.stale_after) * 1000
+		};
+	} catch (err) {
+		logger.error('Error retrieving lesson cache freshness from Redis', err);
+		return null;
+	}
+}
+
+/**
+ * `x-lessons-fetched-at` / `x-lessons-stale` headers for responses built from the lesson
+ * cache, matching the lessons service's read API.
+ */
+export async function getFreshnessHeaders(): Promise<Record<string, string>> {
+	const freshness = await getCacheFreshness();
+	if (!freshness) return {};
+	return {
+		'x-lessons-fetched-at': freshness.fetchedAt.toISOString().replace(/\.\d{3}Z$/, 'Z'),
+		'x-lessons-stale': String(freshness.stale)
+	};
+}
+
+// README cache misses are filled by the lessons service; see lessons-service/readme_fill.py
+const README_FILL_QUEUE = 'lessons:readme_fill_queue';
+const README_FILL_MARKER = 'lessons:readme_fill:';
+const README_FILLED_CHANNEL = 'lessons:readme_filled';
+// How long a queued fill holds off further requests if no lessons service picks it up
+const README_FILL_CLAIM_SECONDS = 30;
+
+export type ReadmeFillStatus = 'cached' | 'missing' | 'failed' | 'timeout';
+
+let fillSubscription: Promise<void> | null = null;
+// Resolvers of the requests in this process waiting on each repo's fill
+const fillWaiters = new Map<string, Set<(status: ReadmeFillStatus) => void>>();
+
+async function ensureFillSubscription(client: ReturnType<typeof createClient>): Promise<void> {
+	if (!fillSubscription) {
+		// Subscribing takes over a connection, so it gets its own
+		const subscriber = client.duplicate();
+		subscriber.on('error', (err) => {
+			logger.error('Redis subscriber error', err);
+		});
+		fillSubscription = subscriber
+			.connect()
+			.then(() =>
+				subscriber.subscribe(README_FILLED_CHANNEL, (message) => {
+					let name: string;
+					let status: ReadmeFillStatus;
+					try {
+						({ name, status } = JSON.parse(message));
+					} catch (err) {
+						return;
+					}
+					const waiters = fillWaiters.get(name);
+					fillWaiters.delete(name);
+					waiters?.forEach((resolve) => resolve(status));
+				})
+			)
+			.catch((err) => {
+				fillSubscription = null;
+				throw err;
+			});
+	}
+	await fillSubscription;
+}
+
+/**
+ * Asks the lessons service to fetch a README that missed the cache, and waits for it.
+ * However many readers miss the same README at once, one request is queued and GitHub
+ * is asked once; every waiting reader is told when it is done. Resolves to 'cached'
+ * (read it again), 'missing' (not a lesson, or no README), 'failed', or 'timeout' if
+ * no lessons service answered within `timeoutMs` or Redis is unreachable.
+ */
+export async function requestReadmeFill(
+	repoName: string,
+	timeoutMs = 5000
+): Promise<ReadmeFillStatus> {
+	try {
+		const client = await ensureConnected();
+		// Subscribe before queueing, so a fill that finishes right away isn't missed
+		await ensureFillSubscription(client);
+
+		let settle!: (status: ReadmeFillStatus) => void;
+		const result = new Promise<ReadmeFillStatus>((resolve) => (settle = resolve));
+		const waiters = fillWaiters.get(repoName) ?? new Set();
+		waiters.add(settle);
+		fillWaiters.set(repoName, waiters);
+		const timer = setTimeout(() => settle('timeout'), timeoutMs);
+
+		try {
+			const marker = `${README_FILL_MARKER}${repoName}`;
+			// Only the first reader to miss queues the fill; the rest just wait for it
+			const claimed = await client.set(marker, 'pending', {
+				condition: 'NX',
+				expiration: { type: 'EX', value: README_FILL_CLAIM_SECONDS }
+			});
+			if (claimed) {
+				await client.rPush(README_FILL_QUEUE, repoName);
+			} else if ((await client.get(marker)) === 'missing') {
+				// Recently found to have no README
+				settle('missing');
+			}
+			return await result;
+		} finally {
+			clearTimeout(timer);
+			waiters.delete(settle);
+			if (waiters.size === 0 && fillWaiters.get(repoName) === waiters) {
+				fillWaiters.delete(repoName);
+			}
+		}
+	} catch (err) {
+		logger.error(`Error requesting README fill for ${repoName}`, err);
+		// Nobody can answer without Redis; let the caller fall back
+		return 'timeout';
+	}
+}
@@ -0,0 +1,302 @@
+import { createHash } from 'node:crypto';
+import { createReadStream } from 'node:fs';
+import { stat } from 'node:fs/promises';
+import { PassThrough, type Transform } from 'node:stream';
+import * as zlib from 'node:zlib';
+
+/**
+ * Streaming tar (pax) writer and reader for bulk upload transfers. Every file entry
+ * carries the SHA-256 of its contents in a pax header record, so whichever side
+ * receives the archive can check each file. Python's tarfile reads and writes the
+ * same format (the record shows up in `TarInfo.pax_headers`).
+ */
+export const CHECKSUM_KEY = 'HACKSU.sha256';
+
+const BLOCK_SIZE = 512;
+// Largest size the 11 octal digits of a ustar header can hold; bigger ones go in pax
+const MAX_USTAR_SIZE = 8 ** 11 - 1;
+
+export const ARCHIVE_COMPRESSIONS = ['none', 'gzip', 'zstd'] as const;
+export type ArchiveCompression = (typeof ARCHIVE_COMPRESSIONS)[number];
+
+// zstd landed in node:zlib after Node 22's typings, so look it up at runtime
+const zstd = zlib as {
+	createZstdCompress?: () => Transform;
+	createZstdDecompress?: () => Transform;
+};
+
+/**
+ * Stream that compresses an archive, or null if this runtime can't.
+ */
+export function compressor(compression: ArchiveCompression): Transform | null {
+	switch (compression) {
+		case 'none':
+			return new PassThrough();
+		case 'gzip':
+			return zlib.createGzip();
+		case 'zstd':
+			return zstd.createZstdCompress?.() ?? null;
+	}
+}
+
+/**
+ * Stream that decompresses an archive, or null if this runtime can't.
+ */
+export function decompressor(compression: ArchiveCompression): Transform | null {
+	switch (compression) {
+		case 'none':
+			return new PassThrough();
+		case 'gzip':
+			return zlib.createGunzip();
+		case 'zstd':
+			return zstd.createZstdDecompress?.() ?? null;
+	}
+}
+
+export function parseCompression(value: string | null): ArchiveCompression | null {
+	const compression = value ?? 'none';
+	return (ARCHIVE_COMPRESSIONS as readonly string[]).includes(compression)
+		? (compression as ArchiveCompression)
+		: null;
+}
+
+function writeOctal(block: Buffer, value: number, offset: number, length: number) {
+	block.write(value.toString(8).padStart(length - 1, '0') + '\0', offset, length, 'ascii');
+}
+
+function readOctal(block: Buffer, offset: number, length: number): number {
+	const digits = block.toString('ascii', offset, offset + length).replace(/\0.*$/s, '').trim();
+	return digits ? parseInt(digits, 8) : 0;
+}
+
+// Sum of the header bytes, counting the checksum field itself as spaces
+function headerChecksum(block: Buffer): number {
+	let sum = 8 * 0x20;
+	for (let i = 0; i < BLOCK_SIZE; i++) {
+		if (i < 148 || i >= 156) sum += block[i];
+	}
+	return sum;
+}
+
+function header(name: string, size: number, mtime: number, type: string): Buffer {
+	const block = Buffer.alloc(BLOCK_SIZE);
+	// Readers take the full path from the pax header; this is only a fallback
+	block.write(name, 0, 100, 'utf-8');
+	writeOctal(block, 0o644, 100, 8);
+	writeOctal(block, 0, 108, 8);
+	writeOctal(block, 0, 116, 8);
+	writeOctal(block, size, 124, 12);
+	writeOctal(block, Math.floor(mtime), 136, 12);
+	block.write(type, 156, 1, 'ascii');
+	block.write('ustar\0', 257, 6, 'ascii');
+	block.write('00', 263, 2, 'ascii');
+	writeOctal(block, headerChecksum(block), 148, 7);
+	block[155] = 0x20;
+	return block;
+}
+
+// "<length> <key>=<value>\n", where the length counts its own digits
+function paxRecord(key: string, value: string): string {
+	const body = ` ${key}=${value}\n`;
+	const bodyLength = Buffer.byteLength(body);
+	let length = bodyLength + String(bodyLength).length;
+	if (String(length).length > String(bodyLength).length) length++;
+	return `${length}${body}`;
+}
+
+function parsePax(data: Buffer): Record<string, string> {
+	const records: Record<string, string> = {};
+	let offset = 0;
+	while (offset < data.length) {
+		const space = data.indexOf(0x20, offset);
+		const length = parseInt(data.toString('ascii', offset, space), 10);
+		if (space < 0 || !length) break;
+		const record = data.toString('utf-8', space + 1, offset + length - 1);
+		const equals = record.indexOf('=');
+		records[record.slice(0, equals)] = record.slice(equals + 1);
+		offset += length;
+	}
+	return records;
+}
+
+function padding(size: number): number {
+	return (BLOCK_SIZE - (size % BLOCK_SIZE)) % BLOCK_SIZE;
+}
+
+async function hashFile(path: string): Promise<string> {
+	const hash = createHash('sha256');
+	for await (const chunk of createReadStream(path)) {
+		hash.update(chunk);
+	}
+	return hash.digest('hex');
+}
+
+/**
+ * Streams a tar archive of `files`. Each file is read twice, once to hash it for its
+ * header and once to send it; files that disappear in between listing and hashing are
+ * left out.
+ */
+export async function* writeTar(
+	files: Array<{ path: string; fullPath: string }>
+): AsyncGenerator<Buffer> {
+	for (const file of files) {
+		let size: number;
+		let mtime: number;
+		let sha256: string;
+		try {
+			const stats = await stat(file.fullPath);
+			size = stats.size;
+			mtime = stats.mtimeMs / 1000;
+			sha256 = await hashFile(file.fullPath);
+		} catch (err) {
+			if ((err as NodeJS.ErrnoException).code === 'ENOENT') continue;
+			throw err;
+		}
+
+		let pax = paxRecord('path', file.path) + paxRecord('mtime', String(mtime));
+		pax += paxRecord(CHECKSUM_KEY, sha256);
+		if (size > MAX_USTAR_SIZE) pax += paxRecord('size', String(size));
+		const paxData = Buffer.from(pax, 'utf-8');
+		yield header('PaxHeader', paxData.length, mtime, 'x');
+		yield Buffer.concat([paxData, Buffer.alloc(padding(paxData.length))]);
+		yield header(file.path, size > MAX_USTAR_SIZE ? 0 : size, mtime, '0');
+
+		let sent = 0;
+		if (size > 0) {
+			for await (const chunk of createReadStream(file.fullPath, { start: 0, end: size - 1 })) {
+				sent += chunk.length;
+				yield chunk;
+			}
+		}
+		// The file shrank since stat(); keep the archive well-formed and let the
+		// receiver's checksum check reject the entry
+		if (sent < size) yield Buffer.alloc(size - sent);
+		yield Buffer.alloc(padding(size));
+	}
+	// End of archive
+	yield Buffer.alloc(2 * BLOCK_SIZE);
+}
+
+export interface TarEntry {
+	path: string;
+	size: number;
+	// Seconds since the epoch
+	mtime: number;
+	sha256: string | undefined;
+	// Must be read (or abandoned) before asking for the next entry
+	body: AsyncGenerator<Buffer>;
+}
+
+class ByteReader {
+	private iterator: AsyncIterator<Uint8Array>;
+	private buffer = Buffer.alloc(0);
+
+	constructor(source: AsyncIterable<Uint8Array>) {
+		this.iterator = source[Symbol.asyncIterator]();
+	}
+
+	// Up to `max` bytes, or null at the end of the input
+	async next(max: number): Promise<Buffer | null> {
+		while (this.buffer.length === 0) {
+			const { done, value } = await this.iterator.next();
+			if (done) return null;
+			this.buffer = Buffer.from(value.buffer, value.byteOffset, value.byteLength);
+		}
+		const chunk = this.buffer.subarray(0, max);
+		this.buffer = this.buffer.subarray(chunk.length);
+		return chunk;
+	}
+
+	// Exactly `length` bytes; null if the input ended before the first one
+	async read(length: number): Promise<Buffer | null> {
+		const parts: Buffer[] = [];
+		let received = 0;
+		while (received < length) {
+			const chunk = await this.next(length - received);
+			if (!chunk) {
+				if (received === 0) return null;
+				throw new Error('Truncated tar archive');
+			}
+			parts.push(chunk);
+			received += chunk.length;
+		}
+		return Buffer.concat(parts, length);
+	}
+
+	async skip(length: number) {
+		if (length > 0 && !(await this.read(length))) {
+			throw new Error('Truncated tar archive');
+		}
+	}
+
+	async drain() {
+		while (await this.next(Infinity));
+	}
+}
+
+/**
+ * Reads regular file entries from a tar stream, one at a time. Directories, links and
+ * other entry types are skipped.
+ */
+export async function* readTar(source: AsyncIterable<Uint8Array>): AsyncGenerator<TarEntry> {
+	const reader = new ByteReader(source);
+	// Global (g) records apply to every later entry; per-entry (x) ones override them
+	let globalPax: Record<string, string> = {};
+	let pax: Record<string, string> = {};
+	let longName: string | undefined;
+
+	while (true) {
+		const block = await reader.read(BLOCK_SIZE);
+		if (!block || block.every((byte) => byte === 0)) {
+			// Writers pad the end with zero blocks; read them so the sender can finish
+			await reader.drain();
+			return;
+		}
+		if (readOctal(block, 148, 8) !== headerChecksum(block)) {
+			throw new Error('Corrupt tar header');
+		}
+
+		const type = block[156] === 0 ? '0' : String.fromCharCode(block[156]);
+		const headerSize = readOctal(block, 124, 12);
+		if (type === 'x' || type === 'g' || type === 'L') {
+			const data = (await reader.read(headerSize + padding(headerSize))) ?? Buffer.alloc(0);
+			if (data.length < headerSize) throw new Error('Truncated tar archive');
+			const content = data.subarray(0, headerSize);
+			if (type === 'x') pax = { ...pax, ...parsePax(content) };
+			if (type === 'g') globalPax = { ...globalPax, ...parsePax(content) };
+			if (type === 'L') longName = content.toString('utf-8').replace(/\0+$/, '');
+			continue;
+		}
+
+		const attributes = { ...globalPax, ...pax };
+		const size = attributes.size ? Number(attributes.size) : headerSize;
+		if (type === '0' || type === '7') {
+			const prefix = block.toString('utf-8', 345, 500).replace(/\0.*$/s, '');
+			const name = block.toString('utf-8', 0, 100).replace(/\0.*$/s, '');
+			let remaining = size;
+			const body = (async function* () {
+				while (remaining > 0) {
+					const chunk = await reader.next(remaining);
+					if (!chunk) throw new Error('Truncated tar archive');
+					remaining -= chunk.length;
+					yield chunk;
+				}
+			})();
+			yield {
+				path: attributes.path ?? longName ?? (prefix ? `${prefix}/${name}` : name),
+				size,
+				mtime: attributes.mtime ? Number(attributes.mtime) : readOctal(block, 136, 12),
+				sha256: attributes[CHECKSUM_KEY],
+				body
+			};
+			// Skip whatever the consumer didn't read
+			await reader.skip(remaining);
+			remaining = 0;
+			await reader.skip(padding(size));
+		} else {
+			await reader.skip(size + padding(size));
+		}
+		pax = {};
+		longName = undefined;
+	}
+}
@@ -1,82 +1,71 @@
 import type { RequestHandler } from './$types';
 import { json } from '@sveltejs/kit';
 import { requireAdmin } from '$lib/server/admin';
-import { readdir, stat, writeFile, mkdir } from 'fs/promises';
-import { join, relative, dirname } from 'path';
-
-async function listFilesRecursive(rootDir: string): Promise<
-	Array<{ path: string; size: number; mtime: string }>
-> {
-	const results: Array<{ path: string; size: number; mtime: string }> = [];
-
-	async function walk(currentDir: string) {
-		const entries = await readdir(currentDir, { withFileTypes: true });
-		for (const entry of entries) {
-			const fullPath = join(currentDir, entry.name);
-			if (entry.isDirectory()) {
-				await walk(fullPath);
-			} else if (entry.isFile()) {
-				const stats = await stat(fullPath);
-				results.push({
-					path: relative(rootDir, fullPath).replace(/\\/g, '/'),
-					size: stats.size,
-					mtime: stats.mtime.toISOString()
-				});
-			}
-		}
-	}
-
-	await walk(rootDir);
-	return results;
-}
+import { isSafeUploadPath, listUploads, uploadsRoot } from '$lib/server/dump';
+import { createWriteStream } from 'fs';
+import { mkdir, rename, unlink } from 'fs/promises';
+import { join, dirname } from 'path';
+import { Readable } from 'stream';
+import { pipeline } from 'stream/promises';
 
 export const GET: RequestHandler = async (event) => {
 	await requireAdmin(event);
 
-	// On disk, uploads live under static/uploads
-	const rootDir = join(process.cwd(), 'static', 'uploads');
-
-	let files: Array<{ path: string; size: number; mtime: string }>;
-	try {
-		files = await listFilesRecursive(rootDir);
-	} catch (err) {
-		// If the uploads directory does not exist yet, just return empty list
-		files = [];
-	}
-
 	return json({
 		generatedAt: new Date().toISOString(),
 		root: 'static/uploads',
 		publicBase: '/uploads',
-		files
+		files: await listUploads()
 	});
 };
 
+/**
+ * Streams a request body to `relPath` under the uploads directory via a temp file, so
+ * an interrupted upload never leaves a truncated file in place.
+ */
+async function saveUpload(relPath: string, body: ReadableStream<Uint8Array>) {
+	const destPath = join(uploadsRoot(), relPath);
+	const tmpPath = `${destPath}.part`;
+
+	// Ensure directory exists
+	await mkdir(dirname(destPath), { recursive: true });
+
+	try {
+		await pipeline(Readable.fromWeb(body as any), createWriteStream(tmpPath));
+	} catch (err) {
+		await unlink(tmpPath).catch(() => {});
+		throw err;
+	}
+	await rename(tmpPath, destPath);
+}
+
+// Saves one upload. The file is either the raw request body with ?path=, which is
+// streamed to disk as it arrives, or a multipart form with `path` and `file` fields,
+// which SvelteKit buffers in full before the handler runs.
 export const POST: RequestHandler = async (event) => {
 	await requireAdmin(event);
 
-	const formData = await event.request.formData();
-	const relPath = formData.get('path')?.toString();
-	const file = formData.get('file') as File | null;
+	let relPath: string | undefined;
+	let body: ReadableStream<Uint8Array> | null;
+	if (event.request.headers.get('content-type')?.startsWith('multipart/form-data')) {
+		const formData = await event.request.formData();
+		const file = formData.get('file') as File | null;
+		relPath = formData.get('path')?.toString();
+		body = file ? file.stream() : null;
+	} else {
+		relPath = event.url.searchParams.get('path') ?? undefined;
+		body = event.request.body;
+	}
 
-	if (!relPath || !file) {
+	if (!relPath || !body) {
 		return json({ ok: false, error: 'Missing path or file' }, { status: 400 });
 	}
 
-	// Basic path validation to prevent directory traversal
-	if (relPath.includes('..') || relPath.startsWith('/') || relPath.includes('\\')) {
+	if (!isSafeUploadPath(relPath)) {
 		return json({ ok: false, error: 'Invalid path' }, { status: 400 });
 	}
 
-	const uploadsRoot = join(process.cwd(), 'static', 'uploads');
-	const destPath = join(uploadsRoot, relPath);
-
-	// Ensure directory exists
-	await mkdir(dirname(destPath), { recursive: true });
-
-	const arrayBuffer = await file.arrayBuffer();
-	const buffer = Buffer.from(arrayBuffer);
-	await writeFile(destPath, buffer);
+	await saveUpload(relPath, body);
 
 	return json({
 		ok: true,
@@ -84,4 +73,3 @@ export const POST: RequestHandler = async (event) => {
 		path: relPath
 	});
 };
-
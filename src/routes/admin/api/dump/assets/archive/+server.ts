@@ -0,0 +1,139 @@
+import type { RequestHandler } from './$types';
+import { error, json } from '@sveltejs/kit';
+import { requireAdmin } from '$lib/server/admin';
+import { isSafeUploadPath, listUploads, uploadsRoot } from '$lib/server/dump';
+import { compressor, decompressor, parseCompression, readTar, writeTar } from '$lib/server/tar';
+import type { TarEntry } from '$lib/server/tar';
+import { logger } from '$lib/server/logger';
+import { createHash } from 'crypto';
+import { createWriteStream } from 'fs';
+import { mkdir, rename, unlink, utimes } from 'fs/promises';
+import { join, dirname } from 'path';
+import { Readable } from 'stream';
+import { pipeline } from 'stream/promises';
+
+// Content types for ?compression=
+const CONTENT_TYPES = {
+	none: 'application/x-tar',
+	gzip: 'application/gzip',
+	zstd: 'application/zstd'
+};
+
+function requestedCompression(url: URL) {
+	const compression = parseCompression(url.searchParams.get('compression'));
+	if (!compression) {
+		throw error(400, 'compression must be none, gzip or zstd');
+	}
+	return compression;
+}
+
+/**
+ * Saves one archive entry via a temp file if its contents match its checksum. Returns
+ * why it was rejected, or null once it is in place.
+ */
+async function saveEntry(entry: TarEntry): Promise<string | null> {
+	if (!isSafeUploadPath(entry.path)) return 'Invalid path';
+	if (!entry.sha256) return 'Missing checksum';
+
+	const destPath = join(uploadsRoot(), entry.path);
+	const tmpPath = `${destPath}.part`;
+	await mkdir(dirname(destPath), { recursive: true });
+
+	const hash = createHash('sha256');
+	try {
+		await pipeline(
+			entry.body,
+			async function* (source: AsyncIterable<Buffer>) {
+				for await (const chunk of source) {
+					hash.update(chunk);
+					yield chunk;
+				}
+			},
+			createWriteStream(tmpPath)
+		);
+	} catch (err) {
+		await unlink(tmpPath).catch(() => {});
+		throw err;
+	}
+
+	if (hash.digest('hex') !== entry.sha256) {
+		await unlink(tmpPath);
+		return 'Checksum mismatch';
+	}
+	await rename(tmpPath, destPath);
+	await utimes(destPath, entry.mtime, entry.mtime);
+	return null;
+}
+
+// Streams uploads as one tar archive, each entry with its SHA-256. ?since=<ISO time>
+// limits it to files modified at or after that time.
+export const GET: RequestHandler = async (event) => {
+	await requireAdmin(event);
+	const compression = requestedCompression(event.url);
+	const compress = compressor(compression);
+	if (!compress) {
+		throw error(400, `This server cannot compress with ${compression}`);
+	}
+
+	const since = event.url.searchParams.get('since');
+	const sinceTime = since ? Date.parse(since) : -Infinity;
+	if (isNaN(sinceTime)) {
+		throw error(400, 'since must be an ISO 8601 time');
+	}
+
+	const rootDir = uploadsRoot();
+	const files = (await listUploads())
+		.filter((file) => Date.parse(file.mtime) >= sinceTime)
+		.map((file) => ({ path: file.path, fullPath: join(rootDir, file.path) }));
+
+	const archive = Readable.from(writeTar(files));
+	archive.on('error', (err) => {
+		logger.error('Failed to stream uploads archive', err);
+		compress.destroy(err);
+	});
+
+	return new Response(Readable.toWeb(archive.pipe(compress)) as ReadableStream, {
+		headers: {
+			'Content-Type': CONTENT_TYPES[compression],
+			'X-Archive-Files': String(files.length)
+		}
+	});
+};
+
+// Saves every entry of an uploaded tar archive whose checksum matches. Entries are
+// accepted or rejected one by one, so a bad entry doesn't fail the whole archive.
+export const POST: RequestHandler = async (event) => {
+	await requireAdmin(event);
+	const compression = requestedCompression(event.url);
+	const decompress = decompressor(compression);
+	if (!decompress) {
+		throw error(400, `This server cannot decompress ${compression}`);
+	}
+	if (!event.request.body) {
+		return json({ ok: false, error: 'Missing archive' }, { status: 400 });
+	}
+
+	const source = Readable.fromWeb(event.request.body as any);
+	source.on('error', (err) => decompress.destroy(err));
+
+	const written: string[] = [];
+	const failed: Array<{ path: string; error: string }> = [];
+	try {
+		for await (const entry of readTar(source.pipe(decompress))) {
+			const reason = await saveEntry(entry);
+			if (reason) {
+				failed.push({ path: entry.path, error: reason });
+			} else {
+				written.push(entry.path);
+			}
+		}
+	} catch (err) {
+		logger.error('Failed to read uploads archive', err, { written: written.length });
+		return json(
+			{ ok: false, error: `Invalid archive: ${(err as Error).message}`, written, failed },
+			{ status: 400 }
+		);
+	}
+
+	return json({ ok: failed.length === 0, written, failed });
+};
@@ -0,0 +1,47 @@
+import type { RequestHandler } from './$types';
+import { json } from '@sveltejs/kit';
+import { requireAdmin } from '$lib/server/admin';
+import { DUMP_TABLES, commitStaged, countRows } from '$lib/server/dump';
+
+// Tables to back up, in restore order; each is then fetched from ./[table]
+export const GET: RequestHandler = async (event) => {
+	await requireAdmin(event);
+
+	const names = Object.keys(DUMP_TABLES);
+	const counts = await Promise.all(names.map(countRows));
+
+	return json({
+		generatedAt: new Date().toISOString(),
+		schemaVersion: 2,
+		tables: names.map((name, i) => ({ name, rows: counts[i] }))
+	});
+};
+
+// Replaces the tables named in `{ "commit": [...] }` with the copies staged through
+// ./[table]?stage=1, all in one transaction, so the database is never half restored
+export const POST: RequestHandler = async (event) => {
+	await requireAdmin(event);
+
+	let names: unknown;
+	try {
+		({ commit: names } = await event.request.json());
+	} catch (err) {
+		return json({ ok: false, error: 'Invalid JSON' }, { status: 400 });
+	}
+	if (
+		!Array.isArray(names) ||
+		names.length === 0 ||
+		names.some((name) => typeof name !== 'string' || !Object.hasOwn(DUMP_TABLES, name))
+	) {
+		return json({ ok: false, error: 'commit must list known tables' }, { status: 400 });
+	}
+
+	const result = await commitStaged(names);
+	if (!result.ok) {
+		return json(
+			{ ok: false, error: `Nothing staged for ${result.unstaged.join(', ')}` },
+			{ status: 409 }
+		);
+	}
+	return json({ ok: true, inserted: result.inserted });
+};
@@ -0,0 +1,73 @@
+import type { RequestHandler } from './$types';
+import { error, json } from '@sveltejs/kit';
+import { db } from '$lib/server/db';
+import { requireAdmin } from '$lib/server/admin';
+import {
+	DUMP_TABLES,
+	MAX_RESTORE_BATCH,
+	restoreRow,
+	stageRows,
+	streamTable
+} from '$lib/server/dump';
+
+function dumpTable(name: string) {
+	if (!Object.hasOwn(DUMP_TABLES, name)) {
+		throw error(404, 'Unknown table');
+	}
+	return DUMP_TABLES[name];
+}
+
+// Streams every row of the table as NDJSON
+export const GET: RequestHandler = async (event) => {
+	await requireAdmin(event);
+	dumpTable(event.params.table);
+
+	return new Response(streamTable(event.params.table), {
+		headers: { 'Content-Type': 'application/x-ndjson' }
+	});
+};
+
+// Inserts one NDJSON batch of rows. With ?replace=1 the table is emptied first, in the
+// same transaction, which replaces a table that fits in one batch.
+//
+// A restore sends each batch with ?stage=1 instead (the first with ?stage=1&replace=1,
+// which starts a new copy), into a staging copy of the table. Once every table is staged,
+// a POST to ../tables swaps all of the copies in within one transaction.
+export const POST: RequestHandler = async (event) => {
+	await requireAdmin(event);
+	const name = event.params.table;
+	const { table } = dumpTable(name);
+	const replace = event.url.searchParams.get('replace') === '1';
+
+	const lines = (await event.request.text()).split('\n').filter((line) => line.trim());
+	if (lines.length > MAX_RESTORE_BATCH) {
+		return json(
+			{ ok: false, error: `At most ${MAX_RESTORE_BATCH} rows per batch` },
+			{ status: 413 }
+		);
+	}
+
+	let rows: any[];
+	try {
+		rows = lines.map((line) => restoreRow(name, JSON.parse(line)));
+	} catch (err) {
+		return json({ ok: false, error: 'Invalid NDJSON' }, { status: 400 });
+	}
+
+	if (event.url.searchParams.get('stage') === '1') {
+		await stageRows(name, rows, replace);
+		return json({ ok: true, table: name, staged: rows.length });
+	}
+
+	// Delete and insert together, so a failed batch doesn't leave the table empty
+	await db.transaction(async (tx) => {
+		if (replace) {
+			await tx.delete(table);
+		}
+		if (rows.length > 0) {
+			await tx.insert(table).values(rows);
+		}
+	});
+
+	return json({ ok: true, table: name, replaced: replace, inserted: rows.length });
+};
@@ -0,0 +1,18 @@
+import { json, error } from '@sveltejs/kit';
+import type { RequestHandler } from './$types';
+import { logger } from '$lib/server/logger';
+import { getCachedCategoryTree, getFreshnessHeaders } from '$lib/server/redis';
+
+export const GET: RequestHandler = async () => {
+	// Tree is built once per refresh by the Python service
+	const [tree, headers] = await Promise.all([getCachedCategoryTree(), getFreshnessHeaders()]);
+
+	if (!tree) {
+		logger.warn('No category tree found in Redis cache. Python service may not be running.');
+		throw error(503, {
+			message:
+				'Lesson categories are temporarily unavailable. The cache service may be starting up. Please try again in a few moments.'
+		});
+	}
+	return json(tree, { headers });
+};
@@ -1,7 +1,7 @@
 import { json, error } from '@sveltejs/kit';
 import type { RequestHandler } from './$types';
 import { logger } from '$lib/server/logger';
-import { getCachedRepos } from '$lib/server/redis';
+import { getCachedRepos, getFreshnessHeaders } from '$lib/server/redis';
 
 export interface LessonRepo {
 	id: string;
@@ -17,13 +17,13 @@ export interface LessonRepo {
 export const GET: RequestHandler = async () => {
 	try {
 		// Try to get repos from Redis cache (populated by Python service)
-		const repos = await getCachedRepos();
+		const [repos, headers] = await Promise.all([getCachedRepos(), getFreshnessHeaders()]);
 
 		if (repos && Array.isArray(repos) && repos.length > 0) {
 			logger.info('Returning lesson repos from Redis cache', {
 				repoCount: repos.length
 			});
-			return json(repos);
+			return json(repos, { headers });
 		}
 
 		// Cache miss or empty - this should rarely happen if Python service is running
@@ -0,0 +1,20 @@
+import { json, error } from '@sveltejs/kit';
+import type { RequestHandler } from './$types';
+import { logger } from '$lib/server/logger';
+import { getCachedRepo, getFreshnessHeaders } from '$lib/server/redis';
+
+export const GET: RequestHandler = async ({ params }) => {
+	const repoName = params.name;
+
+	// Security: validate repo name before using it in a cache lookup
+	if (!repoName || !/^[a-zA-Z0-9._-]+$/.test(repoName)) {
+		logger.warn('Invalid repository name format', { repoName });
+		throw error(400, 'Invalid repository name');
+	}
+
+	const [repo, headers] = await Promise.all([getCachedRepo(repoName), getFreshnessHeaders()]);
+	if (!repo) {
+		throw error(404, 'Lesson repository not found');
+	}
+	return json(repo, { headers });
+};
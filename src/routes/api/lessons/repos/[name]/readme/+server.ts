@@ -1,7 +1,8 @@
 import { json, error } from '@sveltejs/kit';
 import type { RequestHandler } from './$types';
 import { logger } from '$lib/server/logger';
-import { getCachedReadme } from '$lib/server/redis';
+import { getCachedReadme, getFreshnessHeaders, requestReadmeFill } from '$lib/server/redis';
+import type { RenderedReadme } from '$lib/server/redis';
 import { env } from '$env/dynamic/private';
 
 interface ReadmeResponse {
@@ -61,6 +62,29 @@ async function fetchReadmeFromGitHub(repoName: string, org: string): Promise<str
 	}
 }
 
+// Direct GitHub fetches in flight in this process, shared by concurrent requests
+const githubFetches = new Map<string, Promise<string | null>>();
+
+// Only used when no lessons service answers a fill request
+function fetchReadmeOnce(repoName: string, org: string): Promise<string | null> {
+	let pending = githubFetches.get(repoName);
+	if (!pending) {
+		pending = fetchReadmeFromGitHub(repoName, org).finally(() => githubFetches.delete(repoName));
+		githubFetches.set(repoName, pending);
+	}
+	return pending;
+}
+
+function readmeResponse(
+	content: string,
+	rendered: RenderedReadme | null,
+	headers: Record<string, string>
+) {
+	// html is null when the lessons service could not render it; callers then
+	// render the markdown themselves
+	return json({ content, html: rendered?.html ?? null, toc: rendered?.toc ?? [] }, { headers });
+}
+
 export const GET: RequestHandler = async ({ params }) => {
 	const repoName = params.name;
 	const org = 'hacksu';
@@ -80,22 +104,34 @@ export const GET: RequestHandler = async ({ params }) => {
 
 	try {
 		// Try Redis cache first
-		let content = await getCachedReadme(repoName);
-
-		if (content) {
+		const [cached, headers] = await Promise.all([getCachedReadme(repoName), getFreshnessHeaders()]);
+		if (cached) {
 			logger.info('Returning README from Redis cache', {
 				repoName,
-				contentLength: content.length
+				contentLength: cached.content.length,
+				prerendered: Boolean(cached.rendered?.html)
 			});
-			return json({ content });
+			return readmeResponse(cached.content, cached.rendered, headers);
 		}
 
-		// Cache miss - fallback to GitHub API
-		logger.debug('README not in cache, fetching from GitHub', { repoName });
-		content = await fetchReadmeFromGitHub(repoName, org);
-
-		if (content) {
-			return json({ content });
+		// Cache miss - have the lessons service fetch it once for every waiting reader
+		logger.debug('README not in cache, requesting a fill', { repoName });
+		const status = await requestReadmeFill(repoName);
+		if (status === 'cached') {
+			const filled = await getCachedReadme(repoName);
+			if (filled) {
+				logger.info('Returning README filled by the lessons service', { repoName });
+				return readmeResponse(filled.content, filled.rendered, headers);
+			}
+		} else if (status === 'failed') {
+			throw error(503, 'README is temporarily unavailable');
+		} else if (status === 'timeout') {
+			// No lessons service is consuming fill requests; fetch it ourselves
+			logger.warn('README fill timed out, fetching from GitHub', { repoName });
+			const content = await fetchReadmeOnce(repoName, org);
+			if (content) {
+				return json({ content });
+			}
 		}
 
 		// Not found in either cache or GitHub
@@ -0,0 +1,17 @@
+import { json, error } from '@sveltejs/kit';
+import type { RequestHandler } from './$types';
+import { logger } from '$lib/server/logger';
+import { getCachedTopicRepos, getFreshnessHeaders } from '$lib/server/redis';
+
+export const GET: RequestHandler = async ({ params }) => {
+	const topic = params.topic;
+
+	// GitHub topics are lowercase letters, numbers and hyphens
+	if (!topic || !/^[a-z0-9-]+$/.test(topic)) {
+		logger.warn('Invalid topic format', { topic });
+		throw error(400, 'Invalid topic');
+	}
+
+	const [repos, headers] = await Promise.all([getCachedTopicRepos(topic), getFreshnessHeaders()]);
+	return json(repos ?? [], { headers });
+};
@@ -36,7 +36,13 @@ export const load: PageServerLoad = async ({ params, fetch }) => {
 			repoName,
 			readmeLength: data.content?.length || 0
 		});
-		return { readme: data.content, repoName, error: null };
+		return {
+			readme: data.content,
+			readmeHtml: data.html ?? null,
+			toc: data.toc ?? [],
+			repoName,
+			error: null
+		};
 	} catch (err) {
 		if (err && typeof err === 'object' && 'status' in err) {
 			throw err; // Re-throw SvelteKit errors
@@ -44,6 +50,8 @@ export const load: PageServerLoad = async ({ params, fetch }) => {
 		logger.error('Error loading lesson detail page', err, { repoName });
 		return {
 			readme: null,
+			readmeHtml: null,
+			toc: [],
 			repoName,
 			error: err instanceof Error ? err.message : 'Failed to load README'
 		};